@@ -0,0 +1,42 @@
+from fastapi import APIRouter
+from typing import Any
+
+from app.api.middleware.deps import AdminUserDep
+from app.db import db
+from app.db.common_db_model import model_db
+from app.db.pool import pool_status
+from app.services.dataset_services import compaction_service
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+
+@router.get(
+    "/db_pools", summary="查询数据库连接池状态", description="返回各连接池的占用情况以及获取连接的等待、超时统计; 需要管理员权限"
+)
+def get_db_pools(current_user: AdminUserDep) -> Any:
+    pools = {
+        "api": pool_status(db.engine),
+        "background": pool_status(db.background_engine),
+        "async": pool_status(db.async_engine),
+        "model": pool_status(model_db.engine),
+    }
+    for i, (read_engine, async_read_engine) in enumerate(zip(db.read_engines, db.async_read_engines)):
+        pools[f"read_{i}"] = pool_status(read_engine)
+        pools[f"async_read_{i}"] = pool_status(async_read_engine)
+    return pools
+
+
+@router.get(
+    "/compaction", summary="查询压缩清理统计", description="返回各表回收的软删除行数、归档行数以及清理的 blob 数; 需要管理员权限"
+)
+def get_compaction_metrics(current_user: AdminUserDep) -> Any:
+    return compaction_service.metrics.snapshot()
+
+
+@router.post(
+    "/compaction", summary="执行压缩清理",
+    description="在后台立即执行一次软删除数据的压缩清理, 返回是否已启动以及当前统计; 需要管理员权限"
+)
+def run_compaction(current_user: AdminUserDep) -> Any:
+    started = compaction_service.trigger_compaction()
+    return {"started": started, **compaction_service.metrics.snapshot()}
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from typing import Any
-from app.api.middleware.deps import SessionDep, CurrentUserDep
+from app.api.middleware.deps import SessionDep, CurrentUserDep, AsyncSessionDep, run_service
+from app.db import search
 from app.lib.i18n.config import i18n
 from app.models.dataset_models.dataset_model import DatasetList, DatasetItem, DatasetUpdate
 from app.services.dataset_services import dataset_service
@@ -11,11 +12,15 @@ router = APIRouter(prefix="/datasets", tags=["datasets"])
 @router.get(
     "/", response_model=DatasetList, summary="查询所有数据集列表", description="查询所有数据集列表"
 )
-def list_dataset(session: SessionDep, current_user: CurrentUserDep, page: int = 1, page_size: int = 100,
-                        project_id: str = None, content: str = None, confirmed: str = None) -> Any:
+async def list_dataset(session: AsyncSessionDep, current_user: CurrentUserDep, page: int = 1, page_size: int = 100,
+                        project_id: str = None, content: str = None, confirmed: str = None, cursor: str = None,
+                        with_count: bool = True) -> Any:
     if project_id == "":
         raise HTTPException(status_code=500, detail=i18n.gettext("Project_id param is required"))
-    dataset_list = dataset_service.list_datasets(session, current_user, page, page_size, project_id, content, confirmed)
+    # 侧车索引检索是同步的 sqlite 调用, 在线程池中执行
+    dataset_list = await run_service(session, dataset_service.list_datasets, current_user, page, page_size,
+                                     project_id, content, confirmed, cursor=cursor, with_count=with_count,
+                                     blocking=search.uses_sidecar(content))
     return dataset_list
 
 
@@ -31,7 +31,7 @@ def list_dataset_version(session: SessionDep, current_user: CurrentUserDep, id:
 
     return FileResponse(
         path,
-        filename="dataset_version_file.jsonl",
+        filename="dataset_version_file" + os.path.splitext(path)[1],
         media_type="application/octet-stream"
     )
 
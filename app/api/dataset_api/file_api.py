@@ -1,3 +1,4 @@
+import os
 import urllib
 from io import BytesIO
 
@@ -7,7 +8,8 @@ from typing import Any, List
 from fastapi.params import File, Form
 from starlette.responses import StreamingResponse
 
-from app.api.middleware.deps import SessionDep, CurrentUserDep
+from app.api.middleware.deps import SessionDep, CurrentUserDep, AsyncSessionDep, run_service
+from app.db import search
 from app.lib.i18n.config import i18n
 from app.models.dataset_models.file_model import FileList, FileItem, FileSplitConfig, FileDeleteConfig
 from app.services.dataset_services import file_service
@@ -18,11 +20,13 @@ router = APIRouter(prefix="/files", tags=["files"])
 @router.get(
     "/", response_model=FileList, summary="查询文件列表", description="返回文件列表"
 )
-def list_files(session: SessionDep, current_user: CurrentUserDep, page: int = 1, page_size: int = 100,
-                     project_id: str = "", file_name: str = "") -> Any:
+async def list_files(session: AsyncSessionDep, current_user: CurrentUserDep, page: int = 1, page_size: int = 100,
+                     project_id: str = "", file_name: str = "", cursor: str = None, with_count: bool = True) -> Any:
     if project_id == "":
         raise HTTPException(500, detail=i18n.gettext("Project_id param is required"))
-    files = file_service.list_files(session, current_user, page, page_size, project_id, file_name)
+    # 侧车索引检索是同步的 sqlite 调用, 在线程池中执行
+    files = await run_service(session, file_service.list_files, current_user, page, page_size, project_id, file_name,
+                              cursor, with_count, blocking=search.uses_sidecar(file_name))
     return files
 
 
@@ -78,15 +82,17 @@ def string_to_bytesio(unknown_str, encoding='utf-8'):
     "/{id}/download", summary="下载文件", description="下载文件"
 )
 def download_file(session: SessionDep, current_user: CurrentUserDep, id: str) -> Any:
-    file = file_service.get_file(session, current_user, id)
-
-    content_stream = string_to_bytesio(file.content)
+    file, content_stream = file_service.open_file_content(session, current_user, id)
+    # pdf/docx 存储的是转换后的 markdown
+    file_name = file.file_name
+    if file.file_type in ("pdf", "word"):
+        file_name = os.path.splitext(file_name)[0] + ".md"
 
     response = StreamingResponse(
         content=content_stream,
         media_type="application/octet-stream",
         headers={
-            "Content-Disposition": f"attachment; filename={urllib.parse.quote(file.file_name)}"
+            "Content-Disposition": f"attachment; filename={urllib.parse.quote(file_name)}"
         }
     )
 
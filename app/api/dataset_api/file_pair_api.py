@@ -18,10 +18,12 @@ router = APIRouter(prefix="/file_pairs", tags=["file_pairs"])
     "/", response_model=FilePairList, summary="查询文件分片列表", description="查询文件分片列表"
 )
 def list_file_pair(session: SessionDep, current_user: CurrentUserDep, page: int = 1, page_size: int = 100,
-                       project_id: str = None, file_ids: List[str] = None, has_question: str = None) -> Any:
+                       project_id: str = None, file_ids: List[str] = None, has_question: str = None,
+                       cursor: str = None, with_count: bool = True) -> Any:
     if project_id == "":
         raise HTTPException(status_code=500, detail=i18n.gettext("Project_id param is required"))
-    file_pairs = file_pair_service.list_file_pairs(session, current_user, page, page_size, project_id, file_ids, has_question)
+    file_pairs = file_pair_service.list_file_pairs(session, current_user, page, page_size, project_id, file_ids, has_question,
+                                                   cursor, with_count)
     return file_pairs
 
 
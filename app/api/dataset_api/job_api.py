@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from typing import Any
-from app.api.middleware.deps import SessionDep, CurrentUserDep
+from app.api.middleware.deps import SessionDep, CurrentUserDep, AsyncSessionDep, run_service
 from app.lib.i18n.config import i18n
 from app.models.dataset_models.job_model import JobList, JobItem
 from app.services.dataset_services import job_service
@@ -10,10 +10,12 @@ router = APIRouter(prefix="/jobs", tags=["jobs"])
 @router.get(
     "/", response_model=JobList, summary="查询任务列表", description="查询任务列表"
 )
-def list_job(session: SessionDep, current_user: CurrentUserDep, page: int = 1, page_size: int = 100, project_id: str = None) -> Any:
+async def list_job(session: AsyncSessionDep, current_user: CurrentUserDep, page: int = 1, page_size: int = 100,
+                   project_id: str = None, cursor: str = None, with_count: bool = True) -> Any:
     if project_id == "":
         raise HTTPException(500, detail=i18n.gettext("Project_id param is required"))
-    return job_service.list_job(session, current_user, page, page_size, project_id)
+    return await run_service(session, job_service.list_job, current_user, page, page_size, project_id, cursor,
+                             with_count)
 
 
 @router.delete(
@@ -1,7 +1,8 @@
 from fastapi import APIRouter
 from typing import Any
 from app.api.middleware.deps import SessionDep, CurrentUserDep
-from app.models.dataset_models.project_model import ProjectList, ProjectItem, ProjectCreate, ProjectUpdate
+from app.models.dataset_models.project_model import ProjectList, ProjectItem, ProjectCreate, ProjectUpdate, \
+    ProjectDeleteResult
 from app.services.dataset_services import project_service
 
 router = APIRouter(prefix="/projects", tags=["projects"])
@@ -40,7 +41,8 @@ def update_project(session: SessionDep, current_user: CurrentUserDep, id: str, p
 
 
 @router.delete(
-    "/{id}", response_model=ProjectItem, summary="删除项目", description="删除项目"
+    "/{id}", response_model=ProjectDeleteResult, summary="删除项目",
+    description="删除项目, 关联数据由后台任务分批删除, 返回该任务的 id"
 )
 def delete_project(session: SessionDep, current_user: CurrentUserDep, id: str) -> Any:
     project_item = project_service.delete_project(session, current_user, id)
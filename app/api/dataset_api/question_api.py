@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from typing import Any
-from app.api.middleware.deps import SessionDep, CurrentUserDep
+from app.api.middleware.deps import SessionDep, CurrentUserDep, AsyncSessionDep, run_service
+from app.db import search
 from app.lib.i18n.config import i18n
 from app.models.dataset_models.question_model import QuestionList, QuestionItem, QuestionSave, BatchDeleteRequest, \
     DatasetGeneratorRequest
@@ -12,12 +13,15 @@ router = APIRouter(prefix="/questions", tags=["questions"])
 @router.get(
     "/", response_model=QuestionList, summary="查询所有问题列表", description="查询所有问题列表"
 )
-def list_question(session: SessionDep, current_user: CurrentUserDep, page: int = 1, page_size: int = 100,
-                        project_id: str = None, question: str = None, label: str = None) -> Any:
+async def list_question(session: AsyncSessionDep, current_user: CurrentUserDep, page: int = 1, page_size: int = 100,
+                        project_id: str = None, question: str = None, label: str = None, cursor: str = None,
+                        with_count: bool = True) -> Any:
     if project_id == "":
         raise HTTPException(status_code=500, detail=i18n.gettext("Project_id param is required"))
-    question_list = question_service.list_question(session, current_user, page, page_size, project_id, question,
-                                                   label)
+    # 侧车索引检索是同步的 sqlite 调用, 在线程池中执行
+    question_list = await run_service(session, question_service.list_question, current_user, page, page_size,
+                                      project_id, question, label, cursor, with_count,
+                                      blocking=search.uses_sidecar(question))
     return question_list
 
 
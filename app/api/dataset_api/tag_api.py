@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException
 from typing import Any, List
 from app.api.middleware.deps import SessionDep, CurrentUserDep
 from app.lib.i18n.config import i18n
-from app.models.dataset_models.tag_model import TagItem, TagCreate, TagUpdate
+from app.models.dataset_models.tag_model import TagItem, TagCreate, TagUpdate, TagQuestionIdPage
 from app.services.dataset_services import tag_service
 
 router = APIRouter(prefix="/tags", tags=["tags"])
@@ -11,13 +11,30 @@ router = APIRouter(prefix="/tags", tags=["tags"])
 @router.get(
     "/all", response_model=List[TagItem], summary="查询所有标签", description="查询所有标签"
 )
-def list_all_tag(session: SessionDep, current_user: CurrentUserDep, project_id: str) -> Any:
+def list_all_tag(session: SessionDep, current_user: CurrentUserDep, project_id: str, with_question_ids: bool = True,
+                 question_id_limit: int = None) -> Any:
     if project_id == "":
         raise HTTPException(status_code=500, detail=i18n.gettext("Project_id param is required"))
-    tags = tag_service.get_all_tags(session, current_user, project_id)
+    tags = tag_service.get_all_tags(session, current_user, project_id, with_question_ids, question_id_limit)
     return tags
 
 
+@router.get(
+    "/{id}/subtree", response_model=TagItem, summary="查询标签子树", description="查询标签及其所有子孙标签"
+)
+def get_tag_subtree(session: SessionDep, current_user: CurrentUserDep, id: str) -> Any:
+    return tag_service.get_tag_subtree(session, current_user, id)
+
+
+@router.get(
+    "/{id}/question_ids", response_model=TagQuestionIdPage, summary="分页查询标签下的问题id",
+    description="分页查询标签下的问题id"
+)
+def list_tag_question_ids(session: SessionDep, current_user: CurrentUserDep, id: str, page_size: int = 100,
+                          cursor: str = "") -> Any:
+    return tag_service.list_tag_question_ids(session, current_user, id, page_size, cursor)
+
+
 @router.post(
     "/", response_model=TagItem, summary="创建标签", description="创建标签"
 )
@@ -1,11 +1,17 @@
 from contextlib import contextmanager
-from typing import Annotated
+from contextvars import ContextVar
+from typing import Annotated, Optional
 
-from fastapi import Depends
+from fastapi import Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.db import SessionLocal
+from app.config.config import settings
+from app.db.db import SessionLocal, BackgroundSessionLocal, background_engine, AsyncSessionLocal
 from app.db.common_db_model.model_db import SessionLocal as ModelSessionLocal
+from app.lib.i18n.config import i18n
 from app.models.user_model import User
 from fastapi import Request
 
@@ -18,6 +24,32 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    # 异步接口通过 run_service 复用同步的 service/db 代码, 数据库 IO 不占用线程池
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _run_with_session(fn, *args, **kwargs):
+    db = SessionLocal()
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+async def run_service(session: AsyncSession, fn, *args, blocking: bool = False, **kwargs):
+    """
+    在异步接口中执行第一个参数为 Session 的同步 service 函数
+
+    session.run_sync 在事件循环线程中执行 fn, 只有通过异步驱动的数据库 IO 会让出事件循环, 其余同步调用
+    (如本地 sqlite 侧车索引的检索) 会阻塞事件循环。blocking 为 True 时改为在线程池中使用同步会话执行
+    """
+    if blocking:
+        return await run_in_threadpool(_run_with_session, fn, *args, **kwargs)
+    return await session.run_sync(fn, *args, **kwargs)
+
+
 def get_model_db():
     db = ModelSessionLocal()
     try:
@@ -26,16 +58,49 @@ def get_model_db():
         db.close()
 
 
+class _JobConnection:
+    def __init__(self, connection: Connection):
+        self.connection = connection
+        self.in_use = False
+
+
+_job_connection: ContextVar[Optional[_JobConnection]] = ContextVar("job_connection", default=None)
+
+
+@contextmanager
+def job_db_scope():
+    """任务执行期间占用一个后台连接, 其中的 manual_get_db 复用该连接, 不再每一步都从连接池获取"""
+    with background_engine.connect() as connection:
+        token = _job_connection.set(_JobConnection(connection))
+        try:
+            yield connection
+        finally:
+            _job_connection.reset(token)
+
+
 @contextmanager
 def manual_get_db():
-    db = SessionLocal()
+    """后台任务使用的会话; 在 job_db_scope 中时绑定任务连接, 嵌套使用时另取连接, 避免共用同一个事务"""
+    job_connection = _job_connection.get()
+    if job_connection is None or job_connection.in_use:
+        db = BackgroundSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+        return
+
+    job_connection.in_use = True
+    db = BackgroundSessionLocal(bind=job_connection.connection)
     try:
         yield db
     finally:
         db.close()
+        job_connection.in_use = False
 
 
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
 ModelSessionDep = Annotated[Session, Depends(get_model_db)]
 
 
@@ -45,3 +110,12 @@ def get_current_user(request: Request) -> User:
 
 
 CurrentUserDep = Annotated[User, Depends(get_current_user)]
+
+
+def get_admin_user(current_user: CurrentUserDep) -> User:
+    if current_user.id not in settings.ADMIN_USER_IDS:
+        raise HTTPException(status_code=403, detail=i18n.gettext("Admin permission required"))
+    return current_user
+
+
+AdminUserDep = Annotated[User, Depends(get_admin_user)]
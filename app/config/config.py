@@ -26,6 +26,63 @@ class Settings:
         self.DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
         self.DEFAULT_EVALUATION_FOLDER = os.getenv('DEFAULT_EVALUATION_DATASET_FOLDER_DIR_PATH')
         self.USER_EVALUATION_FOLDER = os.getenv('DEFAULT_EVALUATION_DATASET_USER_UPLOAD_DIR_PATH')
+        # 语义分割使用的本地向量模型（目录或 huggingface 模型名），以及句向量缓存条数
+        self.SEMANTIC_SPLIT_MODEL_PATH = os.getenv('SEMANTIC_SPLIT_MODEL_PATH', 'BAAI/bge-small-zh-v1.5')
+        self.SEMANTIC_SPLIT_CACHE_SIZE = int(os.getenv('SEMANTIC_SPLIT_CACHE_SIZE', '50000'))
+        # pdf/docx 文本提取的进程数、每个任务处理的 pdf 页数，以及是否使用大模型对提取结果做格式整理
+        self.EXTRACT_WORKERS = int(os.getenv('EXTRACT_WORKERS', str(min(4, os.cpu_count() or 1))))
+        self.EXTRACT_PDF_PAGES_PER_TASK = int(os.getenv('EXTRACT_PDF_PAGES_PER_TASK', '16'))
+        self.EXTRACT_LLM_CLEANUP = os.getenv('EXTRACT_LLM_CLEANUP', 'False').lower() == 'true'
+        self.EXTRACT_LLM_CONCURRENCY = int(os.getenv('EXTRACT_LLM_CONCURRENCY', '4'))
+        # 大模型整理在后台任务中执行, 正文按段落合并为不超过该字符数的片段后逐片整理
+        self.EXTRACT_LLM_CLEANUP_CHUNK_CHARS = int(os.getenv('EXTRACT_LLM_CLEANUP_CHUNK_CHARS', '4000'))
+        # 列表接口总数的缓存时间（秒）
+        self.LIST_COUNT_CACHE_TTL = int(os.getenv('LIST_COUNT_CACHE_TTL', '30'))
+        # 全文检索: auto(mysql 使用 ngram 全文索引, 其他数据库使用本地 sqlite fts5 侧车索引) / mysql / fts5 / like
+        # 注意: fts5 侧车索引是每台主机本地的文件, 与主库不在同一事务中, 写入主库后才同步;
+        # 多实例部署时各实例的侧车索引只包含本实例写入的数据, 应使用 mysql 或 like
+        self.SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto').lower()
+        self.SEARCH_INDEX_PATH = os.getenv('SEARCH_INDEX_PATH', 'data/search_index.db')
+        self.SEARCH_NGRAM_TOKEN_SIZE = int(os.getenv('SEARCH_NGRAM_TOKEN_SIZE', '2'))  # 与 mysql 的 ngram_token_size 保持一致
+        # 侧车索引分页时每批回表的 id 数量
+        self.SEARCH_BATCH_SIZE = int(os.getenv('SEARCH_BATCH_SIZE', '500'))
+        # 文件内容的本地内容寻址存储目录, 以及 zstd 压缩级别（0 表示不压缩）
+        self.BLOB_STORE_DIR = os.getenv('BLOB_STORE_DIR', 'data/blobs')
+        self.BLOB_COMPRESS_LEVEL = int(os.getenv('BLOB_COMPRESS_LEVEL', '3'))
+        # 连接池: API 请求与后台任务分开, 获取连接的超时时间（秒）
+        self.DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+        self.DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+        self.DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+        self.DB_BACKGROUND_POOL_SIZE = int(os.getenv('DB_BACKGROUND_POOL_SIZE', '6'))
+        self.DB_BACKGROUND_MAX_OVERFLOW = int(os.getenv('DB_BACKGROUND_MAX_OVERFLOW', '4'))
+        self.DB_BACKGROUND_POOL_TIMEOUT = int(os.getenv('DB_BACKGROUND_POOL_TIMEOUT', '60'))
+        self.MODEL_DB_POOL_SIZE = int(os.getenv('MODEL_DB_POOL_SIZE', '5'))
+        self.MODEL_DB_MAX_OVERFLOW = int(os.getenv('MODEL_DB_MAX_OVERFLOW', '5'))
+        # 异步接口的连接地址（为空时由 DATABASE_URL 推导）与连接池大小
+        self.ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL', '')
+        self.DB_ASYNC_POOL_SIZE = int(os.getenv('DB_ASYNC_POOL_SIZE', '10'))
+        self.DB_ASYNC_MAX_OVERFLOW = int(os.getenv('DB_ASYNC_MAX_OVERFLOW', '10'))
+        # 任务生成结果的批量写入: 累计行数与最长写入间隔（秒）
+        self.JOB_WRITE_BATCH_SIZE = int(os.getenv('JOB_WRITE_BATCH_SIZE', '200'))
+        self.JOB_WRITE_FLUSH_SECONDS = float(os.getenv('JOB_WRITE_FLUSH_SECONDS', '5'))
+        # 只读副本地址, 多个以逗号分隔; 为空时所有查询都使用 DATABASE_URL
+        self.DATABASE_READ_URLS = [url.strip() for url in os.getenv(
+            'DATABASE_READ_URLS', os.getenv('DATABASE_READ_URL', '')).split(',') if url.strip()]
+        # 软删除数据的压缩清理: 是否启用、运行间隔（秒）、保留天数、archive(归档后删除)/purge(直接删除)、
+        # 归档目录、每批行数、单次运行每张表的最大批数、批之间的暂停（秒）, 以及 blob 最近使用多久内不清理（秒）
+        self.COMPACTION_ENABLED = os.getenv('COMPACTION_ENABLED', 'False').lower() == 'true'
+        self.COMPACTION_INTERVAL_SECONDS = int(os.getenv('COMPACTION_INTERVAL_SECONDS', '3600'))
+        self.COMPACTION_RETENTION_DAYS = int(os.getenv('COMPACTION_RETENTION_DAYS', '30'))
+        self.COMPACTION_MODE = os.getenv('COMPACTION_MODE', 'archive').lower()
+        self.COMPACTION_ARCHIVE_DIR = os.getenv('COMPACTION_ARCHIVE_DIR', 'data/archive')
+        self.COMPACTION_BATCH_SIZE = int(os.getenv('COMPACTION_BATCH_SIZE', '1000'))
+        self.COMPACTION_MAX_BATCHES = int(os.getenv('COMPACTION_MAX_BATCHES', '100'))
+        self.COMPACTION_BATCH_PAUSE_SECONDS = float(os.getenv('COMPACTION_BATCH_PAUSE_SECONDS', '0.2'))
+        self.COMPACTION_BLOB_IDLE_SECONDS = int(os.getenv('COMPACTION_BLOB_IDLE_SECONDS', '3600'))
+        # 删除项目/文件时后台级联软删除关联数据, 每个事务处理的行数
+        self.CASCADE_DELETE_BATCH_SIZE = int(os.getenv('CASCADE_DELETE_BATCH_SIZE', '1000'))
+        # 可以调用系统维护接口 (如手动触发压缩清理) 的用户 id, 逗号分隔
+        self.ADMIN_USER_IDS = [id.strip() for id in os.getenv('ADMIN_USER_IDS', '1').split(',') if id.strip()]
         os.environ['DISABLE_VERSION_CHECK'] = "1" ### llamafactory 与 4.0.0版本的dataset冲突，临时关闭
 
 # 创建全局实例
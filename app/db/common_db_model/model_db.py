@@ -1,11 +1,12 @@
 import time
 from contextlib import contextmanager
 
-from sqlalchemy import create_engine, DateTime, JSON, TypeDecorator
+from sqlalchemy import DateTime, JSON, TypeDecorator
 from sqlalchemy.dialects.mssql import BIT
 from sqlalchemy.orm import declarative_base, sessionmaker, mapped_column, Mapped, Session
 
 from app.config.config import settings
+from app.db.pool import build_engine
 from datetime import datetime
 from typing import Optional, List
 
@@ -13,13 +14,11 @@ from sqlalchemy import Column, String, Integer
 
 from app.models.user_model import User
 
-engine = create_engine(
+engine = build_engine(
     settings.MODEL_DATABASE_URL,
-    pool_pre_ping=True,  # 启用连接健康检查
-    pool_recycle=3600,  # 每小时回收连接
-    connect_args={
-        "connect_timeout": 30,  # 连接超时30秒
-    }
+    pool_size=settings.MODEL_DB_POOL_SIZE,
+    max_overflow=settings.MODEL_DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
 )
 
 Base = declarative_base()
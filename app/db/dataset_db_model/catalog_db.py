@@ -4,7 +4,7 @@ import uuid
 from datetime import datetime
 from typing import Optional, List
 
-from sqlalchemy import Column, String, Integer, and_, Text
+from sqlalchemy import Column, String, Integer, and_, Text, Index
 from sqlalchemy.orm import Session, mapped_column, Mapped
 from sqlalchemy import text
 
@@ -14,6 +14,10 @@ from app.models.user_model import User
 
 class CatalogORM(Base):
     __tablename__ = "catalogs"
+    __table_args__ = (
+        Index("ix_catalogs_scope_file", "group_id", "project_id", "is_deleted", "file_id"),
+        Index("ix_catalogs_is_deleted", "is_deleted"),
+    )
 
     id: Mapped[str] = mapped_column(String(255), primary_key=True)
     user_id: Mapped[str] = mapped_column(String(255))
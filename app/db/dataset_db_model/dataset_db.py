@@ -2,18 +2,28 @@ import logging
 import time
 import uuid
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 
-from sqlalchemy import Column, String, Integer, BOOLEAN, or_, and_, Text, Boolean
+from sqlalchemy import Column, String, Integer, BOOLEAN, and_, Text, Boolean, Index
 from sqlalchemy.orm import Session, mapped_column, Mapped
 from sqlalchemy import text
 
 from app.db.db import Base
+from app.db import search
+from app.db.pagination import CursorKey, keyset_page, cached_count
 from app.models.user_model import User
 
 
 class DatasetORM(Base):
     __tablename__ = "datasets"
+    __table_args__ = (
+        Index("ix_datasets_scope_created", "group_id", "project_id", "is_deleted", "created_at"),
+        Index("ix_datasets_question_id", "question_id"),
+        Index("ix_datasets_file_pair_id", "file_pair_id"),
+        Index("ix_datasets_file_id", "file_id"),
+        Index("ix_datasets_ga_pair_id", "ga_pair_id"),
+        Index("ix_datasets_is_deleted", "is_deleted"),
+    )
 
     id: Mapped[str] = mapped_column(String(255), primary_key=True)
     user_id: Mapped[str] = mapped_column(String(255))
@@ -25,7 +35,7 @@ class DatasetORM(Base):
 
     question_id: Mapped[str] = mapped_column(String(255))
     tag_name: Mapped[str] = mapped_column(String(255))
-    ga_pair: Mapped[str] = mapped_column(Text())
+    ga_pair_id: Mapped[str] = mapped_column(String(255), default="")
     file_pair_id: Mapped[str] = mapped_column(String(255))
 
     model: Mapped[str] = mapped_column(String(255))
@@ -49,33 +59,41 @@ class DatasetORM(Base):
         return result
 
 
+def _list_conditions(current_user: User, project_id: str = None, content: str = None, confirmed: str = None,
+                     question_id: str = None, ids: list[str] = None) -> list:
+    conditions = [DatasetORM.is_deleted == 0,
+                  DatasetORM.group_id == current_user.group_id,
+                  DatasetORM.project_id == project_id]
+
+    if content is not None and not search.uses_sidecar(content):
+        conditions.append(search.match_condition(DatasetORM, content))
+    if confirmed == "true":
+        conditions.append(DatasetORM.confirmed == True)
+    elif confirmed == "false":
+        conditions.append(DatasetORM.confirmed == False)
+
+    if question_id:
+        conditions.append(DatasetORM.question_id == question_id)
+
+    if ids and len(ids) > 0:
+        conditions.append(DatasetORM.id.in_(ids))
+    return conditions
+
+
 def list(session: Session, current_user: User = None, page_no: int = 1, page_size: int = 100,
                project_id: str = None,
                content: str = None,
                confirmed: str = None,
                question_id: str = None,
                ids: list[str] = None) -> (List[DatasetORM], int):
-    query = session.query(DatasetORM).filter(DatasetORM.is_deleted == 0,
-                                             DatasetORM.group_id == current_user.group_id,
-                                             DatasetORM.project_id == project_id)
-
-    if content is not None:
-        query = query.filter(
-            or_(
-                DatasetORM.question.ilike(f'%{content}%'),
-                DatasetORM.answer.ilike(f'%{content}%')
-            )
-        )
-    if confirmed == "true":
-        query = query.filter(DatasetORM.confirmed == True)
-    elif confirmed == "false":
-        query = query.filter(DatasetORM.confirmed == False)
-
-    if question_id:
-        query = query.filter(DatasetORM.question_id == question_id)
+    query = session.query(DatasetORM).filter(
+        *_list_conditions(current_user, project_id, content, confirmed, question_id, ids))
 
-    if ids and len(ids) > 0:
-        query = query.filter(DatasetORM.id.in_(ids))
+    if search.uses_sidecar(content):
+        filtered = confirmed in ("true", "false") or bool(question_id) or bool(ids)
+        total = search.sidecar_count(query, DatasetORM, content, current_user.group_id, project_id, filtered)
+        return search.sidecar_offset_page(query, DatasetORM, content, current_user.group_id, project_id,
+                                          page_no, page_size, filtered), total
 
     total = query.count()
 
@@ -83,6 +101,42 @@ def list(session: Session, current_user: User = None, page_no: int = 1, page_siz
     return query.offset(skip).limit(page_size).all(), total
 
 
+def list_by_cursor(session: Session, current_user: User, page_size: int = 100, after: Optional[CursorKey] = None,
+                   with_count: bool = False,
+                   project_id: str = None,
+                   content: str = None,
+                   confirmed: str = None,
+                   question_id: str = None,
+                   ids: Optional[List[str]] = None) -> (List[DatasetORM], Optional[CursorKey], Optional[int]):
+    query = session.query(DatasetORM).filter(
+        *_list_conditions(current_user, project_id, content, confirmed, question_id, ids))
+
+    if search.uses_sidecar(content):
+        filtered = confirmed in ("true", "false") or bool(question_id) or bool(ids)
+        total = search.sidecar_count(query, DatasetORM, content, current_user.group_id, project_id,
+                                     filtered) if with_count else None
+        items, next_after = search.sidecar_page(query, DatasetORM, content, current_user.group_id, project_id,
+                                                after, page_size)
+        return items, next_after, total
+
+    total = cached_count(query) if with_count else None
+    items, next_after = keyset_page(query, DatasetORM, after, page_size)
+    return items, next_after, total
+
+
+def ids_by_question_ids(session: Session, current_user: User, question_ids: List[str]) -> Dict[str, List[str]]:
+    result: Dict[str, List[str]] = {}
+    if not question_ids:
+        return result
+    query = session.query(DatasetORM.question_id, DatasetORM.id).filter(
+        DatasetORM.is_deleted == 0,
+        DatasetORM.group_id == current_user.group_id,
+        DatasetORM.question_id.in_(question_ids))
+    for question_id, id in query.all():
+        result.setdefault(question_id, []).append(id)
+    return result
+
+
 def get(session: Session, current_user: User, id: str) -> Optional[DatasetORM]:
     return session.query(DatasetORM).filter(
         DatasetORM.id == id,
@@ -100,9 +154,34 @@ def create(session: Session, current_user: User, dataset: DatasetORM) -> Optiona
     session.add(dataset)
     session.commit()
     session.refresh(dataset)
+    search.index_rows(DatasetORM.__tablename__, [dataset])
     return dataset
 
 
+def bulk_create(session: Session, current_user: User, dataset_data: List[Dict], auto_commit: bool = True) -> List[Dict]:
+    """批量写入并返回写入的行; auto_commit 为 False 时由调用方提交事务, 并在提交后同步侧车索引"""
+    if not dataset_data:
+        return []
+
+    current_time = int(time.time())
+    mappings = []
+    for data in dataset_data:
+        mappings.append({
+            "id": str(uuid.uuid4()),
+            "user_id": current_user.id,
+            "group_id": current_user.group_id,
+            "created_at": current_time,
+            "updated_at": current_time,
+            **data  # 其他字段从参数传入
+        })
+
+    session.bulk_insert_mappings(DatasetORM, mappings)
+    if auto_commit:
+        session.commit()
+        search.index_rows(DatasetORM.__tablename__, mappings)
+    return mappings
+
+
 def update(session: Session, current_user: User, id: str, update_data: dict) -> Optional[DatasetORM]:
     dataset = get(session, current_user, id)
     if dataset:
@@ -111,6 +190,7 @@ def update(session: Session, current_user: User, id: str, update_data: dict) ->
         dataset.updated_at = int(time.time())
         session.commit()
         session.refresh(dataset)
+        search.index_rows(DatasetORM.__tablename__, [dataset])
     return dataset
 
 
@@ -120,7 +200,8 @@ def delete(session: Session, current_user: User, id: str) -> Optional[DatasetORM
         dataset.is_deleted = int(time.time())
         session.commit()
         session.refresh(dataset)
-    return None
+        search.remove_rows(DatasetORM.__tablename__, current_user.group_id, id=[id])
+    return dataset
 
 
 def bulk_delete_datasets(
@@ -161,4 +242,6 @@ def bulk_delete_datasets(
         synchronize_session=False
     )
     db.commit()
+    search.remove_rows(DatasetORM.__tablename__, current_user.group_id, id=ids, project_id=project_ids,
+                       file_id=file_ids, file_pair_id=file_pair_ids, question_id=question_ids)
     return result
\ No newline at end of file
@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import Optional, List
 
 from pydantic import BaseModel
-from sqlalchemy import String, Integer, JSON
+from sqlalchemy import String, Integer, JSON, Index, func
 from sqlalchemy.orm import Session, Mapped, mapped_column
 
 from app.db.db import Base
@@ -44,6 +44,10 @@ class DatasetVersion(BaseModel):
 
 class DatasetVersionORM(Base):
     __tablename__ = "dataset_versions"
+    __table_args__ = (
+        Index("ix_dataset_versions_artifact_hash", "artifact_hash"),
+        Index("ix_dataset_versions_fingerprint", "group_id", "fingerprint"),
+    )
 
     id: Mapped[str] = mapped_column(String(255), primary_key=True)
     user_id: Mapped[str] = mapped_column(String(255))
@@ -53,6 +57,13 @@ class DatasetVersionORM(Base):
     description: Mapped[str] = mapped_column(String(500))
     dataset_type: Mapped[DatasetType] = mapped_column(String(255))
     options: Mapped[dict] = mapped_column(JSON)
+    export_format: Mapped[str] = mapped_column(String(50), default="jsonl")
+    # 版本文件由后台任务导出, 导出完成前为 Running
+    status: Mapped[str] = mapped_column(String(100), default="Success")
+    job_id: Mapped[str] = mapped_column(String(255), default="")
+    # 版本文件的内容哈希 (xxh3_128) 与数据集选择的指纹, 相同内容的版本共用一个文件
+    artifact_hash: Mapped[str] = mapped_column(String(64), default="")
+    fingerprint: Mapped[str] = mapped_column(String(64), default="")
 
     project_id: Mapped[str] = mapped_column(String(255))
 
@@ -93,6 +104,25 @@ def get(session: Session, current_user: User, id: str) -> Optional[DatasetVersio
     ).first()
 
 
+def get_by_fingerprint(session: Session, current_user: User, fingerprint: str) -> Optional[DatasetVersionORM]:
+    """最近一个指纹相同且已导出完成的版本"""
+    return session.query(DatasetVersionORM).filter(
+        DatasetVersionORM.group_id == current_user.group_id,
+        DatasetVersionORM.fingerprint == fingerprint,
+        DatasetVersionORM.status == "Success",
+        DatasetVersionORM.artifact_hash != "",
+        DatasetVersionORM.is_deleted == 0
+    ).order_by(DatasetVersionORM.created_at.desc()).first()
+
+
+def count_by_artifact_hash(session: Session, artifact_hash: str) -> int:
+    """引用该版本文件的未删除版本数, 版本文件按内容共享, 不区分用户组"""
+    return session.query(func.count(DatasetVersionORM.id)).filter(
+        DatasetVersionORM.artifact_hash == artifact_hash,
+        DatasetVersionORM.is_deleted == 0
+    ).scalar()
+
+
 def create(session: Session, current_user: User, dataset_version: DatasetVersionORM) -> Optional[DatasetVersionORM]:
     dataset_version.id = str(uuid.uuid4())
     dataset_version.user_id = current_user.id
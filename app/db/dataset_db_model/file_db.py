@@ -3,10 +3,13 @@ import time
 import uuid
 from typing import Optional, List
 
-from sqlalchemy import String, Column, Integer, and_, Text
-from sqlalchemy.orm import Session, mapped_column, Mapped
+from sqlalchemy import String, Column, Integer, and_, Text, Index, inspect, Boolean
+from sqlalchemy.orm import Session, mapped_column, Mapped, defer
 
 from app.db.db import Base
+from app.db import search
+from app.db.pagination import CursorKey, keyset_page, cached_count
+from app.lib.blob.blob_store import blob_store
 from sqlalchemy import text
 
 from app.models.user_model import User
@@ -14,6 +17,11 @@ from app.models.user_model import User
 
 class FileORM(Base):
     __tablename__ = "files"
+    __table_args__ = (
+        Index("ix_files_scope_created", "group_id", "project_id", "is_deleted", "created_at"),
+        Index("ix_files_scope_name", "group_id", "project_id", "is_deleted", "file_name"),
+        Index("ix_files_is_deleted", "is_deleted"),
+    )
 
     id: Mapped[str] = mapped_column(String(255), primary_key=True)
     user_id: Mapped[str] = mapped_column(String(255))
@@ -23,6 +31,8 @@ class FileORM(Base):
     file_ext: Mapped[str] = mapped_column(String(10))
     file_type: Mapped[str] = mapped_column(String(20))
     content: Mapped[str] = mapped_column(Text())
+    # 为 True 时 content 为空, 正文保存在以 md5 为键的 blob 中
+    content_in_blob: Mapped[bool] = mapped_column(Boolean(), default=False)
     md5: Mapped[str] = mapped_column(String(255))
     size: Mapped[int] = mapped_column(Integer())
 
@@ -33,25 +43,43 @@ class FileORM(Base):
     is_deleted: Mapped[int] = mapped_column(Integer(), default=0)
 
     def to_dict(self):
+        # 未加载的延迟列 (如列表查询中的 content) 不触发额外查询
+        unloaded = inspect(self).unloaded
         return {c.key: getattr(self, c.key)
-                for c in self.__table__.columns}
+                for c in self.__table__.columns if c.key not in unloaded}
 
 
-def list(session: Session, current_user: User = None, page_no: int = 1, page_size: int = 100,
-         project_id: str = None, file_name: str = None, file_name_match: str = None, file_ext: str = None, file_ids: list[str] = None) -> (List[FileORM], int):
-    query = session.query(FileORM).filter(FileORM.is_deleted == 0, FileORM.group_id == current_user.group_id,
-                                          FileORM.project_id == project_id)
+def _list_conditions(current_user: User, project_id: str = None, file_name: str = None, file_name_match: str = None,
+                     file_ext: str = None, file_ids: list[str] = None) -> list:
+    conditions = [FileORM.is_deleted == 0, FileORM.group_id == current_user.group_id,
+                  FileORM.project_id == project_id]
 
-    if file_name:  # Add fuzzy search if name parameter is provided
-        query = query.filter(FileORM.file_name.ilike(f'%{file_name}%'))
+    if file_name and not search.uses_sidecar(file_name):  # Add fuzzy search if name parameter is provided
+        conditions.append(search.match_condition(FileORM, file_name))
 
     if file_name_match:
-        query = query.filter(FileORM.file_name == file_name_match)
+        conditions.append(FileORM.file_name == file_name_match)
 
     if file_ext:
-        query = query.filter(FileORM.file_ext.ilike(f'%{file_ext}%'))
+        conditions.append(FileORM.file_ext.ilike(f'%{file_ext}%'))
     if file_ids and len(file_ids) > 0:
-        query = query.filter(FileORM.id.in_(file_ids))
+        conditions.append(FileORM.id.in_(file_ids))
+    return conditions
+
+
+def list(session: Session, current_user: User = None, page_no: int = 1, page_size: int = 100,
+         project_id: str = None, file_name: str = None, file_name_match: str = None, file_ext: str = None, file_ids: list[str] = None,
+         with_content: bool = False) -> (List[FileORM], int):
+    query = session.query(FileORM).filter(
+        *_list_conditions(current_user, project_id, file_name, file_name_match, file_ext, file_ids))
+    if not with_content:
+        query = query.options(defer(FileORM.content))
+
+    if search.uses_sidecar(file_name):
+        filtered = bool(file_name_match) or bool(file_ext) or bool(file_ids)
+        total = search.sidecar_count(query, FileORM, file_name, current_user.group_id, project_id, filtered)
+        return search.sidecar_offset_page(query, FileORM, file_name, current_user.group_id, project_id,
+                                          page_no, page_size, filtered), total
 
     total = query.count()
 
@@ -59,6 +87,27 @@ def list(session: Session, current_user: User = None, page_no: int = 1, page_siz
     return query.offset(skip).limit(page_size).all(), total
 
 
+def list_by_cursor(session: Session, current_user: User, page_size: int = 100, after: Optional[CursorKey] = None,
+                   with_count: bool = False, project_id: str = None, file_name: str = None,
+                   file_name_match: str = None, file_ext: str = None,
+                   file_ids: Optional[List[str]] = None) -> (List[FileORM], Optional[CursorKey], Optional[int]):
+    query = session.query(FileORM).filter(
+        *_list_conditions(current_user, project_id, file_name, file_name_match, file_ext, file_ids))
+
+    if search.uses_sidecar(file_name):
+        filtered = bool(file_name_match) or bool(file_ext) or bool(file_ids)
+        total = search.sidecar_count(query, FileORM, file_name, current_user.group_id, project_id,
+                                     filtered) if with_count else None
+        items, next_after = search.sidecar_page(query.options(defer(FileORM.content)), FileORM, file_name,
+                                                current_user.group_id, project_id, after, page_size)
+        return items, next_after, total
+
+    total = cached_count(query) if with_count else None
+    query = query.options(defer(FileORM.content))
+    items, next_after = keyset_page(query, FileORM, after, page_size)
+    return items, next_after, total
+
+
 def get(session: Session, current_user: User, id: str) -> Optional[FileORM]:
     return session.query(FileORM).filter(
         FileORM.id == id,
@@ -67,6 +116,26 @@ def get(session: Session, current_user: User, id: str) -> Optional[FileORM]:
     ).first()
 
 
+def load_content(file) -> str:
+    """读取文件正文, file 为 FileORM 或包含 content/content_in_blob/md5 列的查询结果"""
+    if not file.content_in_blob:
+        return file.content
+    content = blob_store.read_text(file.md5)
+    if content is None:
+        logging.error(f"file content blob not found: {file.md5}")
+        return ""
+    return content
+
+
+def get_content(session: Session, current_user: User, id: str, include_deleted: bool = False) -> Optional[str]:
+    """include_deleted 为 True 时也读取已标记删除的文件, 供删除任务使用"""
+    conditions = [FileORM.id == id, FileORM.group_id == current_user.group_id]
+    if not include_deleted:
+        conditions.append(FileORM.is_deleted == 0)
+    row = session.query(FileORM.content, FileORM.content_in_blob, FileORM.md5).filter(*conditions).first()
+    return load_content(row) if row else None
+
+
 def create(session: Session, current_user: User, file: FileORM) -> Optional[FileORM]:
     file.id = str(uuid.uuid4())
 
@@ -78,6 +147,7 @@ def create(session: Session, current_user: User, file: FileORM) -> Optional[File
     session.add(file)
     session.commit()
     session.refresh(file)
+    search.index_rows(FileORM.__tablename__, [file])
     return file
 
 
@@ -89,6 +159,7 @@ def update(session: Session, current_user: User, id: str, update_data: dict) ->
         file.updated_at = int(time.time())
         session.commit()
         session.refresh(file)
+        search.index_rows(FileORM.__tablename__, [file])
     return file
 
 
@@ -98,6 +169,7 @@ def delete(session: Session, current_user: User, id: str) -> Optional[FileORM]:
         file.is_deleted = int(time.time())
         session.commit()
         session.refresh(file)
+        search.remove_rows(FileORM.__tablename__, current_user.group_id, id=[id])
     return file
 
 
@@ -127,4 +199,5 @@ def bulk_delete_files(
         synchronize_session=False
     )
     db.commit()
+    search.remove_rows(FileORM.__tablename__, current_user.group_id, project_id=project_ids)
     return result
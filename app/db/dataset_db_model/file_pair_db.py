@@ -4,10 +4,11 @@ import uuid
 from datetime import datetime
 from typing import Optional, List, Dict
 
-from sqlalchemy import String, Column, Integer, and_, Text
-from sqlalchemy.orm import Session, mapped_column, Mapped
+from sqlalchemy import String, Column, Integer, and_, Text, Index
+from sqlalchemy.orm import Session, mapped_column, Mapped, defer
 
 from app.db.db import Base
+from app.db.pagination import CursorKey, keyset_page, cached_count
 from sqlalchemy import text
 
 from app.models.user_model import User
@@ -15,6 +16,11 @@ from app.models.user_model import User
 
 class FilePairORM(Base):
     __tablename__ = "file_pairs"
+    __table_args__ = (
+        Index("ix_file_pairs_scope_created", "group_id", "project_id", "is_deleted", "created_at"),
+        Index("ix_file_pairs_file_id", "file_id"),
+        Index("ix_file_pairs_is_deleted", "is_deleted"),
+    )
 
     id: Mapped[str] = mapped_column(String(255), primary_key=True)
     user_id: Mapped[str] = mapped_column(String(255))
@@ -45,11 +51,13 @@ class FilePairORM(Base):
         return result
 
 
-def list_file_pair_to_map(session: Session, current_user: User = None, list_pair_id_list: list = None) -> dict[
-    str, FilePairORM]:
+def list_file_pair_to_map(session: Session, current_user: User = None, list_pair_id_list: list = None,
+                          with_content: bool = False) -> dict[str, FilePairORM]:
     query = session.query(FilePairORM).filter(FilePairORM.is_deleted == 0,
                                               FilePairORM.group_id == current_user.group_id)
     query = query.filter(FilePairORM.id.in_(list_pair_id_list))
+    if not with_content:
+        query = query.options(defer(FilePairORM.content))
     result = query.all()
     result_map = {}
     for file_pair in result:
@@ -57,20 +65,34 @@ def list_file_pair_to_map(session: Session, current_user: User = None, list_pair
     return result_map
 
 
-def list(session: Session, current_user: User = None, page_no: int = 1, page_size: int = 100,
-         project_id: str = None, file_ids: List[str] = None, has_question: str = None, id_list: List[str] = None) -> (List[FilePairORM], int):
-    query = session.query(FilePairORM).filter(FilePairORM.is_deleted == 0,
-                                              FilePairORM.group_id == current_user.group_id,
-                                              FilePairORM.project_id == project_id)
+def list_ids(session: Session, current_user: User, project_id: str) -> List[str]:
+    query = session.query(FilePairORM.id).filter(FilePairORM.is_deleted == 0,
+                                                 FilePairORM.group_id == current_user.group_id,
+                                                 FilePairORM.project_id == project_id)
+    return [row.id for row in query.all()]
+
+
+def _list_conditions(current_user: User, project_id: str = None, file_ids: List[str] = None,
+                     has_question: str = None, id_list: List[str] = None) -> list:
+    conditions = [FilePairORM.is_deleted == 0,
+                  FilePairORM.group_id == current_user.group_id,
+                  FilePairORM.project_id == project_id]
 
     if file_ids is not None and len(file_ids) > 0:
-        query = query.filter(FilePairORM.file_id.in_(file_ids))
+        conditions.append(FilePairORM.file_id.in_(file_ids))
     if has_question == "true":
-        query = query.filter(FilePairORM.question_id_list != "")
+        conditions.append(FilePairORM.question_id_list != "")
     elif has_question == "false":
-        query = query.filter(FilePairORM.question_id_list == "")
+        conditions.append(FilePairORM.question_id_list == "")
     if id_list is not None:
-        query = query.filter(FilePairORM.id.in_(id_list))
+        conditions.append(FilePairORM.id.in_(id_list))
+    return conditions
+
+
+def list(session: Session, current_user: User = None, page_no: int = 1, page_size: int = 100,
+         project_id: str = None, file_ids: List[str] = None, has_question: str = None, id_list: List[str] = None) -> (List[FilePairORM], int):
+    query = session.query(FilePairORM).filter(
+        *_list_conditions(current_user, project_id, file_ids, has_question, id_list))
 
     total = query.count()
 
@@ -78,6 +100,17 @@ def list(session: Session, current_user: User = None, page_no: int = 1, page_siz
     return query.offset(skip).limit(page_size).all(), total
 
 
+def list_by_cursor(session: Session, current_user: User, page_size: int = 100, after: Optional[CursorKey] = None,
+                   with_count: bool = False, project_id: str = None, file_ids: List[str] = None,
+                   has_question: str = None, id_list: List[str] = None) -> (List[FilePairORM], Optional[CursorKey], Optional[int]):
+    query = session.query(FilePairORM).filter(
+        *_list_conditions(current_user, project_id, file_ids, has_question, id_list))
+
+    total = cached_count(query) if with_count else None
+    items, next_after = keyset_page(query, FilePairORM, after, page_size)
+    return items, next_after, total
+
+
 def get(session: Session, current_user: User, id: str) -> Optional[FilePairORM]:
     return session.query(FilePairORM).filter(
         FilePairORM.id == id,
@@ -4,7 +4,7 @@ import uuid
 from datetime import datetime
 from typing import Optional, List, Dict
 
-from sqlalchemy import String, Column, Integer, BOOLEAN, and_, Boolean
+from sqlalchemy import String, Column, Integer, BOOLEAN, and_, Boolean, Index
 from sqlalchemy.orm import Session, mapped_column, Mapped
 
 from app.db.db import Base
@@ -15,6 +15,9 @@ from app.models.user_model import User
 
 class GAPairORM(Base):
     __tablename__ = "ga_pairs"
+    __table_args__ = (
+        Index("ix_ga_pairs_is_deleted", "is_deleted"),
+    )
 
     id: Mapped[str] = mapped_column(String(255), primary_key=True)
     user_id: Mapped[str] = mapped_column(String(255))
@@ -44,8 +47,12 @@ class GAPairORM(Base):
         return result
 
 
-def list_ga_pair_to_map(session: Session, current_user: User = None, ga_pair_id_list: list = None) -> dict[str, GAPairORM]:
-    query = session.query(GAPairORM).filter(GAPairORM.is_deleted == 0, GAPairORM.group_id == current_user.group_id)
+def list_ga_pair_to_map(session: Session, current_user: User = None, ga_pair_id_list: list = None,
+                        include_deleted: bool = False) -> dict[str, GAPairORM]:
+    # 问题/数据集引用的 GA 对被删除后仍需展示, 此时 include_deleted 为 True
+    query = session.query(GAPairORM).filter(GAPairORM.group_id == current_user.group_id)
+    if not include_deleted:
+        query = query.filter(GAPairORM.is_deleted == 0)
     query = query.filter(GAPairORM.id.in_(ga_pair_id_list))
     result = query.all()
     result_map = {}
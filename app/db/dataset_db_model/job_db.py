@@ -4,10 +4,11 @@ import uuid
 from datetime import datetime
 from typing import Optional, List
 
-from sqlalchemy import String, Column, Integer, Text
+from sqlalchemy import String, Column, Integer, Index, JSON
 from sqlalchemy.orm import Session, mapped_column, Mapped
 
 from app.db.db import Base
+from app.db.pagination import CursorKey, keyset_page, cached_count
 from sqlalchemy import text
 
 from app.models.user_model import User
@@ -15,6 +16,11 @@ from app.models.user_model import User
 
 class JobORM(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_scope_created", "group_id", "project_id", "is_deleted", "created_at"),
+        Index("ix_jobs_status", "status", "is_deleted"),
+        Index("ix_jobs_is_deleted", "is_deleted"),
+    )
 
     id: Mapped[str] = mapped_column(String(255), primary_key=True)
     user_id: Mapped[str] = mapped_column(String(255))
@@ -22,8 +28,9 @@ class JobORM(Base):
 
     type: Mapped[str] = mapped_column(String(100))
     status: Mapped[str] = mapped_column(String(100))
-    content: Mapped[str] = mapped_column(Text().with_variant(Text(length=16777215), 'mysql'))  # MEDIUMTEXT equivalent
-    result: Mapped[str] = mapped_column(Text().with_variant(Text(length=4294967295), 'mysql'), nullable=True)  # LONGTEXT equivalent
+    # 原生 JSON 列, 由引擎的 json_serializer/json_deserializer (orjson) 负责编解码
+    content: Mapped[dict] = mapped_column(JSON())
+    result: Mapped[Optional[dict]] = mapped_column(JSON(), nullable=True)
 
     locale: Mapped[str] = mapped_column(String(100))
     project_id: Mapped[str] = mapped_column(String(255))
@@ -43,24 +50,39 @@ class JobORM(Base):
         return result
 
 
-def list(session: Session, current_user: User, page_no: int, page_size: int, project_id: str = None, status: str = None, typer=None) -> (
-List[JobORM], int):
-    query = session.query(JobORM).filter(JobORM.is_deleted == 0)
+def _list_conditions(current_user: User, project_id: str = None, status: str = None, typer=None) -> list:
+    conditions = [JobORM.is_deleted == 0]
 
     if project_id is not None:
-        query = query.filter(JobORM.project_id == project_id)
+        conditions.append(JobORM.project_id == project_id)
     if status is not None:
-        query = query.filter(JobORM.status == status)
+        conditions.append(JobORM.status == status)
     if typer is not None:
-        query = query.filter(JobORM.type == typer)
+        conditions.append(JobORM.type == typer)
     if current_user is not None:
-        query = query.filter(JobORM.group_id == current_user.group_id)
+        conditions.append(JobORM.group_id == current_user.group_id)
+    return conditions
+
+
+def list(session: Session, current_user: User, page_no: int, page_size: int, project_id: str = None, status: str = None, typer=None) -> (
+List[JobORM], int):
+    query = session.query(JobORM).filter(*_list_conditions(current_user, project_id, status, typer))
 
     total = query.count()
     skip = (page_no - 1) * page_size
     return query.offset(skip).limit(page_size).all(), total
 
 
+def list_by_cursor(session: Session, current_user: User, page_size: int = 100, after: Optional[CursorKey] = None,
+                   with_count: bool = False, project_id: str = None, status: str = None,
+                   typer=None) -> (List[JobORM], Optional[CursorKey], Optional[int]):
+    query = session.query(JobORM).filter(*_list_conditions(current_user, project_id, status, typer))
+
+    total = cached_count(query) if with_count else None
+    items, next_after = keyset_page(query, JobORM, after, page_size)
+    return items, next_after, total
+
+
 def get(session: Session, current_user: User, id: str) -> Optional[JobORM]:
     return session.query(JobORM).filter(
         JobORM.id == id,
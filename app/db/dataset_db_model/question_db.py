@@ -4,10 +4,13 @@ import uuid
 from datetime import datetime
 from typing import Optional, List, Dict
 
-from sqlalchemy import String, Column, Integer, and_, BOOLEAN, Text, Boolean
+from sqlalchemy import String, Column, Integer, and_, BOOLEAN, Text, Boolean, Index, func, select
 from sqlalchemy.orm import Session, mapped_column, Mapped
 
 from app.db.db import Base
+from app.db.dataset_db_model.dataset_db import DatasetORM
+from app.db import search
+from app.db.pagination import CursorKey, keyset_page, cached_count
 from sqlalchemy import text
 
 from app.models.user_model import User
@@ -15,6 +18,14 @@ from app.models.user_model import User
 
 class QuestionORM(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_scope_created", "group_id", "project_id", "is_deleted", "created_at"),
+        Index("ix_questions_scope_tag", "group_id", "project_id", "is_deleted", "tag_name"),
+        Index("ix_questions_file_pair_id", "file_pair_id"),
+        Index("ix_questions_file_id", "file_id"),
+        Index("ix_questions_ga_pair_id", "ga_pair_id"),
+        Index("ix_questions_is_deleted", "is_deleted"),
+    )
 
     id: Mapped[str] = mapped_column(String(255), primary_key=True)
     user_id: Mapped[str] = mapped_column(String(255))
@@ -23,7 +34,7 @@ class QuestionORM(Base):
     question: Mapped[str] = mapped_column(Text())
 
     tag_name: Mapped[str] = mapped_column(String(255))
-    ga_pair: Mapped[str] = mapped_column(Text())
+    ga_pair_id: Mapped[str] = mapped_column(String(255), default="")
 
     has_dataset: Mapped[bool] = mapped_column(Boolean(), default=False)
     file_pair_id: Mapped[str] = mapped_column(String(255))
@@ -45,26 +56,39 @@ class QuestionORM(Base):
         return result
 
 
+def _list_conditions(current_user: User, project_id: str = None, question: str = None, tag_name: str = None,
+                     match_tag_name: str = None, id_list: list[str] = None) -> list:
+    conditions = [QuestionORM.is_deleted == 0,
+                  QuestionORM.group_id == current_user.group_id,
+                  QuestionORM.project_id == project_id]
+    if id_list is not None and len(id_list) > 0:
+        conditions.append(QuestionORM.id.in_(id_list))
+
+    if question is not None and not search.uses_sidecar(question):
+        conditions.append(search.match_condition(QuestionORM, question))
+
+    if tag_name is not None:
+        conditions.append(QuestionORM.tag_name.ilike(f'%{tag_name}%'))
+
+    if match_tag_name is not None:
+        conditions.append(QuestionORM.tag_name == match_tag_name)
+    return conditions
+
+
 def list(session: Session, current_user: User = None, page_no: int = 1, page_size: int = 100,
          project_id: str = None,
          question: str = None,
          tag_name: str = None,
          match_tag_name: str = None,
          id_list: list[str] = None) -> (List[QuestionORM], int):
-    query = session.query(QuestionORM).filter(QuestionORM.is_deleted == 0,
-                                              QuestionORM.group_id == current_user.group_id,
-                                              QuestionORM.project_id == project_id)
-    if id_list is not None and len(id_list) > 0:
-        query = query.filter(QuestionORM.id.in_(id_list))
-
-    if question is not None:
-        query = query.filter(QuestionORM.question.ilike(f'%{question}%'))
-
-    if tag_name is not None:
-        query = query.filter(QuestionORM.tag_name.ilike(f'%{tag_name}%'))
+    query = session.query(QuestionORM).filter(
+        *_list_conditions(current_user, project_id, question, tag_name, match_tag_name, id_list))
 
-    if match_tag_name is not None:
-        query = query.filter(QuestionORM.tag_name == match_tag_name)
+    if search.uses_sidecar(question):
+        filtered = tag_name is not None or match_tag_name is not None or bool(id_list)
+        total = search.sidecar_count(query, QuestionORM, question, current_user.group_id, project_id, filtered)
+        return search.sidecar_offset_page(query, QuestionORM, question, current_user.group_id, project_id,
+                                          page_no, page_size, filtered), total
 
     total = query.count()
 
@@ -73,6 +97,55 @@ def list(session: Session, current_user: User = None, page_no: int = 1, page_siz
     return query.offset(skip).limit(page_size).all(), total
 
 
+def list_by_cursor(session: Session, current_user: User, page_size: int = 100, after: Optional[CursorKey] = None,
+                   with_count: bool = False,
+                   project_id: str = None,
+                   question: str = None,
+                   tag_name: str = None,
+                   match_tag_name: str = None,
+                   id_list: Optional[List[str]] = None) -> (List[QuestionORM], Optional[CursorKey], Optional[int]):
+    query = session.query(QuestionORM).filter(
+        *_list_conditions(current_user, project_id, question, tag_name, match_tag_name, id_list))
+
+    if search.uses_sidecar(question):
+        filtered = tag_name is not None or match_tag_name is not None or bool(id_list)
+        total = search.sidecar_count(query, QuestionORM, question, current_user.group_id, project_id,
+                                     filtered) if with_count else None
+        items, next_after = search.sidecar_page(query, QuestionORM, question, current_user.group_id, project_id,
+                                                after, page_size)
+        return items, next_after, total
+
+    total = cached_count(query) if with_count else None
+    items, next_after = keyset_page(query, QuestionORM, after, page_size)
+    return items, next_after, total
+
+
+def count_by_tag(session: Session, current_user: User, project_id: str) -> Dict[str, int]:
+    query = session.query(QuestionORM.tag_name, func.count(QuestionORM.id)).filter(
+        *_list_conditions(current_user, project_id)).group_by(QuestionORM.tag_name)
+    return {tag_name: count for tag_name, count in query.all()}
+
+
+def ids_by_tag(session: Session, current_user: User, project_id: str, limit_per_tag: int = None) -> Dict[str, List[str]]:
+    """一次查询按标签分组取问题 id, limit_per_tag 限制每个标签返回的条数 (按创建时间倒序)"""
+    columns = [QuestionORM.tag_name, QuestionORM.id]
+    if limit_per_tag is None:
+        query = session.query(*columns).filter(*_list_conditions(current_user, project_id)).order_by(
+            QuestionORM.created_at.desc(), QuestionORM.id.desc())
+    else:
+        row_number = func.row_number().over(partition_by=QuestionORM.tag_name,
+                                            order_by=(QuestionORM.created_at.desc(), QuestionORM.id.desc()))
+        subquery = session.query(*columns, row_number.label("row_number")).filter(
+            *_list_conditions(current_user, project_id)).subquery()
+        query = session.query(subquery.c.tag_name, subquery.c.id).filter(
+            subquery.c.row_number <= limit_per_tag).order_by(subquery.c.row_number)
+
+    result: Dict[str, List[str]] = {}
+    for tag_name, id in query.all():
+        result.setdefault(tag_name, []).append(id)
+    return result
+
+
 def get(session: Session, current_user: User, id: str) -> Optional[QuestionORM]:
     return session.query(QuestionORM).filter(
         QuestionORM.id == id,
@@ -90,6 +163,7 @@ def create(session: Session, current_user: User, question: QuestionORM) -> Optio
     session.add(question)
     session.commit()
     session.refresh(question)
+    search.index_rows(QuestionORM.__tablename__, [question])
     return question
 
 
@@ -101,6 +175,7 @@ def update(session: Session, current_user: User, id: str, update_data: dict) ->
         question.updated_at = int(time.time())
         session.commit()
         session.refresh(question)
+        search.index_rows(QuestionORM.__tablename__, [question])
     return question
 
 
@@ -110,12 +185,14 @@ def delete(session: Session, current_user: User, id: str) -> Optional[QuestionOR
         question.is_deleted = int(time.time())
         session.commit()
         session.refresh(question)
+        search.remove_rows(QuestionORM.__tablename__, current_user.group_id, id=[id])
     return question
 
 
-def bulk_create(session: Session, current_user: User, question_data: List[Dict]):
+def bulk_create(session: Session, current_user: User, question_data: List[Dict], auto_commit: bool = True) -> List[Dict]:
+    """批量写入并返回写入的行; auto_commit 为 False 时由调用方提交事务, 并在提交后同步侧车索引"""
     if not question_data:
-        return None
+        return []
 
     current_time = int(time.time())
     mappings = []
@@ -130,7 +207,29 @@ def bulk_create(session: Session, current_user: User, question_data: List[Dict])
         })
 
     session.bulk_insert_mappings(QuestionORM, mappings)
-    session.commit()
+    if auto_commit:
+        session.commit()
+        search.index_rows(QuestionORM.__tablename__, mappings)
+    return mappings
+
+
+def refresh_has_dataset(session: Session, current_user: User, question_ids: List[str], auto_commit: bool = True) -> int:
+    """按数据集是否存在重新计算 has_dataset, 一条 UPDATE ... SET has_dataset = EXISTS(...) 处理整批问题"""
+    question_ids = [id for id in set(question_ids) if id]
+    if not question_ids:
+        return 0
+
+    has_dataset = select(DatasetORM.id).where(
+        DatasetORM.question_id == QuestionORM.id,
+        DatasetORM.is_deleted == 0,
+    ).correlate(QuestionORM.__table__).exists()
+    result = session.query(QuestionORM).filter(
+        QuestionORM.group_id == current_user.group_id,
+        QuestionORM.id.in_(question_ids),
+    ).update({"has_dataset": has_dataset}, synchronize_session=False)
+    if auto_commit:
+        session.commit()
+    return result
 
 
 def bulk_delete_questions(
@@ -155,7 +254,7 @@ def bulk_delete_questions(
     if file_pair_ids:
         conditions.append(QuestionORM.file_pair_id.in_(file_pair_ids))
     if id_list:
-        conditions.append(QuestionORM.id.in_(file_pair_ids))
+        conditions.append(QuestionORM.id.in_(id_list))
     # Combine all conditions with and_
     # Need to handle cases where we have only one condition (the fixed ones)
     if len(conditions) == 1:
@@ -169,4 +268,6 @@ def bulk_delete_questions(
         synchronize_session=False
     )
     db.commit()
+    search.remove_rows(QuestionORM.__tablename__, current_user.group_id, project_id=project_ids, file_id=file_ids,
+                       file_pair_id=file_pair_ids, id=id_list)
     return result
@@ -3,9 +3,9 @@ import time
 import uuid
 from datetime import datetime
 from operator import and_
-from typing import Optional, List
+from typing import Optional, List, Dict
 
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, String, Integer, Index, or_, func
 from sqlalchemy.orm import Session, mapped_column, Mapped
 from sqlalchemy import text
 
@@ -15,6 +15,13 @@ from app.models.user_model import User
 
 class TagORM(Base):
     __tablename__ = "tags"
+    __table_args__ = (
+        Index("ix_tags_scope", "group_id", "project_id", "is_deleted"),
+        Index("ix_tags_parent_id", "parent_id"),
+        # 物化路径前缀索引, 子树查询使用 root_ids LIKE '<path>,%' 前缀匹配
+        Index("ix_tags_project_path", "project_id", "root_ids", mysql_length={"root_ids": 255}),
+        Index("ix_tags_is_deleted", "is_deleted"),
+    )
 
     id: Mapped[str] = mapped_column(String(255), primary_key=True)
     user_id: Mapped[str] = mapped_column(String(255))
@@ -22,7 +29,8 @@ class TagORM(Base):
 
     label: Mapped[str] = mapped_column(String(255))
     parent_id: Mapped[str] = mapped_column(String(255))
-    root_ids: Mapped[str] = mapped_column(String(2000), nullable=True)  # For storing multiple root IDs
+    # 物化路径: 从根到父节点的 id 列表, 格式为 ",<root_id>,...,<parent_id>", 根节点为空字符串
+    root_ids: Mapped[str] = mapped_column(String(2000), nullable=True)
 
     project_id: Mapped[str] = mapped_column(String(255))
 
@@ -58,6 +66,35 @@ def list(session: Session, current_user: User = None, project_id: str = None) ->
     return query.all()
 
 
+def subtree_path(tag: TagORM) -> str:
+    """子节点 root_ids 的公共前缀"""
+    return (tag.root_ids or "") + "," + tag.id
+
+
+def _subtree_condition(path: str):
+    # 前缀 LIKE 可以走 ix_tags_project_path, 末尾的逗号保证不会匹配到 id 前缀相同的其他节点
+    return or_(TagORM.root_ids == path, TagORM.root_ids.like(path + ",%"))
+
+
+def list_subtree(session: Session, current_user: User, tag: TagORM, include_self: bool = True) -> List[TagORM]:
+    conditions = [_subtree_condition(subtree_path(tag))]
+    if include_self:
+        conditions = [or_(TagORM.id == tag.id, *conditions)]
+    return session.query(TagORM).filter(
+        TagORM.is_deleted == 0,
+        TagORM.group_id == current_user.group_id,
+        TagORM.project_id == tag.project_id,
+        *conditions
+    ).all()
+
+
+def tree_stamp(session: Session, current_user: User, project_id: str) -> tuple:
+    """项目标签的版本戳 (数量, 最大更新时间), 用于校验缓存的标签树"""
+    row = session.query(func.count(TagORM.id), func.max(TagORM.updated_at)).filter(
+        TagORM.is_deleted == 0, TagORM.group_id == current_user.group_id, TagORM.project_id == project_id).one()
+    return tuple(row)
+
+
 def get(session: Session, current_user: User, id: str) -> Optional[TagORM]:
     return session.query(TagORM).filter(
         TagORM.id == id,
@@ -78,6 +115,28 @@ def create(session: Session, current_user: User, tag: TagORM) -> Optional[TagORM
     return tag
 
 
+def bulk_create(session: Session, current_user: User, tag_data: List[Dict], auto_commit: bool = True):
+    """批量插入, tag_data 中已包含调用方分配的 id、parent_id 与 root_ids"""
+    if not tag_data:
+        return None
+
+    current_time = int(time.time())
+    mappings = []
+    for data in tag_data:
+        mappings.append({
+            "user_id": current_user.id,
+            "group_id": current_user.group_id,
+            "created_at": current_time,
+            "updated_at": current_time,
+            "is_deleted": 0,
+            **data
+        })
+
+    session.bulk_insert_mappings(TagORM, mappings)
+    if auto_commit:
+        session.commit()
+
+
 def update(session: Session, current_user: User, id: str, update_data: dict) -> Optional[TagORM]:
     tag = get(session, current_user, id)
     if tag:
@@ -98,11 +157,28 @@ def delete(session: Session, current_user: User, id: str) -> Optional[TagORM]:
     return tag
 
 
+def delete_subtree(session: Session, current_user: User, id: str) -> Optional[TagORM]:
+    """软删除标签及其所有子孙标签, 一条 UPDATE 完成"""
+    tag = get(session, current_user, id)
+    if tag:
+        current_time = int(time.time())
+        session.query(TagORM).filter(
+            TagORM.is_deleted == 0,
+            TagORM.group_id == current_user.group_id,
+            TagORM.project_id == tag.project_id,
+            or_(TagORM.id == tag.id, _subtree_condition(subtree_path(tag)))
+        ).update({"is_deleted": current_time, "updated_at": current_time}, synchronize_session=False)
+        session.commit()
+        session.refresh(tag)
+    return tag
+
+
 def bulk_delete_tags(
         db: Session,
         current_user: User,
         project_ids: Optional[List[str]] = None,
-        parent_id: str = None
+        parent_id: str = None,
+        auto_commit: bool = True
 ) -> int:
     # Start with the fixed conditions
     conditions = [
@@ -114,7 +190,10 @@ def bulk_delete_tags(
     if project_ids:
         conditions.append(TagORM.project_id.in_(project_ids))
     if parent_id:
-        conditions.append(TagORM.root_ids.ilike(f'%{parent_id}%'))
+        parent = get(db, current_user, parent_id)
+        if not parent:
+            return 0
+        conditions.append(_subtree_condition(subtree_path(parent)))
 
     # Combine all conditions with and_
     # Need to handle cases where we have only one condition (the fixed ones)
@@ -130,5 +209,6 @@ def bulk_delete_tags(
         {"is_deleted": int(time.time()), "updated_at": int(time.time())},
         synchronize_session=False
     )
-    db.commit()
+    if auto_commit:
+        db.commit()
     return result
@@ -1,19 +1,54 @@
 from contextlib import contextmanager
 
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from app.config.config import settings
+from app.db.pool import build_engine, build_async_engine, to_async_url
+from app.db.routing import routing_session_class
 
-engine = create_engine(
+# API 请求使用的连接池
+engine = build_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,  # 启用连接健康检查
-    pool_recycle=3600,  # 每小时回收连接
-    connect_args={
-        "connect_timeout": 30,  # 连接超时30秒
-    }
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
 )
 
+# 后台任务 (任务管理器、微调/部署轮询线程) 使用的连接池
+background_engine = build_engine(
+    settings.DATABASE_URL,
+    pool_size=settings.DB_BACKGROUND_POOL_SIZE,
+    max_overflow=settings.DB_BACKGROUND_MAX_OVERFLOW,
+    pool_timeout=settings.DB_BACKGROUND_POOL_TIMEOUT,
+)
+
+# 异步接口使用的连接池, 驱动由 DATABASE_URL 推导 (aiomysql / aiosqlite), 也可以通过 ASYNC_DATABASE_URL 指定
+async_engine = build_async_engine(
+    settings.ASYNC_DATABASE_URL or to_async_url(settings.DATABASE_URL),
+    pool_size=settings.DB_ASYNC_POOL_SIZE,
+    max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+)
+
+# 只读副本, 只有 read_only 标记的 API 查询会使用
+read_engines = [build_engine(
+    url,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+) for url in settings.DATABASE_READ_URLS]
+async_read_engines = [build_async_engine(
+    to_async_url(url),
+    pool_size=settings.DB_ASYNC_POOL_SIZE,
+    max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+) for url in settings.DATABASE_READ_URLS]
+
 Base = declarative_base()
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=routing_session_class(read_engines))
+BackgroundSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=background_engine)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False,
+    sync_session_class=routing_session_class([e.sync_engine for e in async_read_engines]))
@@ -1,5 +1,10 @@
+from app.db import search
 from app.db.db import engine, Base
 from app.db.evaluation_db_model.evaluation_dataset_db import EvaluationDataset  # ✅ 确保导入模型
+from app.db.migrations.runner import run_migrations
+from app.db.migrations.versions import MIGRATIONS
 
 def init_db():
     Base.metadata.create_all(engine)
+    run_migrations(engine, MIGRATIONS)
+    search.ensure_index(engine)
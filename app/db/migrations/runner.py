@@ -0,0 +1,61 @@
+import logging
+import time
+from typing import Callable, List, Tuple
+
+from sqlalchemy import String, Integer, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import mapped_column, Mapped
+
+from app.db.db import Base
+
+
+class SchemaMigrationORM(Base):
+    __tablename__ = "schema_migrations"
+
+    version: Mapped[str] = mapped_column(String(255), primary_key=True)
+    applied_at: Mapped[int] = mapped_column(Integer())
+
+
+Migration = Tuple[str, Callable[[Connection], None]]
+
+
+def create_indexes(connection: Connection, table):
+    """按模型中声明的索引补建缺失的索引, 已存在的索引跳过"""
+    existing = {index["name"] for index in inspect(connection).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name not in existing:
+            logging.info(f"create index {index.name} on {table.name}")
+            index.create(connection)
+
+
+def add_column(connection: Connection, table_name: str, column_name: str, ddl: str):
+    """补加模型中新增的列, ddl 为列类型及默认值, 列已存在时跳过"""
+    existing = {column["name"] for column in inspect(connection).get_columns(table_name)}
+    if column_name not in existing:
+        logging.info(f"add column {column_name} on {table_name}")
+        connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {ddl}"))
+
+
+def drop_column(connection: Connection, table_name: str, column_name: str):
+    """删除模型中已移除的列, 列不存在时跳过"""
+    existing = {column["name"] for column in inspect(connection).get_columns(table_name)}
+    if column_name in existing:
+        logging.info(f"drop column {column_name} on {table_name}")
+        connection.execute(text(f"ALTER TABLE {table_name} DROP COLUMN {column_name}"))
+
+
+def run_migrations(engine: Engine, migrations: List[Migration]):
+    """按版本顺序执行尚未执行过的迁移, 每个迁移在独立事务中执行并记录版本"""
+    SchemaMigrationORM.__table__.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        applied = {row[0] for row in connection.execute(SchemaMigrationORM.__table__.select().with_only_columns(
+            SchemaMigrationORM.version))}
+
+    for version, migrate in migrations:
+        if version in applied:
+            continue
+        logging.info(f"Applying migration {version}")
+        with engine.begin() as connection:
+            migrate(connection)
+            connection.execute(SchemaMigrationORM.__table__.insert().values(version=version,
+                                                                             applied_at=int(time.time())))
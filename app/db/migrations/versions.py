@@ -0,0 +1,145 @@
+from typing import List
+
+import orjson
+
+from sqlalchemy import inspect, text, select, update
+from sqlalchemy.engine import Connection
+
+from app.db.dataset_db_model.catalog_db import CatalogORM
+from app.db.dataset_db_model.dataset_db import DatasetORM
+from app.db.dataset_db_model.dataset_version_db import DatasetVersionORM
+from app.db.dataset_db_model.file_db import FileORM
+from app.db.dataset_db_model.file_pair_db import FilePairORM
+from app.db.dataset_db_model.ga_pair_db import GAPairORM
+from app.db.dataset_db_model.job_db import JobORM
+from app.db.dataset_db_model.question_db import QuestionORM
+from app.db.dataset_db_model.tag_db import TagORM
+from app.db.migrations.runner import Migration, create_indexes, add_column, drop_column
+from app.lib.blob.blob_store import blob_store
+from app.db.search import SEARCH_TABLES
+
+
+def hot_filter_indexes(connection: Connection):
+    # create_all 不会给已存在的表补建索引, 存量库在这里补齐
+    for orm in [QuestionORM, DatasetORM, FilePairORM, FileORM, TagORM, CatalogORM, JobORM]:
+        create_indexes(connection, orm.__table__)
+
+
+def fulltext_indexes(connection: Connection):
+    # ngram 全文索引只有 mysql 支持, 其他数据库使用 sqlite fts5 侧车索引
+    if connection.dialect.name != "mysql":
+        return
+    for table, (text_columns, _) in SEARCH_TABLES.items():
+        name = f"ft_{table}_{'_'.join(text_columns)}"
+        existing = {index["name"] for index in inspect(connection).get_indexes(table)}
+        if name not in existing:
+            connection.execute(text(
+                f"ALTER TABLE {table} ADD FULLTEXT INDEX {name} ({', '.join(text_columns)}) WITH PARSER ngram"))
+
+
+FILE_BLOB_BATCH_SIZE = 200
+
+
+def file_content_blob(connection: Connection):
+    # 存量文件的正文迁移到 blob, 按 id 分批处理, 避免一次载入全部正文
+    add_column(connection, FileORM.__tablename__, "content_in_blob", "BOOLEAN NOT NULL DEFAULT 0")
+    table = FileORM.__table__
+    last_id = ""
+    while True:
+        rows = connection.execute(
+            select(table.c.id, table.c.md5, table.c.content)
+            .where(table.c.content_in_blob == False, table.c.id > last_id)  # noqa: E712
+            .order_by(table.c.id)
+            .limit(FILE_BLOB_BATCH_SIZE)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        moved = [row.id for row in rows if row.md5]
+        for row in rows:
+            if row.md5:
+                blob_store.put_text(row.md5, row.content or "")
+        if moved:
+            connection.execute(update(table).where(table.c.id.in_(moved)).values(content="", content_in_blob=True))
+
+
+def tag_path_index(connection: Connection):
+    create_indexes(connection, TagORM.__table__)
+
+
+def soft_delete_indexes(connection: Connection):
+    # 压缩清理按 is_deleted 范围查找过期的软删除行
+    for orm in [QuestionORM, DatasetORM, FilePairORM, GAPairORM, FileORM, TagORM, CatalogORM, JobORM]:
+        create_indexes(connection, orm.__table__)
+
+
+GA_PAIR_BATCH_SIZE = 1000
+
+
+def ga_pair_reference(connection: Connection):
+    # 问题/数据集中保存的 GA 对 JSON 副本改为 ga_pair_id 引用, 回填后删除旧列
+    for orm in [QuestionORM, DatasetORM]:
+        table_name = orm.__tablename__
+        add_column(connection, table_name, "ga_pair_id", "VARCHAR(255) NOT NULL DEFAULT ''")
+        columns = {column["name"] for column in inspect(connection).get_columns(table_name)}
+        if "ga_pair" in columns:
+            last_id = ""
+            while True:
+                rows = connection.execute(text(
+                    f"SELECT id, ga_pair FROM {table_name} WHERE id > :last_id AND ga_pair IS NOT NULL "
+                    f"AND ga_pair != '' ORDER BY id LIMIT {GA_PAIR_BATCH_SIZE}"), {"last_id": last_id}).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                # 同一批中引用相同 GA 对的行合并为一条 UPDATE
+                ids_by_ga_pair = {}
+                for row in rows:
+                    ga_pair_id = orjson.loads(row.ga_pair).get("id")
+                    if ga_pair_id:
+                        ids_by_ga_pair.setdefault(ga_pair_id, []).append(row.id)
+                for ga_pair_id, ids in ids_by_ga_pair.items():
+                    connection.execute(update(orm.__table__).where(orm.__table__.c.id.in_(ids))
+                                       .values(ga_pair_id=ga_pair_id))
+            drop_column(connection, table_name, "ga_pair")
+        create_indexes(connection, orm.__table__)
+
+
+def job_json_columns(connection: Connection):
+    # 任务内容与结果改为原生 JSON 列, 空字符串不是合法 JSON, 先置为 NULL
+    connection.execute(text("UPDATE jobs SET result = NULL WHERE result = ''"))
+    if connection.dialect.name == "mysql":
+        connection.execute(text("ALTER TABLE jobs MODIFY content JSON NOT NULL, MODIFY result JSON NULL"))
+    elif connection.dialect.name == "postgresql":
+        connection.execute(text("ALTER TABLE jobs ALTER COLUMN content TYPE JSON USING content::json, "
+                                "ALTER COLUMN result TYPE JSON USING result::json"))
+    # sqlite 的 JSON 类型以 TEXT 存储, 无需修改列类型
+
+
+def dataset_version_export_status(connection: Connection):
+    # 已有版本的文件都是同步导出的, 状态为 Success
+    add_column(connection, DatasetVersionORM.__tablename__, "status", "VARCHAR(100) NOT NULL DEFAULT 'Success'")
+    add_column(connection, DatasetVersionORM.__tablename__, "job_id", "VARCHAR(255) NOT NULL DEFAULT ''")
+
+
+def dataset_version_export_format(connection: Connection):
+    add_column(connection, DatasetVersionORM.__tablename__, "export_format", "VARCHAR(50) NOT NULL DEFAULT 'jsonl'")
+
+
+def dataset_version_artifact(connection: Connection):
+    add_column(connection, DatasetVersionORM.__tablename__, "artifact_hash", "VARCHAR(64) NOT NULL DEFAULT ''")
+    add_column(connection, DatasetVersionORM.__tablename__, "fingerprint", "VARCHAR(64) NOT NULL DEFAULT ''")
+    create_indexes(connection, DatasetVersionORM.__table__)
+
+
+# 只能在末尾追加新的迁移, 已发布的版本号不能修改
+MIGRATIONS: List[Migration] = [
+    ("0001_hot_filter_indexes", hot_filter_indexes),
+    ("0002_fulltext_indexes", fulltext_indexes),
+    ("0003_file_content_blob", file_content_blob),
+    ("0004_tag_path_index", tag_path_index),
+    ("0005_soft_delete_indexes", soft_delete_indexes),
+    ("0006_ga_pair_reference", ga_pair_reference),
+    ("0007_job_json_columns", job_json_columns),
+    ("0008_dataset_version_export_status", dataset_version_export_status),
+    ("0009_dataset_version_export_format", dataset_version_export_format),
+    ("0010_dataset_version_artifact", dataset_version_artifact),
+]
@@ -0,0 +1,62 @@
+import base64
+import threading
+from typing import Optional, Tuple, List
+
+import orjson
+from cachetools import TTLCache
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import Query
+
+from app.config.config import settings
+
+# 游标位置: 上一页最后一条记录的 (created_at, id)
+CursorKey = Tuple[int, str]
+
+_count_cache = TTLCache(maxsize=4096, ttl=settings.LIST_COUNT_CACHE_TTL)
+_count_lock = threading.Lock()
+
+
+def encode_cursor(key: Optional[CursorKey]) -> Optional[str]:
+    if key is None:
+        return None
+    return base64.urlsafe_b64encode(orjson.dumps([key[0], key[1]])).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[CursorKey]:
+    """空字符串表示第一页, 格式不正确时抛出 ValueError"""
+    if not cursor:
+        return None
+    try:
+        created_at, id = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {cursor}") from e
+    if not isinstance(created_at, int) or not isinstance(id, str):
+        raise ValueError(f"invalid cursor: {cursor}")
+    return created_at, id
+
+
+def keyset_page(query: Query, model, after: Optional[CursorKey], page_size: int) -> (List, Optional[CursorKey]):
+    """按 (created_at, id) 倒序做游标分页, 多取一条用于判断是否还有下一页"""
+    if after is not None:
+        query = query.filter(or_(
+            model.created_at < after[0],
+            and_(model.created_at == after[0], model.id < after[1]),
+        ))
+    items = query.order_by(model.created_at.desc(), model.id.desc()).limit(page_size + 1).all()
+    if len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    return items, (items[-1].created_at, items[-1].id)
+
+
+def cached_count(query: Query) -> int:
+    """总数按查询语句和参数短时间缓存, 翻页时不再重复扫描整个过滤结果"""
+    compiled = query.statement.compile()
+    key = (str(compiled), tuple(sorted((k, repr(v)) for k, v in compiled.params.items())))
+    with _count_lock:
+        total = _count_cache.get(key)
+    if total is None:
+        total = query.count()
+        with _count_lock:
+            _count_cache[key] = total
+    return total
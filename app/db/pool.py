@@ -0,0 +1,155 @@
+"""
+数据库连接池的创建与监控
+
+API 请求与后台任务 (任务管理器、微调/部署轮询线程) 使用各自独立的连接池,
+后台任务占满连接时不会让 API 请求一直等待连接
+"""
+import threading
+import time
+
+import orjson
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# 等待超过该时长的获取连接计为一次等待
+WAIT_THRESHOLD_SECONDS = 0.001
+
+
+class PoolMetrics:
+    """连接获取次数、等待次数与耗时、溢出连接使用次数、超时次数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def record_checkout(self, wait_seconds: float, overflow: bool):
+        with self._lock:
+            self.checkouts += 1
+            if overflow:
+                self.overflow_checkouts += 1
+            if wait_seconds >= WAIT_THRESHOLD_SECONDS:
+                self.waits += 1
+                self.wait_seconds += wait_seconds
+                self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def record_timeout(self, wait_seconds: float):
+        with self._lock:
+            self.timeouts += 1
+            self.waits += 1
+            self.wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "max_wait_seconds": round(self.max_wait_seconds, 3),
+                "timeouts": self.timeouts,
+            }
+
+
+class MeteredQueuePool(QueuePool):
+    """记录获取连接等待情况的 QueuePool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - start)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start, self.overflow() > 0)
+        return connection
+
+
+class MeteredAsyncAdaptedQueuePool(MeteredQueuePool, AsyncAdaptedQueuePool):
+    """异步驱动使用的 MeteredQueuePool"""
+
+
+# 同步驱动 -> 对应的异步驱动
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """将同步连接地址转换为异步驱动的连接地址, 已是异步驱动或没有对应驱动时原样返回"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None or parsed.get_driver_name() in ("aiomysql", "asyncmy", "aiosqlite"):
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def _connect_args(url: str) -> dict:
+    connect_args = {}
+    if make_url(url).get_backend_name() == "mysql":
+        connect_args["connect_timeout"] = 30  # 连接超时30秒
+    return connect_args
+
+
+def _json_serializer(value) -> str:
+    return orjson.dumps(value).decode()
+
+
+def build_engine(url: str, pool_size: int, max_overflow: int, pool_timeout: int) -> Engine:
+    connect_args = _connect_args(url)
+    return create_engine(
+        url,
+        poolclass=MeteredQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_pre_ping=True,  # 启用连接健康检查
+        pool_recycle=3600,  # 每小时回收连接
+        connect_args=connect_args,
+        json_serializer=_json_serializer,
+        json_deserializer=orjson.loads,
+    )
+
+
+def build_async_engine(url: str, pool_size: int, max_overflow: int, pool_timeout: int) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        poolclass=MeteredAsyncAdaptedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        connect_args=_connect_args(url),
+        json_serializer=_json_serializer,
+        json_deserializer=orjson.loads,
+    )
+
+
+def pool_status(engine: Engine) -> dict:
+    if isinstance(engine, AsyncEngine):
+        engine = engine.sync_engine
+    pool = engine.pool
+    status = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "timeout": pool.timeout(),
+    }
+    if isinstance(pool, MeteredQueuePool):
+        status.update(pool.metrics.snapshot())
+    return status
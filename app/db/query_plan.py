@@ -0,0 +1,86 @@
+"""
+检查列表接口与生成任务的常用查询是否命中了模型中声明的索引
+
+    python -m app.db.query_plan
+"""
+import sys
+from typing import List, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.sql import Select
+
+from app.db.db import engine
+from app.db.dataset_db_model import question_db, dataset_db, file_pair_db, file_db, job_db
+from app.db.dataset_db_model.catalog_db import CatalogORM
+from app.db.dataset_db_model.dataset_db import DatasetORM
+from app.db.dataset_db_model.file_db import FileORM
+from app.db.dataset_db_model.file_pair_db import FilePairORM
+from app.db.dataset_db_model.job_db import JobORM
+from app.db.dataset_db_model.question_db import QuestionORM
+from app.db.dataset_db_model.tag_db import TagORM
+from app.models.dataset_models.job_model import JobStatus
+from app.models.user_model import User
+
+SAMPLE_USER = User(id="explain-user", group_id="explain-group")
+SAMPLE_PROJECT = "explain-project"
+SAMPLE_ID = "explain-id"
+
+
+def _page(orm, conditions: list) -> Select:
+    return select(orm.id).where(*conditions).order_by(orm.created_at.desc(), orm.id.desc()).limit(100)
+
+
+def build_checks() -> List[Tuple[str, Select, str]]:
+    """(查询说明, 查询语句, 期望命中的索引)"""
+    return [
+        ("questions list", _page(QuestionORM, question_db._list_conditions(SAMPLE_USER, SAMPLE_PROJECT)),
+         "ix_questions_scope_created"),
+        ("questions by tag", _page(QuestionORM, question_db._list_conditions(
+            SAMPLE_USER, SAMPLE_PROJECT, match_tag_name="tag")), "ix_questions_scope_tag"),
+        ("questions by file pair", select(QuestionORM.id).where(
+            QuestionORM.file_pair_id == SAMPLE_ID, QuestionORM.is_deleted == 0), "ix_questions_file_pair_id"),
+        ("datasets list", _page(DatasetORM, dataset_db._list_conditions(SAMPLE_USER, SAMPLE_PROJECT)),
+         "ix_datasets_scope_created"),
+        ("datasets by question", select(DatasetORM.id).where(*dataset_db._list_conditions(
+            SAMPLE_USER, SAMPLE_PROJECT, question_id=SAMPLE_ID)), "ix_datasets_question_id"),
+        ("file pairs list", _page(FilePairORM, file_pair_db._list_conditions(SAMPLE_USER, SAMPLE_PROJECT)),
+         "ix_file_pairs_scope_created"),
+        ("file pairs by file", select(FilePairORM.id).where(
+            FilePairORM.file_id == SAMPLE_ID, FilePairORM.is_deleted == 0), "ix_file_pairs_file_id"),
+        ("files list", _page(FileORM, file_db._list_conditions(SAMPLE_USER, SAMPLE_PROJECT)),
+         "ix_files_scope_created"),
+        ("files by name", select(FileORM.id).where(*file_db._list_conditions(
+            SAMPLE_USER, SAMPLE_PROJECT, file_name_match="name")), "ix_files_scope_name"),
+        ("jobs list", _page(JobORM, job_db._list_conditions(SAMPLE_USER, SAMPLE_PROJECT)), "ix_jobs_scope_created"),
+        ("running jobs", select(JobORM.id).where(*job_db._list_conditions(None, status=JobStatus.Running)),
+         "ix_jobs_status"),
+        ("tags list", select(TagORM.id).where(TagORM.is_deleted == 0, TagORM.group_id == SAMPLE_USER.group_id,
+                                              TagORM.project_id == SAMPLE_PROJECT), "ix_tags_scope"),
+        ("catalogs by file", select(CatalogORM.id).where(
+            CatalogORM.is_deleted == 0, CatalogORM.group_id == SAMPLE_USER.group_id,
+            CatalogORM.project_id == SAMPLE_PROJECT, CatalogORM.file_id == SAMPLE_ID), "ix_catalogs_scope_file"),
+    ]
+
+
+def explain(connection, statement: Select) -> str:
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    if engine.dialect.name == "sqlite":
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).mappings().all()
+        return "; ".join(row["detail"] for row in rows)
+    rows = connection.execute(text(f"EXPLAIN {sql}")).mappings().all()
+    return "; ".join(f"{row['table']}: key={row['key']}" for row in rows)
+
+
+def main() -> int:
+    failed = 0
+    with engine.connect() as connection:
+        for name, statement, expected in build_checks():
+            plan = explain(connection, statement)
+            ok = expected in plan
+            failed += 0 if ok else 1
+            print(f"[{'OK' if ok else 'MISS'}] {name}: expected {expected} -> {plan}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+只读副本路由
+
+配置 DATABASE_READ_URLS 后, API 会话在 read_only 标记的 service 调用中把查询发往只读副本,
+其余情况 (包括写入、未标记的调用) 仍使用主库。同一个会话 (一次请求) 发生过写入后,
+之后的读取也固定走主库, 保证读到自己刚写入的数据
+"""
+import functools
+import random
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import Insert, Update, Delete
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# None: 未标记, True: 只读调用, False: 强制主库 (其中嵌套的只读调用同样走主库)
+_read_only: ContextVar[Optional[bool]] = ContextVar("db_read_only", default=None)
+
+WROTE_KEY = "routing_wrote"
+REPLICA_KEY = "routing_replica"
+
+
+def _with_read_only(value: bool, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _read_only.get() is False:
+            return func(*args, **kwargs)
+        token = _read_only.set(value)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+
+    return wrapper
+
+
+def read_only(func):
+    """标记只读的 service 函数, 其中的查询可以发往只读副本"""
+    return _with_read_only(True, func)
+
+
+def use_primary(func):
+    """需要读取最新数据的 service 函数, 其中调用的只读函数也使用主库"""
+    return _with_read_only(False, func)
+
+
+class RoutingSession(Session):
+    replicas: List[Engine] = []
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        is_write = self._flushing or isinstance(clause, (Insert, Update, Delete))
+        if is_write:
+            self.info[WROTE_KEY] = True
+        elif self.replicas and _read_only.get() is True and not self.info.get(WROTE_KEY):
+            # 同一个会话固定使用一个副本, 避免多个副本之间的延迟差异导致前后读取不一致
+            replica = self.info.get(REPLICA_KEY)
+            if replica is None:
+                replica = self.info[REPLICA_KEY] = random.choice(self.replicas)
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+def routing_session_class(replicas: List[Engine]) -> type:
+    return type("RoutingSession", (RoutingSession,), {"replicas": replicas})
@@ -0,0 +1,270 @@
+"""
+问题/数据集/文件名的全文检索
+
+- mysql: 使用 FULLTEXT + ngram 分词索引, 通过 MATCH ... AGAINST 查询 (索引由迁移创建)。
+  建议关闭 innodb_ft_enable_stopword, ngram 模式下包含停用词的分词会被整体忽略
+- fts5: 非 mysql 数据库时使用本地 SQLite FTS5 (trigram 分词) 侧车索引, 在写入/更新/软删除时同步。
+  侧车索引同时保存 created_at, 命中结果在侧车索引内按 (created_at, id) 倒序做游标分页, 与普通列表的顺序和游标一致;
+  每次回表的 IN 列表不超过 SEARCH_BATCH_SIZE, 不截断结果
+- like: 不使用索引, 退化为 ILIKE 全表扫描
+
+关键词短于分词长度时无法走索引, 退化为 ILIKE
+"""
+import logging
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from itertools import islice
+from typing import List, Optional, Iterable, Iterator
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query
+
+from app.config.config import settings
+from app.db.db import engine
+from app.db.pagination import CursorKey
+
+
+class SearchBackend:
+    Auto = "auto"
+    MySQL = "mysql"
+    FTS5 = "fts5"
+    Like = "like"
+
+
+# 表名 -> (参与检索的文本列, 侧车索引中保存的过滤列)
+SEARCH_TABLES = {
+    "questions": (["question"], ["group_id", "project_id", "file_id", "file_pair_id"]),
+    "datasets": (["question", "answer"], ["group_id", "project_id", "file_id", "file_pair_id", "question_id"]),
+    "files": (["file_name"], ["group_id", "project_id"]),
+}
+
+# 侧车索引中保存的排序列, 与 pagination.keyset_page 的排序一致
+SORT_COLUMNS = ["created_at"]
+
+# trigram 分词的最短可检索长度
+FTS5_TOKEN_SIZE = 3
+BACKFILL_BATCH_SIZE = 1000
+
+
+@lru_cache(maxsize=1)
+def get_backend() -> str:
+    backend = settings.SEARCH_BACKEND
+    if backend == SearchBackend.Auto:
+        return SearchBackend.MySQL if engine.dialect.name == "mysql" else SearchBackend.FTS5
+    return backend
+
+
+class SidecarIndex:
+    """SQLite FTS5 侧车索引, 单连接 + 锁, 首次使用时创建"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS search_meta (table_name TEXT PRIMARY KEY)")
+            for table, (text_columns, filter_columns) in SEARCH_TABLES.items():
+                existing = [row[1] for row in connection.execute(f"PRAGMA table_info({table}_fts)")]
+                if existing and not set(SORT_COLUMNS) <= set(existing):
+                    # 早期的侧车索引没有排序列, 重建后由 ensure_index 回填
+                    connection.execute(f"DROP TABLE {table}_fts")
+                    connection.execute("DELETE FROM search_meta WHERE table_name = ?", [table])
+                columns = (["id UNINDEXED"] + [f"{c} UNINDEXED" for c in filter_columns + SORT_COLUMNS]
+                           + text_columns)
+                connection.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5({', '.join(columns)}, tokenize='trigram')")
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def is_built(self, table: str) -> bool:
+        with self._lock:
+            row = self._connect().execute("SELECT 1 FROM search_meta WHERE table_name = ?", [table]).fetchone()
+            return row is not None
+
+    def mark_built(self, table: str):
+        with self._lock:
+            connection = self._connect()
+            connection.execute("INSERT OR IGNORE INTO search_meta (table_name) VALUES (?)", [table])
+            connection.commit()
+
+    def upsert(self, table: str, rows: List[dict]):
+        text_columns, filter_columns = SEARCH_TABLES[table]
+        columns = ["id"] + filter_columns + SORT_COLUMNS + text_columns
+        values = [[row.get(c) or (0 if c in SORT_COLUMNS else "") for c in columns] for row in rows]
+        with self._lock:
+            connection = self._connect()
+            connection.executemany(f"DELETE FROM {table}_fts WHERE id = ?", [[v[0]] for v in values])
+            connection.executemany(
+                f"INSERT INTO {table}_fts ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", values)
+            connection.commit()
+
+    def delete(self, table: str, filters: dict):
+        """按过滤列删除, 多个过滤条件之间为 AND, 每个条件的取值为 IN"""
+        clauses = []
+        params = []
+        for column, values in filters.items():
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        with self._lock:
+            connection = self._connect()
+            connection.execute(f"DELETE FROM {table}_fts WHERE {' AND '.join(clauses)}", params)
+            connection.commit()
+
+    def search(self, table: str, keyword: str, group_id: str, project_id: str, after: Optional[CursorKey],
+               limit: int, offset: int = 0) -> List[CursorKey]:
+        """按 (created_at, id) 倒序返回游标 after 之后的最多 limit 个命中的 (created_at, id)"""
+        phrase = '"' + keyword.replace('"', '""') + '"'
+        sql = f"SELECT created_at, id FROM {table}_fts WHERE {table}_fts MATCH ? AND group_id = ? AND project_id = ?"
+        params = [phrase, group_id, project_id]
+        if after is not None:
+            sql += " AND (created_at < ? OR (created_at = ? AND id < ?))"
+            params += [after[0], after[0], after[1]]
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        with self._lock:
+            rows = self._connect().execute(sql, params).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def count(self, table: str, keyword: str, group_id: str, project_id: str) -> int:
+        phrase = '"' + keyword.replace('"', '""') + '"'
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT count(*) FROM {table}_fts WHERE {table}_fts MATCH ? AND group_id = ? AND project_id = ?",
+                [phrase, group_id, project_id]).fetchone()
+        return row[0]
+
+
+sidecar = SidecarIndex(settings.SEARCH_INDEX_PATH)
+
+
+def _like_condition(orm, text_columns: List[str], keyword: str):
+    conditions = [getattr(orm, c).ilike(f'%{keyword}%') for c in text_columns]
+    return conditions[0] if len(conditions) == 1 else or_(*conditions)
+
+
+def uses_sidecar(keyword: Optional[str]) -> bool:
+    """关键词是否走侧车索引, 是时列表查询改用 sidecar_page / sidecar_offset_page / sidecar_count"""
+    return bool(keyword) and get_backend() == SearchBackend.FTS5 and len(keyword) >= FTS5_TOKEN_SIZE
+
+
+def match_condition(orm, keyword: str):
+    """返回关键词检索的过滤条件, 供各表的 _list_conditions 使用; 走侧车索引的关键词不使用该条件"""
+    text_columns, _ = SEARCH_TABLES[orm.__tablename__]
+
+    if get_backend() == SearchBackend.MySQL and len(keyword) >= settings.SEARCH_NGRAM_TOKEN_SIZE:
+        # 短语模式要求 ngram 连续出现, 与 ILIKE 的子串语义一致
+        phrase = '"' + keyword.replace('"', ' ') + '"'
+        return match(*[getattr(orm, c) for c in text_columns], against=phrase).in_boolean_mode()
+
+    return _like_condition(orm, text_columns, keyword)
+
+
+def _sidecar_id_batches(orm, keyword: str, group_id: str, project_id: str,
+                        after: Optional[CursorKey]) -> Iterator[List[str]]:
+    batch_size = settings.SEARCH_BATCH_SIZE
+    while True:
+        keys = sidecar.search(orm.__tablename__, keyword, group_id, project_id, after, batch_size)
+        if keys:
+            yield [key[1] for key in keys]
+        if len(keys) < batch_size:
+            return
+        after = keys[-1]
+
+
+def _fetch_ordered(query: Query, orm, ids: List[str]) -> List:
+    return query.filter(orm.id.in_(ids)).order_by(orm.created_at.desc(), orm.id.desc()).all()
+
+
+def _sidecar_rows(query: Query, orm, keyword: str, group_id: str, project_id: str,
+                  after: Optional[CursorKey] = None) -> Iterator:
+    """按 (created_at, id) 倒序逐批回表, query 上的其他过滤条件在回表时生效"""
+    for ids in _sidecar_id_batches(orm, keyword, group_id, project_id, after):
+        yield from _fetch_ordered(query, orm, ids)
+
+
+def sidecar_page(query: Query, orm, keyword: str, group_id: str, project_id: str, after: Optional[CursorKey],
+                 page_size: int) -> (List, Optional[CursorKey]):
+    """侧车索引命中结果的游标分页, 游标与 pagination.keyset_page 相同, 多取一条用于判断是否还有下一页"""
+    items = [*islice(_sidecar_rows(query, orm, keyword, group_id, project_id, after), page_size + 1)]
+    if len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    return items, (items[-1].created_at, items[-1].id)
+
+
+def sidecar_offset_page(query: Query, orm, keyword: str, group_id: str, project_id: str, page_no: int,
+                        page_size: int, filtered: bool) -> List:
+    """只有关键词过滤时直接在侧车索引中 OFFSET 取出该页; 还有其他过滤条件时只能逐批回表跳过前面的行"""
+    skip = (page_no - 1) * page_size
+    if not filtered:
+        keys = sidecar.search(orm.__tablename__, keyword, group_id, project_id, None, page_size, skip)
+        return _fetch_ordered(query, orm, [key[1] for key in keys]) if keys else []
+    return [*islice(_sidecar_rows(query, orm, keyword, group_id, project_id), skip, skip + page_size)]
+
+
+def sidecar_count(query: Query, orm, keyword: str, group_id: str, project_id: str, filtered: bool) -> int:
+    """只有关键词过滤时直接使用侧车索引的命中数; 还有其他过滤条件 (filtered) 时按批回表计数"""
+    if not filtered:
+        return sidecar.count(orm.__tablename__, keyword, group_id, project_id)
+    return sum(query.filter(orm.id.in_(ids)).count()
+               for ids in _sidecar_id_batches(orm, keyword, group_id, project_id, None))
+
+
+def _to_row(table: str, item) -> dict:
+    text_columns, filter_columns = SEARCH_TABLES[table]
+    columns = ["id"] + filter_columns + SORT_COLUMNS + text_columns
+    if isinstance(item, dict):
+        return {c: item.get(c) for c in columns}
+    return {c: getattr(item, c) for c in columns}
+
+
+def index_rows(table: str, items: Iterable):
+    """写入或更新后同步侧车索引, items 为 ORM 对象或 bulk_insert_mappings 的字典"""
+    if get_backend() != SearchBackend.FTS5:
+        return
+    rows = [_to_row(table, item) for item in items]
+    if rows:
+        sidecar.upsert(table, rows)
+
+
+def remove_rows(table: str, group_id: str, **filters: Optional[List[str]]):
+    """软删除后同步侧车索引, filters 与 bulk_delete 的过滤条件一致, 值为空的条件忽略"""
+    if get_backend() != SearchBackend.FTS5:
+        return
+    conditions = {"group_id": [group_id]}
+    for column, values in filters.items():
+        if values:
+            conditions[column] = values
+    sidecar.delete(table, conditions)
+
+
+def ensure_index(bind: Engine):
+    """侧车索引首次启用时, 从数据库中回填未删除的数据"""
+    if get_backend() != SearchBackend.FTS5:
+        return
+    from app.db.db import Base
+
+    for table_name, (text_columns, filter_columns) in SEARCH_TABLES.items():
+        if sidecar.is_built(table_name):
+            continue
+        logging.info(f"Building search index for {table_name}")
+        table = Base.metadata.tables[table_name]
+        columns = [table.c[c] for c in ["id"] + filter_columns + SORT_COLUMNS + text_columns]
+        with bind.connect() as connection:
+            result = connection.execution_options(stream_results=True).execute(
+                select(*columns).where(table.c.is_deleted == 0))
+            for rows in result.mappings().partitions(BACKFILL_BATCH_SIZE):
+                sidecar.upsert(table_name, [dict(row) for row in rows])
+        sidecar.mark_built(table_name)
@@ -0,0 +1,35 @@
+"""按项目或文件分批软删除关联数据, 每批一个事务, 供后台级联删除任务使用"""
+import time
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db import search
+from app.models.user_model import User
+
+
+def _conditions(orm, current_user: User, filters: dict) -> list:
+    conditions = [orm.is_deleted == 0, orm.group_id == current_user.group_id]
+    for column, value in filters.items():
+        conditions.append(getattr(orm, column) == value)
+    return conditions
+
+
+def count_live(session: Session, orm, current_user: User, **filters) -> int:
+    return session.query(func.count(orm.id)).filter(*_conditions(orm, current_user, filters)).scalar()
+
+
+def soft_delete_batch(session: Session, orm, current_user: User, batch_size: int, **filters) -> int:
+    """软删除最多 batch_size 行, 返回本批删除的行数, 为 0 表示已全部删除"""
+    ids = [row[0] for row in session.query(orm.id).filter(
+        *_conditions(orm, current_user, filters)).limit(batch_size).all()]
+    if not ids:
+        return 0
+
+    current_time = int(time.time())
+    session.query(orm).filter(orm.id.in_(ids), orm.is_deleted == 0).update(
+        {"is_deleted": current_time, "updated_at": current_time}, synchronize_session=False)
+    session.commit()
+    if orm.__tablename__ in search.SEARCH_TABLES:
+        search.remove_rows(orm.__tablename__, current_user.group_id, id=ids)
+    return len(ids)
@@ -0,0 +1,127 @@
+"""
+本地内容寻址存储, 以上传文件原始字节的 md5 为键保存提取后的文件内容
+
+- 路径: {root}/{md5[0:2]}/{md5[2:4]}/{md5}, 启用压缩时追加 .zst 后缀
+- 同一内容只写一次, 不同项目上传相同的文件时共用同一个 blob
+- 先写临时文件再 os.replace, 读到的 blob 总是完整的
+- 未压缩的 blob 通过 mmap 分块读取, 压缩的 blob 流式解压, 下载时不需要整体载入内存
+"""
+import mmap
+import os
+import tempfile
+import time
+from typing import Iterator, Optional
+
+import zstandard
+
+from app.config.config import settings
+
+ZSTD_SUFFIX = ".zst"
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class BlobStore:
+
+    def __init__(self, root: str, compress_level: int = 3):
+        self.root = root
+        self.compress_level = compress_level
+
+    def _base_path(self, key: str) -> str:
+        if len(key) < 4 or not key.isalnum():
+            raise ValueError(f"invalid blob key: {key}")
+        return os.path.join(self.root, key[0:2], key[2:4], key)
+
+    def path(self, key: str) -> Optional[str]:
+        """返回已存在的 blob 路径, 压缩和未压缩的 blob 都能读取, 不受当前压缩配置影响"""
+        base = self._base_path(key)
+        for candidate in (base + ZSTD_SUFFIX, base):
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    def exists(self, key: str) -> bool:
+        return self.path(key) is not None
+
+    def put(self, key: str, data: bytes, overwrite: bool = False) -> bool:
+        """写入 blob, 已存在时直接返回 False; overwrite 为 True 时替换已有内容, 用于整理后的正文回写"""
+        previous = self.path(key)
+        if previous is not None and not overwrite:
+            return False
+
+        target = self._base_path(key)
+        if self.compress_level > 0:
+            data = zstandard.ZstdCompressor(level=self.compress_level).compress(data)
+            target += ZSTD_SUFFIX
+
+        directory = os.path.dirname(target)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        # 压缩配置变化后旧 blob 的后缀与新写入的不同, 删除旧文件, 读取时不会读到旧内容
+        if previous is not None and previous != target:
+            os.remove(previous)
+        return True
+
+    def read(self, key: str) -> Optional[bytes]:
+        path = self.path(key)
+        if path is None:
+            return None
+        if path.endswith(ZSTD_SUFFIX):
+            with open(path, "rb") as f:
+                return zstandard.ZstdDecompressor().stream_reader(f).read()
+        with open(path, "rb") as f:
+            return f.read()
+
+    def stream(self, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """分块读取 blob, 不存在时抛出 FileNotFoundError"""
+        path = self.path(key)
+        if path is None:
+            raise FileNotFoundError(key)
+        return self._iter_chunks(path, chunk_size)
+
+    @staticmethod
+    def _iter_chunks(path: str, chunk_size: int) -> Iterator[bytes]:
+        with open(path, "rb") as f:
+            if path.endswith(ZSTD_SUFFIX):
+                yield from zstandard.ZstdDecompressor().read_to_iter(f, read_size=chunk_size, write_size=chunk_size)
+                return
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for offset in range(0, len(mapped), chunk_size):
+                    yield mapped[offset:offset + chunk_size]
+
+    def delete(self, key: str):
+        path = self.path(key)
+        if path is not None:
+            os.remove(path)
+
+    def touch(self, key: str):
+        """复用已有 blob 时更新修改时间, 清理时跳过最近使用过的 blob"""
+        path = self.path(key)
+        if path is not None:
+            os.utime(path)
+
+    def delete_if_idle(self, key: str, idle_seconds: float) -> bool:
+        path = self.path(key)
+        if path is None or time.time() - os.path.getmtime(path) < idle_seconds:
+            return False
+        os.remove(path)
+        return True
+
+    def put_text(self, key: str, text: str, overwrite: bool = False) -> bool:
+        return self.put(key, text.encode("utf-8"), overwrite)
+
+    def read_text(self, key: str) -> Optional[str]:
+        data = self.read(key)
+        return data.decode("utf-8") if data is not None else None
+
+
+blob_store = BlobStore(settings.BLOB_STORE_DIR, settings.BLOB_COMPRESS_LEVEL)
@@ -0,0 +1,60 @@
+import re
+from io import BytesIO
+
+from docx import Document
+from docx.oxml.ns import qn
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+
+HEADING_STYLE_PATTERN = re.compile(r'^(?:Heading|标题)\s*(\d)$', re.I)
+
+
+def paragraph_to_markdown(paragraph: Paragraph) -> str:
+    text = paragraph.text.strip()
+    if text == "":
+        return ""
+
+    style_name = paragraph.style.name if paragraph.style is not None else ""
+    if style_name == "Title":
+        return f"# {text}"
+    match = HEADING_STYLE_PATTERN.match(style_name)
+    if match:
+        level = min(int(match.group(1)), 6)
+        return f"{'#' * level} {text}"
+    if style_name.startswith("List"):
+        return f"- {text}"
+    return text
+
+
+def table_to_markdown(table: Table) -> str:
+    rows = []
+    for row in table.rows:
+        cells = [cell.text.strip().replace('\n', '<br>').replace('|', '\\|') for cell in row.cells]
+        rows.append(cells)
+    if not rows:
+        return ""
+
+    width = max(len(cells) for cells in rows)
+    lines = []
+    for i, cells in enumerate(rows):
+        cells = cells + [""] * (width - len(cells))
+        lines.append("| " + " | ".join(cells) + " |")
+        if i == 0:
+            lines.append("|" + " --- |" * width)
+    return "\n".join(lines)
+
+
+def extract_blocks(data: bytes) -> list[str]:
+    """按文档顺序把段落和表格转换为 markdown 块, 在工作进程中执行"""
+    document = Document(BytesIO(data))
+    blocks: list[str] = []
+    for element in document.element.body.iterchildren():
+        if element.tag == qn('w:p'):
+            block = paragraph_to_markdown(Paragraph(element, document))
+        elif element.tag == qn('w:tbl'):
+            block = table_to_markdown(Table(element, document))
+        else:
+            continue
+        if block:
+            blocks.append(block)
+    return blocks
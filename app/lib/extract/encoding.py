@@ -0,0 +1,88 @@
+import codecs
+from typing import Optional
+
+import chardet
+
+# BOM 按长度从长到短匹配, utf-32 的 BOM 以 utf-16 的 BOM 开头
+BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+# 编码探测只采样文件开头的一段, 避免在大文件上全量运行 chardet
+SAMPLE_SIZE = 64 * 1024
+MIN_CONFIDENCE = 0.8
+# chardet 对单字节编码给出的置信度偏低 (latin-1 最高 0.73, 德文约 0.5), 单独使用较低的阈值;
+# 多字节编码的中日韩文本通常在 0.99, 不会落入该区间
+SINGLE_BYTE_MIN_CONFIDENCE = 0.4
+SINGLE_BYTE_PREFIXES = ("iso-8859", "windows-125", "cp125", "koi8", "mac", "ibm", "tis-620")
+
+
+def sniff_bom(content: bytes) -> Optional[str]:
+    for bom, encoding in BOMS:
+        if content.startswith(bom):
+            return encoding
+    return None
+
+
+def try_decode(content: bytes, encoding: str) -> Optional[str]:
+    try:
+        return content.decode(encoding)
+    except (UnicodeDecodeError, LookupError):
+        return None
+
+
+def is_single_byte(encoding: str) -> bool:
+    return encoding.lower().startswith(SINGLE_BYTE_PREFIXES)
+
+
+def detect_sample(content: bytes) -> Optional[str]:
+    """对开头一段字节做编码探测, 置信度不足时返回 None; 单字节编码使用较低的置信度阈值"""
+    result = chardet.detect(content[:SAMPLE_SIZE])
+    encoding = result["encoding"]
+    if encoding is None:
+        return None
+    threshold = SINGLE_BYTE_MIN_CONFIDENCE if is_single_byte(encoding) else MIN_CONFIDENCE
+    if result["confidence"] < threshold:
+        return None
+    return encoding
+
+
+def decode_content(content: bytes) -> str:
+    """分级探测编码: BOM -> 严格 utf-8 -> 采样探测 -> gb18030 -> 全量 chardet -> latin-1
+
+    全量 chardet 在大文件上很慢, 只在采样探测没有可信结果且 gb18030 解码失败时使用
+    """
+    encoding = sniff_bom(content)
+    if encoding is not None:
+        text = try_decode(content, encoding)
+        if text is not None:
+            return text
+
+    # 绝大多数上传文件是 utf-8, 严格解码一次即可确定, 代价远低于编码探测
+    text = try_decode(content, "utf-8")
+    if text is not None:
+        return text
+
+    encoding = detect_sample(content)
+    if encoding is not None:
+        text = try_decode(content, encoding)
+        if text is not None:
+            return text
+
+    # gb18030 覆盖 gb2312/gbk, 是非 utf-8 中文文档最常见的编码
+    text = try_decode(content, "gb18030")
+    if text is not None:
+        return text
+
+    encoding = chardet.detect(content)["encoding"]
+    if encoding is not None:
+        text = try_decode(content, encoding)
+        if text is not None:
+            return text
+
+    # latin-1 可以解码任意字节序列, 作为最终兜底
+    return content.decode("latin-1")
@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+from app.config.config import settings
+from app.lib.extract import pdf_extract, docx_extract
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """进程池在首次使用时创建, 使用 spawn 方式避免 fork 带上服务进程中的线程和数据库连接"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=settings.EXTRACT_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def extract_pdf(data: bytes) -> Iterator[str]:
+    """按页范围把 pdf 分发到进程池中解析, 按页序逐页产出 markdown
+
+    多个任务时先把 pdf 写入临时文件, 只把路径传给工作进程, 各工作进程自行读取文件,
+    不会把整个 pdf 序列化到每个任务中
+    """
+    total = pdf_extract.count_pages(data)
+    pages_per_task = max(settings.EXTRACT_PDF_PAGES_PER_TASK, 1)
+    if total <= pages_per_task:
+        yield from pdf_extract.extract_pages(data, 0, total)
+        return
+
+    fd, path = tempfile.mkstemp(suffix=".pdf", prefix="extract-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        executor = get_executor()
+        futures = [executor.submit(pdf_extract.extract_pages, path, start, start + pages_per_task)
+                   for start in range(0, total, pages_per_task)]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+    finally:
+        os.remove(path)
+
+
+def extract_docx(data: bytes) -> Iterator[str]:
+    yield from get_executor().submit(docx_extract.extract_blocks, data).result()
+
+
+extracts = {
+    ".pdf": extract_pdf,
+    ".docx": extract_docx,
+}
+
+
+def extract_markdown(extension: str, data: bytes) -> Optional[list[str]]:
+    """二进制文档转换为 markdown 片段 (pdf 为逐页, docx 为逐段落/表格), 非二进制文档返回 None"""
+    extract = extracts.get(extension.lower())
+    if extract is None:
+        return None
+    return [segment for segment in extract(data) if segment]
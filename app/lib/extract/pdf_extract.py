@@ -0,0 +1,34 @@
+import re
+from io import BytesIO
+from typing import Union
+
+from pypdf import PdfReader
+
+# 行尾连字符断词, 如 "extrac-\ntion"
+HYPHEN_BREAK_PATTERN = re.compile(r'(\w)-\n(\w)')
+BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+
+
+def _reader(source: Union[str, bytes]) -> PdfReader:
+    """source 为文件路径或 pdf 字节, 工作进程中按路径读取, 避免整个文件随任务序列化"""
+    return PdfReader(BytesIO(source) if isinstance(source, bytes) else source)
+
+
+def count_pages(source: Union[str, bytes]) -> int:
+    return len(_reader(source).pages)
+
+
+def page_to_markdown(text: str) -> str:
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = HYPHEN_BREAK_PATTERN.sub(r'\1\2', text)
+    text = BLANK_LINES_PATTERN.sub('\n\n', text)
+    return text.strip()
+
+
+def extract_pages(source: Union[str, bytes], start: int, end: int) -> list[str]:
+    """提取 [start, end) 范围内页面的文本, 在工作进程中执行, 每个任务只解析自己负责的页"""
+    reader = _reader(source)
+    pages: list[str] = []
+    for i in range(start, min(end, len(reader.pages))):
+        pages.append(page_to_markdown(reader.pages[i].extract_text() or ""))
+    return pages
@@ -29,8 +29,8 @@ def build_deepspeed_path(job_id: str):
     return path.join(machine_run_dir, 'jobs', job_id, "deepspeed.json")
 
 
-def build_dataset_path(dataset_id: str):
-    return path.join(machine_run_dir, 'datasets', dataset_id + ".json")
+def build_dataset_path(file_name: str):
+    return path.join(machine_run_dir, 'datasets', file_name)
 
 
 def build_train_dataset_info_json_path(job_id: str):
@@ -0,0 +1,90 @@
+import re
+from typing import Optional, Hashable
+
+import numpy as np
+import xxhash
+
+# 梅森素数 2^31-1，保证 (a * x + b) 在 uint64 内不溢出
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+
+
+class DedupMode:
+    Off = "off"
+    Report = "report"  # 只检测并记录, 不跳过
+    Skip = "skip"  # 跳过近似重复的分片
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+class MinHashLSH:
+    """基于 MinHash 签名 + LSH 分桶的近似重复检测索引"""
+
+    def __init__(self, num_perm: int = 128, bands: int = 32, shingle_size: int = 5, seed: int = 42):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        generator = np.random.default_rng(seed)
+        self._a = generator.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = generator.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+        self._signatures: dict[Hashable, np.ndarray] = {}
+        self._buckets: list[dict[bytes, set]] = [{} for _ in range(bands)]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._signatures
+
+    def keys(self) -> list:
+        return list(self._signatures.keys())
+
+    def signature(self, text: str) -> np.ndarray:
+        # 字符级 shingle，对中文等无空格分词的语言同样有效
+        text = normalize_text(text)
+        size = self.shingle_size
+        if len(text) <= size:
+            shingles = {text}
+        else:
+            shingles = {text[i:i + size] for i in range(len(text) - size + 1)}
+        hashes = np.fromiter((xxhash.xxh32_intdigest(shingle) for shingle in shingles), dtype=np.uint64,
+                             count=len(shingles))
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> list[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def insert(self, key: Hashable, signature: np.ndarray):
+        if key in self._signatures:
+            self.remove(key)
+        self._signatures[key] = signature
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(band_key, set()).add(key)
+
+    def remove(self, key: Hashable):
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            keys = bucket.get(band_key)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del bucket[band_key]
+
+    def query(self, signature: np.ndarray, threshold: float) -> Optional[tuple[Hashable, float]]:
+        """返回估计 Jaccard 相似度最高且不低于阈值的已有条目 (key, similarity)"""
+        candidates = set()
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(band_key, ()))
+
+        best = None
+        for key in candidates:
+            similarity = float(np.mean(self._signatures[key] == signature))
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        return best
@@ -1,10 +1,37 @@
 import re
 
-def split_long_section(section, max_split_length):
+def hard_split(text, max_split_length, length_function=len):
+    """
+    Split text into fixed-length pieces
+    :param text: Text to split
+    :param max_split_length: Maximum length of each piece, measured by length_function
+    :param length_function: Function measuring text length (characters by default)
+    :return: List of pieces
+    """
+    if length_function is len:
+        return [text[i:i + max_split_length] for i in range(0, len(text), max_split_length)]
+
+    pieces = []
+    while text:
+        total = length_function(text)
+        if total <= max_split_length:
+            pieces.append(text)
+            break
+        # Estimate the cut position from the average characters per length unit, then shrink until it fits
+        end = max(1, int(len(text) * max_split_length / total))
+        while end > 1 and length_function(text[:end]) > max_split_length:
+            end = max(1, int(end * 0.9))
+        pieces.append(text[:end])
+        text = text[end:]
+    return pieces
+
+
+def split_long_section(section, max_split_length, length_function=len):
     """
     Split long paragraphs
     :param section: Paragraph object (dict with 'content' key)
-    :param max_split_length: Maximum split length in characters
+    :param max_split_length: Maximum split length, measured by length_function
+    :param length_function: Function measuring text length (characters by default)
     :return: List of split paragraphs
     """
     content = section['content']
@@ -14,7 +41,7 @@ def split_long_section(section, max_split_length):
 
     for paragraph in paragraphs:
         # If the current paragraph itself exceeds the maximum length, may need further splitting
-        if len(paragraph) > max_split_length:
+        if length_function(paragraph) > max_split_length:
             # If current chunk is not empty, add it to results first
             if len(current_chunk) > 0:
                 result.append(current_chunk)
@@ -26,22 +53,21 @@ def split_long_section(section, max_split_length):
             # Process split sentences
             sentence_chunk = ''
             for sentence in sentence_split:
-                if len(sentence_chunk + sentence) <= max_split_length:
+                if length_function(sentence_chunk + sentence) <= max_split_length:
                     sentence_chunk += sentence
                 else:
                     if len(sentence_chunk) > 0:
                         result.append(sentence_chunk)
                     # If a single sentence exceeds max length, may need further splitting
-                    if len(sentence) > max_split_length:
+                    if length_function(sentence) > max_split_length:
                         # Simply split by fixed length
-                        for i in range(0, len(sentence), max_split_length):
-                            result.append(sentence[i:i + max_split_length])
+                        result.extend(hard_split(sentence, max_split_length, length_function))
                     else:
                         sentence_chunk = sentence
 
             if len(sentence_chunk) > 0:
                 current_chunk = sentence_chunk
-        elif len(current_chunk + '\n\n' + paragraph) <= max_split_length:
+        elif length_function(current_chunk + '\n\n' + paragraph) <= max_split_length:
             # If adding current paragraph doesn't exceed max length, add to current chunk
             current_chunk = current_chunk + '\n\n' + paragraph if current_chunk else paragraph
         else:
@@ -56,13 +82,14 @@ def split_long_section(section, max_split_length):
     return result
 
 
-def process_sections(sections, outline, min_split_length, max_split_length):
+def process_sections(sections, outline, min_split_length, max_split_length, length_function=len):
     """
     Process sections, splitting according to min and max split lengths
     :param sections: List of section dicts
     :param outline: Table of contents outline
-    :param min_split_length: Minimum split length in characters
-    :param max_split_length: Maximum split length in characters
+    :param min_split_length: Minimum split length, measured by length_function
+    :param max_split_length: Maximum split length, measured by length_function
+    :param length_function: Function measuring text length (characters by default)
     :return: List of processed sections
     """
     # Preprocessing: Merge adjacent small sections
@@ -70,14 +97,14 @@ def process_sections(sections, outline, min_split_length, max_split_length):
     current_section = None
 
     for section in sections:
-        content_length = len(section['content'].strip())
+        content_length = length_function(section['content'].strip())
 
         if content_length < min_split_length and current_section:
             # If current section is smaller than min length and there's an accumulated section, try to merge
             merged_content = f"{current_section['content']}\n\n{'#' * section['level']} {section['heading']}\n{section['content']}" if section.get(
                 'heading') else f"{current_section['content']}\n\n{section['content']}"
 
-            if len(merged_content) <= max_split_length:
+            if length_function(merged_content) <= max_split_length:
                 # If merged content doesn't exceed max length, merge
                 current_section['content'] = merged_content
                 if section.get('heading'):
@@ -108,7 +135,7 @@ def process_sections(sections, outline, min_split_length, max_split_length):
 
     for i in range(len(preprocessed_sections)):
         section = preprocessed_sections[i]
-        content_length = len(section['content'].strip())
+        content_length = length_function(section['content'].strip())
 
         # Check if we need to accumulate sections
         if content_length < min_split_length:
@@ -135,13 +162,13 @@ def process_sections(sections, outline, min_split_length, max_split_length):
                     })
 
             # Only process when accumulated content reaches min length
-            accumulated_length = len(accumulated_section['content'].strip())
+            accumulated_length = length_function(accumulated_section['content'].strip())
             if accumulated_length >= min_split_length:
                 summary = generate_enhanced_summary(accumulated_section, outline)
 
                 if accumulated_length > max_split_length:
                     # If accumulated section exceeds max length, split further
-                    sub_sections = split_long_section(accumulated_section, max_split_length)
+                    sub_sections = split_long_section(accumulated_section, max_split_length, length_function)
 
                     for j in range(len(sub_sections)):
                         result.append({
@@ -161,11 +188,11 @@ def process_sections(sections, outline, min_split_length, max_split_length):
         # If we have an accumulated section, process it first
         if accumulated_section:
             summary = generate_enhanced_summary(accumulated_section, outline)
-            accumulated_length = len(accumulated_section['content'].strip())
+            accumulated_length = length_function(accumulated_section['content'].strip())
 
             if accumulated_length > max_split_length:
                 # If accumulated section exceeds max length, split further
-                sub_sections = split_long_section(accumulated_section, max_split_length)
+                sub_sections = split_long_section(accumulated_section, max_split_length, length_function)
 
                 for j in range(len(sub_sections)):
                     result.append({
@@ -186,7 +213,7 @@ def process_sections(sections, outline, min_split_length, max_split_length):
         # Process current section
         # If section length exceeds max split length, split further
         if content_length > max_split_length:
-            sub_sections = split_long_section(section, max_split_length)
+            sub_sections = split_long_section(section, max_split_length, length_function)
 
             # Create standard headings array for current section if needed
             if not section.get('headings') and section.get('heading'):
@@ -225,7 +252,7 @@ def process_sections(sections, outline, min_split_length, max_split_length):
             last_result = result[-1]
             merged_content = f"{last_result['content']}\n\n{accumulated_section['content']}"
 
-            if len(merged_content) <= max_split_length:
+            if length_function(merged_content) <= max_split_length:
                 # If merged content doesn't exceed max length, merge
                 summary = generate_enhanced_summary({
                     **accumulated_section,
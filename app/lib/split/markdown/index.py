@@ -5,6 +5,7 @@ def split_markdown(
         markdown_text: str,
         min_split_length: int,
         max_split_length: int,
+        length_function=len,
 ) -> list:
     # Parse document structure
     outline = parser.extract_outline(markdown_text)
@@ -17,7 +18,8 @@ def split_markdown(
         sections,
         outline,
         min_split_length,
-        max_split_length
+        max_split_length,
+        length_function
     )
 
     # Format results with summaries
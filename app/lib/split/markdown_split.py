@@ -1,10 +1,12 @@
 from app.models.dataset_models.file_model import GetFileItem, FileSplitConfig
 from app.lib.split.common import SplitItem, build_chunk_name
 from app.lib.split.markdown.index import split_markdown
+from app.lib.split.tokenizer import get_length_function
 
 
 def split(file: GetFileItem, config: FileSplitConfig) -> list[SplitItem]:
-    docs = split_markdown(file.content, config.text_split_min_length, config.text_split_max_length)
+    docs = split_markdown(file.content, config.text_split_min_length, config.text_split_max_length,
+                          get_length_function(config))
 
     items: list[SplitItem] = []
     for i, docs in enumerate(docs):
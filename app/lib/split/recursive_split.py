@@ -2,13 +2,15 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from app.models.dataset_models.file_model import GetFileItem, FileSplitConfig
 from app.lib.split.common import SplitItem, build_chunk_name
+from app.lib.split.tokenizer import get_length_function
 
 
 def split(file: GetFileItem, config: FileSplitConfig) -> list[SplitItem]:
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=config.chunk_size,
         chunk_overlap=config.chunk_overlap,
-        separators=config.separators  # 按标题分割
+        separators=config.separators,  # 按标题分割
+        length_function=get_length_function(config),
     )
 
     docs = splitter.create_documents([file.content])
@@ -22,7 +24,6 @@ def split(file: GetFileItem, config: FileSplitConfig) -> list[SplitItem]:
             summary="",
             name=build_chunk_name(file.file_name, i),
             chunk_index=i + 1,
-            file_id=file.file_id,
         )
         items.append(item)
     return items
@@ -0,0 +1,150 @@
+import re
+import threading
+
+import numpy as np
+import xxhash
+from cachetools import LRUCache
+
+from app.config.config import settings
+from app.models.dataset_models.file_model import GetFileItem, FileSplitConfig
+from app.lib.split.common import SplitItem, build_chunk_name
+from app.lib.split.tokenizer import get_length_function
+
+# 句子切分：以中英文句末标点、换行作为句子边界，保留原始空白，保证句子拼接后还原原文
+SENTENCE_PATTERN = re.compile(r'.+?(?:[。！？!?；;]+|\.(?=\s)|\n+|$)\s*', re.S)
+
+_embedding_cache = LRUCache(maxsize=settings.SEMANTIC_SPLIT_CACHE_SIZE)
+_cache_lock = threading.Lock()
+
+
+class SentenceEmbedder:
+    """基于本地 transformers 模型的 CPU 句向量编码器，首次使用时加载模型"""
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self._tokenizer = None
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                from transformers import AutoModel, AutoTokenizer
+
+                self._tokenizer = AutoTokenizer.from_pretrained(self.model_path)
+                model = AutoModel.from_pretrained(self.model_path)
+                model.eval()
+                self._model = model
+
+    def encode(self, sentences: list[str], batch_size: int) -> np.ndarray:
+        """按批编码句子，返回 L2 归一化后的句向量矩阵"""
+        import torch
+
+        if self._model is None:
+            self._load()
+
+        vectors = []
+        with torch.no_grad():
+            for offset in range(0, len(sentences), batch_size):
+                batch = sentences[offset:offset + batch_size]
+                inputs = self._tokenizer(batch, padding=True, truncation=True, max_length=512, return_tensors="pt")
+                hidden = self._model(**inputs).last_hidden_state
+                # mean pooling，忽略 padding 位置
+                mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                vectors.append(pooled.numpy())
+
+        matrix = np.vstack(vectors).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+
+embedder = SentenceEmbedder(settings.SEMANTIC_SPLIT_MODEL_PATH)
+
+
+def split_sentences(text: str) -> list[str]:
+    sentences: list[str] = []
+    for match in SENTENCE_PATTERN.finditer(text):
+        sentence = match.group(0)
+        # 纯空白片段并入上一句
+        if sentences and sentence.strip() == "":
+            sentences[-1] += sentence
+        else:
+            sentences.append(sentence)
+    return sentences
+
+
+def embed_sentences(sentences: list[str], batch_size: int) -> np.ndarray:
+    """句向量编码，命中缓存的句子不再重复计算，同一文本内重复的句子只编码一次"""
+    keys = [xxhash.xxh3_64_intdigest(sentence.strip()) for sentence in sentences]
+    vectors: list = [None] * len(sentences)
+    missing: dict[int, list[int]] = {}
+
+    with _cache_lock:
+        for i, key in enumerate(keys):
+            vector = _embedding_cache.get(key)
+            if vector is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                vectors[i] = vector
+
+    if missing:
+        texts = [sentences[indexes[0]].strip() for indexes in missing.values()]
+        encoded = embedder.encode(texts, batch_size)
+        with _cache_lock:
+            for (key, indexes), vector in zip(missing.items(), encoded):
+                _embedding_cache[key] = vector
+                for i in indexes:
+                    vectors[i] = vector
+
+    return np.vstack(vectors)
+
+
+def find_breakpoints(embeddings: np.ndarray, percentile: float) -> set[int]:
+    """相邻句子的余弦距离超过分位阈值的位置即为话题切换点，返回新分块起始句的下标"""
+    if len(embeddings) < 2:
+        return set()
+    similarities = np.einsum('ij,ij->i', embeddings[:-1], embeddings[1:])
+    distances = 1.0 - similarities
+    threshold = np.percentile(distances, percentile)
+    return set((np.flatnonzero(distances > threshold) + 1).tolist())
+
+
+def split(file: GetFileItem, config: FileSplitConfig) -> list[SplitItem]:
+    sentences = split_sentences(file.content)
+    if not sentences:
+        return []
+
+    embeddings = embed_sentences(sentences, max(config.semantic_batch_size, 1))
+    breakpoints = find_breakpoints(embeddings, config.semantic_breakpoint_percentile)
+
+    # 在话题切换点断开，同时保证单个分块不超过 chunk_size
+    length_function = get_length_function(config)
+    chunks: list[str] = []
+    current = ""
+    current_length = 0
+    for i, sentence in enumerate(sentences):
+        sentence_length = length_function(sentence)
+        if current and (i in breakpoints or current_length + sentence_length > config.chunk_size):
+            chunks.append(current)
+            current = ""
+            current_length = 0
+        current += sentence
+        current_length += sentence_length
+    if current:
+        chunks.append(current)
+
+    items: list[SplitItem] = []
+    for chunk in chunks:
+        content = chunk.strip()
+        if content == "":
+            continue
+        index = len(items)
+        items.append(SplitItem(
+            size=len(content),
+            content=content,
+            summary="",
+            name=build_chunk_name(file.file_name, index),
+            chunk_index=index + 1,
+        ))
+    return items
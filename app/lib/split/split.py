@@ -1,5 +1,5 @@
 from app.models.dataset_models.file_model import FileSplitConfig, GetFileItem
-from app.lib.split import code_split, token_split, markdown_split, recursive_split, text_split
+from app.lib.split import code_split, token_split, markdown_split, recursive_split, text_split, semantic_split
 from app.lib.split.common import SplitItem
 
 splits = {
@@ -7,7 +7,8 @@ splits = {
     "text": text_split.split,
     "markdown": markdown_split.split,
     "recursive": recursive_split.split,
-    "code": code_split.split
+    "code": code_split.split,
+    "semantic": semantic_split.split,
 }
 
 
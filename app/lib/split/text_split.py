@@ -2,6 +2,7 @@ from langchain_text_splitters import CharacterTextSplitter
 
 from app.models.dataset_models.file_model import GetFileItem, FileSplitConfig
 from app.lib.split.common import SplitItem, build_chunk_name
+from app.lib.split.tokenizer import get_length_function
 
 
 def split(file: GetFileItem, config: FileSplitConfig) -> list[SplitItem]:
@@ -10,7 +11,7 @@ def split(file: GetFileItem, config: FileSplitConfig) -> list[SplitItem]:
         separator=config.separator,  # 使用句号作为分隔符
         chunk_size=config.chunk_size,
         chunk_overlap=config.chunk_overlap,
-        length_function=len,
+        length_function=get_length_function(config),
     )
 
     # 分割文本
@@ -24,7 +25,6 @@ def split(file: GetFileItem, config: FileSplitConfig) -> list[SplitItem]:
             summary="",
             name=build_chunk_name(file.file_name, i),
             chunk_index=i + 1,
-            file_id=file.file_id,
         )
         items.append(item)
     return items
\ No newline at end of file
@@ -1,17 +1,20 @@
-from langchain_text_splitters import TokenTextSplitter
+from langchain_text_splitters.base import Tokenizer, split_text_on_tokens
 
 from app.models.dataset_models.file_model import FileSplitConfig, GetFileItem
 from app.lib.split.common import SplitItem, build_chunk_name
+from app.lib.split.tokenizer import get_tokenizer
 
 
 def split(file: GetFileItem, config: FileSplitConfig) -> list[SplitItem]:
-    # 初始化分割器
-    text_splitter = TokenTextSplitter(
-        chunk_size=config.chunk_size,  # 每个块的最大token数
-        chunk_overlap=config.chunk_overlap  # 块之间的重叠token数
-    )
+    # 复用进程级缓存的分词器，避免每次分割都重新构建
+    tokenizer = get_tokenizer(config.tokenizer)
 
-    texts = text_splitter.split_text(file.content)
+    texts = split_text_on_tokens(text=file.content, tokenizer=Tokenizer(
+        chunk_overlap=config.chunk_overlap,  # 块之间的重叠token数
+        tokens_per_chunk=config.chunk_size,  # 每个块的最大token数
+        decode=tokenizer.decode,
+        encode=tokenizer.encode,
+    ))
     items: list[SplitItem] = []
     for i, chunk in enumerate(texts):
         item = SplitItem(
@@ -20,7 +23,6 @@ def split(file: GetFileItem, config: FileSplitConfig) -> list[SplitItem]:
             summary="",
             name=build_chunk_name(file.file_name, i),
             chunk_index=i+1,
-            file_id=file.file_id,
         )
         items.append(item)
     return items
@@ -0,0 +1,51 @@
+from functools import lru_cache
+from typing import Callable
+
+from app.models.dataset_models.file_model import FileSplitConfig
+
+
+class LengthUnit:
+    Chars = "chars"
+    Tokens = "tokens"
+
+
+class CachedTokenizer:
+    """统一 tiktoken 编码与本地 huggingface 分词器的编码接口，实例按名称进程级缓存"""
+
+    def __init__(self, name: str):
+        self.name = name
+        try:
+            import tiktoken
+
+            encoding = tiktoken.get_encoding(name)
+            # 文本中出现的特殊 token 按普通文本处理，避免切分时抛异常
+            self._encode = lambda text: encoding.encode(text, disallowed_special=())
+            self._decode = encoding.decode
+        except ValueError:
+            # 非 tiktoken 编码名时，按本地 huggingface 分词器加载，与微调模型的 token 计数保持一致
+            from transformers import AutoTokenizer
+
+            tokenizer = AutoTokenizer.from_pretrained(name)
+            self._encode = lambda text: tokenizer.encode(text, add_special_tokens=False)
+            self._decode = tokenizer.decode
+
+    def encode(self, text: str) -> list[int]:
+        return self._encode(text)
+
+    def decode(self, ids: list[int]) -> str:
+        return self._decode(ids)
+
+    def count(self, text: str) -> int:
+        return len(self._encode(text))
+
+
+@lru_cache(maxsize=16)
+def get_tokenizer(name: str) -> CachedTokenizer:
+    return CachedTokenizer(name)
+
+
+def get_length_function(config: FileSplitConfig) -> Callable[[str], int]:
+    """根据分割配置返回长度计算函数，tokens 模式下按 token 数计算"""
+    if config.length_unit == LengthUnit.Tokens:
+        return get_tokenizer(config.tokenizer).count
+    return len
@@ -12,13 +12,14 @@ from app.api.dataset_api import project_api, file_api, ga_pair_api, tag_api, fil
     job_api, catalog_api, dataset_version_api
 from app.api.llamafactory_api import finetune_config_api, finetune_job_api, \
     release_api
-from app.api.common_api import machine_api, llm_api
+from app.api.common_api import machine_api, llm_api, system_api
 from app.api.deploy_api import deploy_cluster_api
 from app.api.evaluation_api import evaluation_api
 from app.api.evaluation_api import evaluation_dataset_api
 from app.api.middleware.middleware import i18n_middleware
 from app.api.middleware.middleware import wrap_response_middleware
 from app.db.init import init_db
+from app.services.dataset_services.compaction_service import start_compaction
 from app.services.dataset_services.jobs.manager import start_job_manager
 from app.services.llamafactory_services.finetune_job_service import watch_starting_jobs
 
@@ -38,6 +39,8 @@ thread.start()
 job_thread = threading.Thread(target=asyncio.run, args=(watch_starting_jobs(),))
 job_thread.start()
 
+start_compaction()
+
 
 def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
@@ -133,6 +136,7 @@ app.include_router(job_api.router, prefix="/v1")
 app.include_router(catalog_api.router, prefix="/v1")
 app.include_router(machine_api.router, prefix="/v1")
 app.include_router(llm_api.router, prefix="/v1")
+app.include_router(system_api.router, prefix="/v1")
 app.include_router(dataset_version_api.router, prefix="/v1")
 app.include_router(finetune_config_api.router, prefix="/v1")
 app.include_router(finetune_job_api.router, prefix="/v1")
@@ -30,7 +30,8 @@ class DatasetItem(BaseModel):
 
 class DatasetList(BaseModel):
     data: list[DatasetItem] = Field(..., description="文件分片列表")
-    count: int = Field(..., description="总数")
+    count: Optional[int] = Field(None, description="总数")
+    next_cursor: Optional[str] = Field(None, description="下一页游标, 为空表示没有更多数据")
 
 
 class DatasetUpdate(BaseModel):
@@ -13,6 +13,14 @@ class DatasetType(str, enum.Enum):
     KahnemanTaverskyOptimization = "KTO"
 
 
+class ExportFormat(str, enum.Enum):
+    JSONL = "jsonl"  # alpaca, 每行一条
+    JSON = "json"  # alpaca, JSON 数组
+    ShareGPT = "sharegpt"  # sharegpt 对话, 每行一条
+    Parquet = "parquet"
+    Arrow = "arrow"
+
+
 class DatasetVersionItem(BaseModel):
     id: str
 
@@ -20,6 +28,10 @@ class DatasetVersionItem(BaseModel):
     description: str = Field(..., description="版本描述")
     dataset_type: DatasetType = Field(..., description="数据集类型")
     options: dict = Field(..., description="版本配置")
+    export_format: str = Field(ExportFormat.JSONL, description="导出格式")
+    status: str = Field("Success", description="导出状态: Running/Success/Failed")
+    job_id: str = Field("", description="导出任务id")
+    artifact_hash: str = Field("", description="版本文件内容哈希 (xxh3_128)")
 
     created_at: int = Field(..., description="创建时间")
     updated_at: int = Field(..., description="更新时间")
@@ -37,8 +49,17 @@ class DatasetVersionCreate(BaseModel):
     project_id: str = Field(..., description="项目id")
     dataset_id_list: list[str] = Field(..., description="数据集列表")
     dataset_type: DatasetType = Field(..., description="数据集类型")
+    export_format: ExportFormat = Field(ExportFormat.JSONL, description="导出格式: jsonl/json/sharegpt/parquet/arrow")
+
+    options: dict = Field({}, description="版本配置")
 
+
+class DatasetVersionExportContent(BaseModel):
+    dataset_version_id: str = Field(..., description="版本id")
+    project_id: str = Field(..., description="项目id")
+    dataset_id_list: list[str] = Field(..., description="数据集列表")
     options: dict = Field({}, description="版本配置")
+    export_format: ExportFormat = Field(ExportFormat.JSONL, description="导出格式")
 
 
 class DatasetVersionUpdate(BaseModel):
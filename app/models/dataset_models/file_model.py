@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -25,7 +25,8 @@ class FileItem(BaseModel):
 
 class FileList(BaseModel):
     data: list[FileItem]
-    count: int
+    count: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class GetFileItem(BaseModel):
@@ -52,6 +53,14 @@ class FileSplitConfig(BaseModel):
     separators: List[str] = Field(['|', '##', '>', '-'], description="分隔符列表")
     split_language: str = Field("js", description="默认分割语言")
     split_type: str = Field("", description="分割类型")
+    length_unit: str = Field("chars", description="长度计量单位. chars=字符, tokens=token")
+    tokenizer: str = Field("gpt2", description="token 计数使用的分词器 (与原 TokenTextSplitter 默认一致), tiktoken 编码名或本地 huggingface 分词器路径")
+    # 语义分割的参数
+    semantic_batch_size: int = Field(32, description="语义分割句向量编码的批大小")
+    semantic_breakpoint_percentile: float = Field(90, description="语义分割断点分位数, 相邻句子距离超过该分位即断开")
+    # 分片去重的参数
+    dedup_mode: str = Field("off", description="近似重复分片处理方式. off=关闭, report=仅记录, skip=跳过")
+    dedup_threshold: float = Field(0.9, description="近似重复判定的相似度阈值(估计 Jaccard 相似度)")
     # 领域树的参数
     toc_build_action: str = Field("Rebuild", description="领域构建行为. Keep=保持, Rebuild=重新构建, Revise=修订")
 
@@ -61,10 +70,18 @@ class FileDeleteConfig(BaseModel):
 
 
 class FileDeleteGeneratorContent(BaseModel):
-    file: GetFileItem = Field(None, description="文件内容")
+    # 只记录文件 id, 正文由删除任务执行时读取, 不写入任务记录
+    file_id: str = Field(..., description="被删除的文件id")
+    file_name: str = Field("", description="文件名")
     config: FileDeleteConfig
 
 
+class FileMarkdownCleanupContent(BaseModel):
+    # 上传时提取的 pdf/docx 正文由后台任务调用大模型整理后回写 blob
+    file_id: str = Field(..., description="需要整理的文件id")
+    file_name: str = Field("", description="文件名")
+
+
 class FilePairGeneratorContent(BaseModel):
     file_ids: list[str] = Field(default_factory=list)
     config: FileSplitConfig
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -5,7 +7,7 @@ class FilePairItem(BaseModel):
     id: str
 
     size: int = Field(..., description="文件大小")
-    content: str = Field(..., description="文件内容")
+    content: Optional[str] = Field(None, description="文件内容, 列表中作为关联信息返回时不包含")
     summary: str = Field(..., description="文件摘要")
     name: str = Field(..., description="文件名")
     chunk_index: int = Field(..., description="文件分片索引")
@@ -19,7 +21,8 @@ class FilePairItem(BaseModel):
 
 class FilePairList(BaseModel):
     data: list[FilePairItem] = Field(..., description="文件分片列表")
-    count: int = Field(..., description="总数")
+    count: Optional[int] = Field(None, description="总数")
+    next_cursor: Optional[str] = Field(None, description="下一页游标, 为空表示没有更多数据")
 
 
 class FilePairUpdate(BaseModel):
@@ -19,6 +19,9 @@ class JobType(str, Enum):
     TagGenerator = "TagGenerator"
     QuestionGenerator = "QuestionGenerator"
     DatasetGenerator = "DatasetGenerator"
+    ProjectDeleteGenerator = "ProjectDeleteGenerator"
+    DatasetVersionExport = "DatasetVersionExport"
+    FileMarkdownCleanup = "FileMarkdownCleanup"
 
 
 class Progress(BaseModel):
@@ -61,4 +64,5 @@ class JobItem(BaseModel):
 
 class JobList(BaseModel):
     data: list[JobItem] = Field(..., description="任务列表")
-    count: int = Field(..., description="总数")
+    count: Optional[int] = Field(None, description="总数")
+    next_cursor: Optional[str] = Field(None, description="下一页游标, 为空表示没有更多数据")
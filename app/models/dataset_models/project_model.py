@@ -22,6 +22,14 @@ class ProjectCreate(BaseModel):
     name: str = Field(..., description="项目名称")
 
 
+class ProjectDeleteResult(ProjectItem):
+    job_id: str = Field(..., description="后台级联删除任务id")
+
+
+class ProjectDeleteGeneratorContent(BaseModel):
+    project_id: str = Field(..., description="被删除的项目id")
+
+
 class ProjectUpdate(BaseModel):
     id: Optional[str] = Field(None)
     name: str = Field(..., description="项目名称")
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -25,7 +25,8 @@ class QuestionItem(BaseModel):
 
 class QuestionList(BaseModel):
     data: list[QuestionItem] = Field(..., description="文件分片列表")
-    count: int = Field(..., description="总数")
+    count: Optional[int] = Field(None, description="总数")
+    next_cursor: Optional[str] = Field(None, description="下一页游标, 为空表示没有更多数据")
 
 
 class QuestionSave(BaseModel):
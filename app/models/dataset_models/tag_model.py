@@ -12,11 +12,17 @@ class TagItem(BaseModel):
     childes: Optional[list] = Field(None, description="子标签列表")
 
     question_id_list: List[str] = Field(None, description="问题列表")
+    question_count: int = Field(0, description="问题总数")
 
     created_at: int = Field(..., description="创建时间")
     updated_at: int = Field(..., description="更新时间")
 
 
+class TagQuestionIdPage(BaseModel):
+    data: List[str] = Field(..., description="问题id列表")
+    next_cursor: Optional[str] = Field(None, description="下一页游标, 为空表示没有更多数据")
+
+
 class TagCreate(BaseModel):
     label: str = Field(..., description="标签名称")
     parent_id: str = Field(..., description="标签父id")
@@ -75,5 +75,6 @@ class FinetuneJobRunningExample(BaseModel):
     train_yaml: str = Field(..., description="微调配置文件内容")
     deepspeed_json: str = Field(..., description="deepspeed配置")
     dataset_path: str = Field(..., description="数据集位置")
+    dataset_info_json: str = Field(..., description="LlamaFactory dataset_info.json 内容")
 
     markdown: str = Field(..., description="展示markdown")
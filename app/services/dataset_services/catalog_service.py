@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 
 from app.db.dataset_db_model import catalog_db
 from app.db.dataset_db_model.catalog_db import CatalogORM
+from app.db.routing import read_only
 from app.lib.split.markdown.cores import toc
 from app.models.user_model import User
 
@@ -17,6 +18,7 @@ def catalog_to_toc(catalog: list[CatalogORM]) -> str:
     return result
 
 
+@read_only
 def get_catalog(session: Session, current_user: User, project_id: str) -> str:
     all_catalog = catalog_db.list(session, current_user, project_id)
     return catalog_to_toc(all_catalog)
@@ -1,18 +1,30 @@
+from typing import Optional, Dict, Iterable
+
+from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
-from app.db.dataset_db_model import question_db, dataset_db
+from app.db.dataset_db_model import question_db, ga_pair_db
+from app.db.pagination import CursorKey, decode_cursor
+from app.lib.i18n.config import i18n
+from app.models.dataset_models.ga_pair_model import GAPairOrigin
 from app.models.user_model import User
 
 
+def parse_cursor(cursor: str) -> Optional[CursorKey]:
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=500, detail=i18n.gettext("Invalid cursor: {cursor}").format(cursor=cursor))
+
+
+def load_ga_pair_map(session: Session, current_user: User, ga_pair_ids: Iterable[str]) -> Dict[str, GAPairOrigin]:
+    """一次查询取出本页问题/数据集引用的 GA 对, 已删除的 GA 对同样返回"""
+    ga_pair_ids = {ga_pair_id for ga_pair_id in ga_pair_ids if ga_pair_id}
+    if not ga_pair_ids:
+        return {}
+    ga_pair_map = ga_pair_db.list_ga_pair_to_map(session, current_user, list(ga_pair_ids), include_deleted=True)
+    return {ga_pair_id: GAPairOrigin(**ga_pair.to_dict()) for ga_pair_id, ga_pair in ga_pair_map.items()}
+
+
 def check_and_update_question_has_dataset(session: Session, current_user: User, id: str):
-    question_orm = question_db.get(session, current_user, id)
-    dataset_list_orm, _ = dataset_db.list(session, current_user, 1, 9999, project_id=question_orm.project_id, question_id=question_orm.id)
-
-    if dataset_list_orm and len(dataset_list_orm) > 0:
-        question_db.update(session, current_user, id, {
-            "has_dataset": True
-        })
-    else:
-        question_db.update(session, current_user, id, {
-            "has_dataset": False
-        })
\ No newline at end of file
+    question_db.refresh_has_dataset(session, current_user, [id])
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""
+软删除数据的压缩清理
+
+软删除 (is_deleted 为删除时间戳) 超过保留期的行按批物理删除:
+- archive: 删除前以 JSONL 追加写入 {COMPACTION_ARCHIVE_DIR}/{表名}/{日期}.jsonl.zst, 每批一个 zstd frame;
+  文件行的正文存放在 blob 中, 归档时从 blob 读出写入 content, 之后删除 blob 也能从归档恢复
+- purge: 直接删除
+
+每批在独立事务中完成, 批之间暂停, 单次运行每张表的批数有上限, 避免长事务和持续占用数据库。
+文件行删除后, 不再被任何文件引用的正文 blob 一并删除
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, List
+
+import orjson
+import zstandard
+from sqlalchemy import select, delete, exists
+
+from app.api.middleware.deps import manual_get_db
+from app.config.config import settings
+from app.db.dataset_db_model.catalog_db import CatalogORM
+from app.db.dataset_db_model.dataset_db import DatasetORM
+from app.db.dataset_db_model.file_db import FileORM
+from app.db.dataset_db_model.file_pair_db import FilePairORM
+from app.db.dataset_db_model.ga_pair_db import GAPairORM
+from app.db.dataset_db_model.job_db import JobORM
+from app.db.dataset_db_model.question_db import QuestionORM
+from app.db.dataset_db_model.tag_db import TagORM
+from app.lib.blob.blob_store import blob_store
+
+# 文件放在最后, 其正文 blob 在文件行删除后清理
+COMPACTION_TABLES = [QuestionORM, DatasetORM, FilePairORM, GAPairORM, CatalogORM, TagORM, JobORM, FileORM]
+
+
+def _keep_conditions(orm) -> list:
+    """仍被引用的行即使已过保留期也不清理"""
+    if orm is GAPairORM:
+        # 问题/数据集通过 ga_pair_id 引用 GA 对, 引用它们的行清理后 GA 对才能清理
+        return [~exists().where(QuestionORM.ga_pair_id == GAPairORM.id),
+                ~exists().where(DatasetORM.ga_pair_id == GAPairORM.id)]
+    return []
+
+
+class CompactionMode:
+    Archive = "archive"
+    Purge = "purge"
+
+
+class CompactionMetrics:
+    """每张表的回收行数、归档行数、批次数, 以及运行次数与耗时"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tables: Dict[str, Dict[str, int]] = {}
+        self.blobs_removed = 0
+        self.runs = 0
+        self.last_run_at = 0
+        self.last_run_seconds = 0.0
+        self.last_error = ""
+
+    def record_batch(self, table: str, rows: int, archived: bool):
+        with self._lock:
+            stats = self.tables.setdefault(table, {"reclaimed_rows": 0, "archived_rows": 0, "batches": 0})
+            stats["reclaimed_rows"] += rows
+            stats["batches"] += 1
+            if archived:
+                stats["archived_rows"] += rows
+
+    def record_blobs(self, count: int):
+        with self._lock:
+            self.blobs_removed += count
+
+    def record_run(self, started_at: float, error: str = ""):
+        with self._lock:
+            self.runs += 1
+            self.last_run_at = int(started_at)
+            self.last_run_seconds = round(time.time() - started_at, 3)
+            self.last_error = error
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "tables": {table: dict(stats) for table, stats in self.tables.items()},
+                "blobs_removed": self.blobs_removed,
+                "runs": self.runs,
+                "last_run_at": self.last_run_at,
+                "last_run_seconds": self.last_run_seconds,
+                "last_error": self.last_error,
+            }
+
+
+metrics = CompactionMetrics()
+_run_lock = threading.Lock()
+
+
+def archive_rows(table_name: str, rows: List[dict]):
+    directory = os.path.join(settings.COMPACTION_ARCHIVE_DIR, table_name)
+    os.makedirs(directory, exist_ok=True)
+    data = b"".join(orjson.dumps(row) + b"\n" for row in rows)
+    # 多个 zstd frame 直接拼接仍是合法的 zstd 文件, 解压时按顺序输出
+    with open(os.path.join(directory, time.strftime("%Y%m%d") + ".jsonl.zst"), "ab") as f:
+        f.write(zstandard.ZstdCompressor(level=3).compress(data))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def fill_blob_content(rows: List[dict]):
+    """文件行的 content 为空, 正文在 blob 中, 归档前读出"""
+    for row in rows:
+        if not row.get("content") and row.get("md5"):
+            row["content"] = blob_store.read_text(row["md5"]) or ""
+
+
+def remove_unreferenced_blobs(md5_list: List[str]) -> int:
+    """删除不再被任何文件行 (包括仍在保留期内的软删除行) 引用的 blob, 最近复用过的 blob 跳过"""
+    md5_set = {md5 for md5 in md5_list if md5}
+    if not md5_set:
+        return 0
+    with manual_get_db() as session:
+        referenced = {row[0] for row in session.execute(
+            select(FileORM.md5).where(FileORM.md5.in_(md5_set)).distinct())}
+
+    removed = 0
+    for md5 in md5_set - referenced:
+        if blob_store.delete_if_idle(md5, settings.COMPACTION_BLOB_IDLE_SECONDS):
+            removed += 1
+    return removed
+
+
+def compact_table(orm, cutoff: int, mode: str, batch_size: int, max_batches: int) -> int:
+    table = orm.__table__
+    reclaimed = 0
+    for _ in range(max_batches):
+        with manual_get_db() as session:
+            rows = [dict(row) for row in session.execute(
+                select(table).where(table.c.is_deleted > 0, table.c.is_deleted < cutoff, *_keep_conditions(orm))
+                .limit(batch_size)
+            ).mappings()]
+            if not rows:
+                break
+            # 先归档再删除, 删除失败时下次会重复归档同一批, 不会丢数据
+            if mode == CompactionMode.Archive:
+                if orm is FileORM:
+                    fill_blob_content(rows)
+                archive_rows(table.name, rows)
+            session.execute(delete(table).where(table.c.id.in_([row["id"] for row in rows])))
+            session.commit()
+
+        metrics.record_batch(table.name, len(rows), mode == CompactionMode.Archive)
+        reclaimed += len(rows)
+        if orm is FileORM:
+            metrics.record_blobs(remove_unreferenced_blobs([row["md5"] for row in rows]))
+        if len(rows) < batch_size:
+            break
+        time.sleep(settings.COMPACTION_BATCH_PAUSE_SECONDS)
+    return reclaimed
+
+
+def run_compaction() -> dict:
+    """执行一次压缩清理, 已有清理在运行时直接返回当前统计"""
+    if not _run_lock.acquire(blocking=False):
+        return metrics.snapshot()
+
+    started_at = time.time()
+    error = ""
+    try:
+        cutoff = int(started_at - settings.COMPACTION_RETENTION_DAYS * 86400)
+        for orm in COMPACTION_TABLES:
+            reclaimed = compact_table(orm, cutoff, settings.COMPACTION_MODE, settings.COMPACTION_BATCH_SIZE,
+                                      settings.COMPACTION_MAX_BATCHES)
+            if reclaimed > 0:
+                logging.info(f"Compaction reclaimed {reclaimed} rows from {orm.__tablename__}")
+    except Exception as e:
+        logging.exception("Compaction failed")
+        error = str(e)
+    finally:
+        metrics.record_run(started_at, error)
+        _run_lock.release()
+    return metrics.snapshot()
+
+
+def trigger_compaction() -> bool:
+    """在后台线程中执行一次压缩清理, 已有清理在运行时返回 False"""
+    if _run_lock.locked():
+        return False
+    threading.Thread(target=run_compaction, name="compaction-manual", daemon=True).start()
+    return True
+
+
+def _compaction_loop():
+    while True:
+        time.sleep(settings.COMPACTION_INTERVAL_SECONDS)
+        run_compaction()
+
+
+def start_compaction():
+    if not settings.COMPACTION_ENABLED:
+        return
+    threading.Thread(target=_compaction_loop, name="compaction", daemon=True).start()
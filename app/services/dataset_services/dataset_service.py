@@ -1,22 +1,28 @@
-import json
-import threading
-
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
-from app.api.middleware.deps import manual_get_db
-from app.db.dataset_db_model import dataset_db, file_pair_db, ga_pair_db
+from app.db.dataset_db_model import dataset_db, file_pair_db, ga_pair_db, question_db
+from app.db.pagination import encode_cursor
+from app.db.routing import read_only
 from app.lib.i18n.config import i18n
 from app.models.dataset_models.dataset_model import DatasetList, DatasetItem, DatasetUpdate, BatchDeleteDatasetRequest
-from app.models.dataset_models.ga_pair_model import GAPairOrigin
 from app.models.user_model import User
-from app.services.dataset_services.common_service import check_and_update_question_has_dataset
+from app.services.dataset_services.common_service import check_and_update_question_has_dataset, parse_cursor, \
+    load_ga_pair_map
 from app.services.dataset_services.file_pair_service import db_file_pair_to_item
 
 
+@read_only
 def list_datasets(session: Session, current_user: User, page_no: int, page_size: int, project_id: str,
-                  content: str = None, confirmed: str = None, ids: list[str] = None) -> DatasetList:
-    dataset_list, total = dataset_db.list(session, current_user, page_no, page_size, project_id, content, confirmed, ids=ids)
+                  content: str = None, confirmed: str = None, ids: list[str] = None, cursor: str = None,
+                  with_count: bool = True) -> DatasetList:
+    next_cursor = None
+    if cursor is None:
+        dataset_list, total = dataset_db.list(session, current_user, page_no, page_size, project_id, content, confirmed, ids=ids)
+    else:
+        dataset_list, next_after, total = dataset_db.list_by_cursor(
+            session, current_user, page_size, parse_cursor(cursor), with_count, project_id, content, confirmed, ids=ids)
+        next_cursor = encode_cursor(next_after)
 
     file_pair_id_list = []
     for dataset_orm in dataset_list:
@@ -24,6 +30,7 @@ def list_datasets(session: Session, current_user: User, page_no: int, page_size:
 
     file_pair_map = file_pair_db.list_file_pair_to_map(session, current_user, file_pair_id_list)
 
+    ga_pair_map = load_ga_pair_map(session, current_user, [dataset_orm.ga_pair_id for dataset_orm in dataset_list])
     items: list[DatasetItem] = []
     for dataset_orm in dataset_list:
         dataset = DatasetItem(
@@ -47,12 +54,12 @@ def list_datasets(session: Session, current_user: User, page_no: int, page_size:
         if file_pair:
             dataset.file_pair_item = db_file_pair_to_item(file_pair)
 
-        if dataset_orm.ga_pair and dataset_orm.ga_pair != "":
-            dataset.ga_pair_item = GAPairOrigin(**json.loads(dataset_orm.ga_pair))
+        if dataset_orm.ga_pair_id:
+            dataset.ga_pair_item = ga_pair_map.get(dataset_orm.ga_pair_id)
 
         items.append(dataset)
 
-    return DatasetList(count=total, data=items)
+    return DatasetList(count=total, data=items, next_cursor=next_cursor)
 
 
 def delete_dataset(session: Session, current_user: User, id: str) -> DatasetItem:
@@ -65,23 +72,12 @@ def delete_dataset(session: Session, current_user: User, id: str) -> DatasetItem
 
 
 def batch_delete_dataset(session: Session, current_user: User, req: BatchDeleteDatasetRequest):
-    dataset_list_orm = dataset_db.list(session, current_user, 1, len(req.dataset_ids), project_id=req.project_id,
-                                       ids=req.dataset_ids)
+    dataset_list_orm, _ = dataset_db.list(session, current_user, 1, len(req.dataset_ids), project_id=req.project_id,
+                                          ids=req.dataset_ids)
     if dataset_list_orm and len(dataset_list_orm) > 0:
         dataset_db.bulk_delete_datasets(session, current_user, req.dataset_ids)
-
-        def async_delete_task():
-            try:
-                with manual_get_db() as session:
-                    for dataset_orm in dataset_list_orm:
-                        check_and_update_question_has_dataset(session, User(
-                            id=dataset_orm.user_id,
-                            group_id=dataset_orm.group_id
-                        ), dataset_orm.question_id)
-            except Exception as e:
-                print(f"异步删除数据集出错: {e}")
-
-        threading.Thread(target=async_delete_task, daemon=True).start()
+        question_db.refresh_has_dataset(session, current_user,
+                                        [dataset_orm.question_id for dataset_orm in dataset_list_orm])
 
 
 def update_dataset(session: Session, current_user: User, id: str, dataset_update: DatasetUpdate) -> DatasetItem:
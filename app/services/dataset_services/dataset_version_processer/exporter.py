@@ -0,0 +1,198 @@
+"""
+数据集版本文件导出
+
+按 id 分批只查询导出需要的列, 通过服务端游标逐批读取, 按导出格式追加写入同一个临时文件,
+全部写完后 os.replace 原子替换为版本文件, 导出中途失败不会留下不完整的版本文件
+
+版本文件按内容寻址存放在 {DATASET_VERSION_DIR}/artifacts/{xxh3_128}{扩展名}, 旁边的 .manifest.json 记录
+哈希、格式、大小、行数与数据集选择的指纹。内容相同的版本共用同一个文件, 训练节点上按文件名跳过已上传的文件
+
+发布文件、登记引用 (claim_artifact) 与按引用数删除文件 (remove_artifact_if_unused) 在 artifacts/.lock 文件锁内进行,
+登记引用前确认文件仍然存在, 删除前的引用计数能看到已登记的引用, 复用文件时不会与并发的删除交错
+"""
+import fcntl
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+import orjson
+import xxhash
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from app.config.config import settings
+from app.db.dataset_db_model import dataset_version_db
+from app.db.dataset_db_model.dataset_db import DatasetORM
+from app.models.dataset_models.dataset_version_model import ExportFormat
+from app.models.user_model import User
+from app.services.dataset_services.dataset_version_processer.formats import get_export_format
+
+# 每条查询的 id 数量 (IN 列表长度), 以及服务端游标每次取回的行数
+EXPORT_ID_BATCH_SIZE = 1000
+EXPORT_YIELD_PER = 500
+ARTIFACT_DIR = "artifacts"
+HASH_ALGORITHM = "xxh3_128"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def dataset_version_file_name(id: str, export_format: str = ExportFormat.JSONL, artifact_hash: str = "") -> str:
+    # 早期版本没有内容哈希, 文件以版本 id 命名
+    return (artifact_hash or id) + get_export_format(export_format).extension
+
+
+def dataset_version_file_path_builder(id: str, export_format: str = ExportFormat.JSONL, artifact_hash: str = ""):
+    file_name = dataset_version_file_name(id, export_format, artifact_hash)
+    if artifact_hash:
+        return os.path.join(settings.DATASET_VERSION_DIR, ARTIFACT_DIR, file_name)
+    return os.path.join(settings.DATASET_VERSION_DIR, file_name)
+
+
+def manifest_path_builder(artifact_hash: str) -> str:
+    return os.path.join(settings.DATASET_VERSION_DIR, ARTIFACT_DIR, artifact_hash + ".manifest.json")
+
+
+@contextmanager
+def artifact_lock():
+    """版本文件在本机磁盘上, 使用文件锁在多个进程之间互斥"""
+    directory = os.path.join(settings.DATASET_VERSION_DIR, ARTIFACT_DIR)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ".lock"), "a") as file:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+def _dataset_conditions(current_user: User, project_id: str, batch_ids: List[str]) -> list:
+    return [DatasetORM.id.in_(batch_ids),
+            DatasetORM.project_id == project_id,
+            DatasetORM.group_id == current_user.group_id,
+            DatasetORM.is_deleted == 0]
+
+
+def selection_fingerprint(session: Session, current_user: User, project_id: str, dataset_ids: List[str],
+                          options: dict, export_format: str) -> str:
+    """数据集选择的指纹: 导出配置 + 排序后的 id + 每批的行数与最大更新时间, 数据集被修改或删除后指纹随之变化"""
+    ids = sorted(set(dataset_ids))
+    hasher = xxhash.xxh3_128()
+    hasher.update(orjson.dumps({"export_format": export_format, "options": options}, option=orjson.OPT_SORT_KEYS))
+    for offset in range(0, len(ids), EXPORT_ID_BATCH_SIZE):
+        batch_ids = ids[offset:offset + EXPORT_ID_BATCH_SIZE]
+        count, updated_at = session.execute(
+            select(func.count(DatasetORM.id), func.max(DatasetORM.updated_at))
+            .where(*_dataset_conditions(current_user, project_id, batch_ids))).one()
+        hasher.update(orjson.dumps([batch_ids, count, updated_at or 0]))
+    return hasher.hexdigest()
+
+
+def read_manifest(artifact_hash: str) -> Optional[dict]:
+    """版本文件与 manifest 都存在时返回 manifest"""
+    try:
+        with open(manifest_path_builder(artifact_hash), "rb") as file:
+            manifest = orjson.loads(file.read())
+    except FileNotFoundError:
+        return None
+    path = dataset_version_file_path_builder("", manifest["export_format"], artifact_hash)
+    return manifest if os.path.exists(path) else None
+
+
+def _hash_and_fsync(path: str) -> str:
+    # 列式格式的 writer 关闭时可能一并关闭文件, 重新打开后计算哈希并落盘
+    hasher = xxhash.xxh3_128()
+    with open(path, "rb+") as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+        os.fsync(file.fileno())
+    return hasher.hexdigest()
+
+
+def _write_manifest(manifest: dict):
+    path = manifest_path_builder(manifest["artifact_hash"])
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def export_dataset_version(session: Session, current_user: User, project_id: str, dataset_ids: List[str],
+                           options: dict, export_format: str = ExportFormat.JSONL, fingerprint: str = "",
+                           on_progress: Optional[Callable[[int], None]] = None) -> dict:
+    """导出版本文件并返回 manifest; 内容与已有文件相同时丢弃本次导出, 复用已有文件
+    on_progress 在每批 id 处理完后以已处理的 id 数量回调"""
+    # 按 id 排序导出, 相同的数据集选择得到相同的文件内容
+    ids = sorted(set(dataset_ids))
+    spec = get_export_format(export_format)
+    directory = os.path.join(settings.DATASET_VERSION_DIR, ARTIFACT_DIR)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f"{uuid.uuid4().hex}.tmp")
+
+    count = 0
+    try:
+        with open(tmp_path, "wb") as file:
+            writer = spec.writer(file)
+            for offset in range(0, len(ids), EXPORT_ID_BATCH_SIZE):
+                batch_ids = ids[offset:offset + EXPORT_ID_BATCH_SIZE]
+                result = session.execute(
+                    select(DatasetORM.question, DatasetORM.answer, DatasetORM.cot)
+                    .where(*_dataset_conditions(current_user, project_id, batch_ids))
+                    .order_by(DatasetORM.id)
+                    .execution_options(yield_per=EXPORT_YIELD_PER))
+                for rows in result.partitions():
+                    writer.write([spec.build_row(row.question, row.answer, row.cot, options) for row in rows])
+                    count += len(rows)
+                if on_progress is not None:
+                    on_progress(offset + len(batch_ids))
+            writer.close()
+        artifact_hash = _hash_and_fsync(tmp_path)
+
+        with artifact_lock():
+            manifest = read_manifest(artifact_hash)
+            if manifest is not None:
+                os.remove(tmp_path)
+                return manifest
+
+            path = dataset_version_file_path_builder("", export_format, artifact_hash)
+            manifest = {
+                "artifact_hash": artifact_hash,
+                "hash_algorithm": HASH_ALGORITHM,
+                "file_name": os.path.basename(path),
+                "export_format": ExportFormat(export_format).value,
+                "size": os.path.getsize(tmp_path),
+                "rows": count,
+                "selection_fingerprint": fingerprint,
+                "created_at": int(time.time()),
+            }
+            os.replace(tmp_path, path)
+            _write_manifest(manifest)
+        return manifest
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def claim_artifact(session: Session, current_user: User, dataset_version_id: str, artifact_hash: str,
+                   fingerprint: str) -> bool:
+    """确认版本文件仍然存在并在版本上登记引用; 文件已被并发删除时返回 False, 由调用方重新导出"""
+    with artifact_lock():
+        if read_manifest(artifact_hash) is None:
+            return False
+        dataset_version_db.update(session, current_user, dataset_version_id,
+                                  {"artifact_hash": artifact_hash, "fingerprint": fingerprint})
+        return True
+
+
+def remove_artifact_if_unused(session: Session, artifact_hash: str, export_format: str):
+    """没有未删除的版本引用时删除版本文件及其 manifest"""
+    with artifact_lock():
+        if dataset_version_db.count_by_artifact_hash(session, artifact_hash) > 0:
+            return
+        for path in [dataset_version_file_path_builder("", export_format, artifact_hash),
+                     manifest_path_builder(artifact_hash)]:
+            if os.path.exists(path):
+                os.remove(path)
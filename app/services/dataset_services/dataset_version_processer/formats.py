@@ -0,0 +1,131 @@
+"""
+数据集版本的导出格式
+
+- jsonl: alpaca 格式, 每行一条
+- json: alpaca 格式的 JSON 数组, 逐批流式写入
+- sharegpt: sharegpt 对话格式, 每行一条
+- parquet / arrow: alpaca 格式的列式文件, 按批写入 row group / record batch, 训练节点加载更快
+
+每种格式对应 LlamaFactory dataset_info.json 中的一条数据集配置
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, List
+
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.models.dataset_models.dataset_version_model import ExportFormat
+from app.services.dataset_services.dataset_version_processer.sft_processor import build_sft_row, \
+    build_sharegpt_row
+
+ALPACA_SCHEMA = pa.schema([("instruction", pa.string()), ("input", pa.string()), ("output", pa.string())])
+ALPACA_INFO = {
+    "formatting": "alpaca",
+    "columns": {"prompt": "instruction", "query": "input", "response": "output"},
+}
+SHAREGPT_INFO = {
+    "formatting": "sharegpt",
+    "columns": {"messages": "conversations"},
+    "tags": {"role_tag": "from", "content_tag": "value", "user_tag": "human", "assistant_tag": "gpt"},
+}
+# parquet 每个 row group 的行数
+PARQUET_ROW_GROUP_SIZE = 10000
+
+
+class FormatWriter(ABC):
+    def __init__(self, file: BinaryIO):
+        self.file = file
+
+    @abstractmethod
+    def write(self, rows: List[dict]):
+        pass
+
+    def close(self):
+        pass
+
+
+class JsonlWriter(FormatWriter):
+    def write(self, rows: List[dict]):
+        self.file.write(b"".join(orjson.dumps(row) + b"\n" for row in rows))
+
+
+class JsonArrayWriter(FormatWriter):
+    def __init__(self, file: BinaryIO):
+        super().__init__(file)
+        self._empty = True
+        self.file.write(b"[")
+
+    def write(self, rows: List[dict]):
+        if not rows:
+            return
+        data = b",\n".join(orjson.dumps(row) for row in rows)
+        self.file.write(b"\n" + data if self._empty else b",\n" + data)
+        self._empty = False
+
+    def close(self):
+        self.file.write(b"]\n" if self._empty else b"\n]\n")
+
+
+class ParquetWriter(FormatWriter):
+    def __init__(self, file: BinaryIO):
+        super().__init__(file)
+        self._writer = pq.ParquetWriter(file, ALPACA_SCHEMA, compression="zstd")
+        self._pending: List[dict] = []
+
+    def write(self, rows: List[dict]):
+        # 游标每批行数较少, 攒够一个 row group 再写, 避免产生大量小 row group
+        self._pending.extend(rows)
+        if len(self._pending) >= PARQUET_ROW_GROUP_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self._writer.write_table(pa.Table.from_pylist(self._pending, schema=ALPACA_SCHEMA))
+            self._pending = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+class ArrowWriter(FormatWriter):
+    """Arrow IPC stream 格式, 即 datasets 的 arrow 加载器读取的格式"""
+
+    def __init__(self, file: BinaryIO):
+        super().__init__(file)
+        self._writer = pa.ipc.new_stream(file, ALPACA_SCHEMA)
+
+    def write(self, rows: List[dict]):
+        if rows:
+            self._writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=ALPACA_SCHEMA))
+
+    def close(self):
+        self._writer.close()
+
+
+@dataclass
+class ExportFormatSpec:
+    extension: str
+    writer: Callable[[BinaryIO], FormatWriter]
+    build_row: Callable[[str, str, str, dict], dict]
+    dataset_info: dict
+
+
+EXPORT_FORMATS = {
+    ExportFormat.JSONL: ExportFormatSpec(".jsonl", JsonlWriter, build_sft_row, ALPACA_INFO),
+    ExportFormat.JSON: ExportFormatSpec(".json", JsonArrayWriter, build_sft_row, ALPACA_INFO),
+    ExportFormat.ShareGPT: ExportFormatSpec(".jsonl", JsonlWriter, build_sharegpt_row, SHAREGPT_INFO),
+    ExportFormat.Parquet: ExportFormatSpec(".parquet", ParquetWriter, build_sft_row, ALPACA_INFO),
+    ExportFormat.Arrow: ExportFormatSpec(".arrow", ArrowWriter, build_sft_row, ALPACA_INFO),
+}
+
+
+def get_export_format(export_format: str) -> ExportFormatSpec:
+    return EXPORT_FORMATS[ExportFormat(export_format)]
+
+
+def build_dataset_info(dataset_name: str, file_name: str, export_format: str) -> dict:
+    """LlamaFactory dataset_info.json 的内容, 按文件扩展名识别加载方式"""
+    return {dataset_name: {"file_name": file_name, **get_export_format(export_format).dataset_info}}
@@ -1,39 +1,24 @@
-from dataclasses import dataclass
-
-from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
-
-from app.models.user_model import User
-from app.services.dataset_services import dataset_service
-
-
-class SFTData(BaseModel):
-    instruction: str = Field(..., description="输入")
-    input: str = Field(..., description="用户输入")
-    output: str = Field(..., description="输出")
-
-
-def sft_dataset_processor(session: Session, current_user: User, project_id: str, ids: list[str], options: dict) -> list:
-    batch_datasets = dataset_service.list_datasets(
-        session,
-        current_user,
-        1,
-        len(ids),
-        project_id=project_id,
-        ids=ids
-    )
-
-    data = []
-    for dataset in batch_datasets.data:
-        instruction = dataset.question
-        output = dataset.answer
-        output_with_cot = options.get("output_with_cot")
-        if output_with_cot is not None and output_with_cot == True and dataset.cot is not None and dataset.cot != "":
-            output = f"<think>{dataset.cot}<\\think>\n{output}"
-        data.append(SFTData(
-            instruction=instruction,
-            input="",
-            output=output,
-        ))
-    return data
-
+def build_sft_output(answer: str, cot: str, options: dict) -> str:
+    """答案, 可选在答案前附带思维链"""
+    if options.get("output_with_cot") == True and cot:
+        return f"<think>{cot}</think>\n{answer}"
+    return answer
+
+
+def build_sft_row(question: str, answer: str, cot: str, options: dict) -> dict:
+    """alpaca 格式: instruction 为问题, output 为答案"""
+    return {
+        "instruction": question,
+        "input": "",
+        "output": build_sft_output(answer, cot, options),
+    }
+
+
+def build_sharegpt_row(question: str, answer: str, cot: str, options: dict) -> dict:
+    """sharegpt 格式: 一问一答的单轮对话"""
+    return {
+        "conversations": [
+            {"from": "human", "value": question},
+            {"from": "gpt", "value": build_sft_output(answer, cot, options)},
+        ]
+    }
@@ -3,20 +3,22 @@ import os
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
-from app.config.config import settings
-from app.db.dataset_db_model import dataset_version_db
+from app.api.middleware.context import get_current_locale
+from app.db.dataset_db_model import dataset_version_db, job_db
 from app.db.dataset_db_model.dataset_version_db import DatasetVersionORM
+from app.db.dataset_db_model.job_db import JobORM
+from app.db.routing import read_only, use_primary
 from app.lib.i18n.config import i18n
 from app.models.dataset_models.dataset_version_model import DatasetVersionUpdate, DatasetVersionCreate, \
-    DatasetVersionList, DatasetVersionItem, DatasetType
+    DatasetVersionList, DatasetVersionItem, DatasetType, DatasetVersionExportContent
+from app.models.dataset_models.job_model import JobType, JobStatus
 from app.models.user_model import User
-from app.services.dataset_services.dataset_version_processer.sft_processor import sft_dataset_processor
-
-
-def dataset_version_file_path_builder(id: str):
-    return os.path.join(settings.DATASET_VERSION_DIR, id + ".jsonl")
+from app.services.dataset_services.dataset_version_processer.exporter import dataset_version_file_path_builder, \
+    remove_artifact_if_unused
+from app.services.dataset_services.jobs.manager import job_manager
 
 
+@read_only
 def list_dataset_version(session: Session, current_user: User, page: int, page_size: int, project_id: str = None,
                          name: str = None) -> DatasetVersionList:
     dataset_version_list, total = dataset_version_db.list(session, current_user, page, page_size, project_id, name)
@@ -32,9 +34,10 @@ def get_dataset_version_path(session: Session, current_user: User, id: str) -> s
     if orm is None:
         raise HTTPException(status_code=500, detail=i18n.gettext("Dataset version not found. id: {id}").format(id=id))
 
-    return dataset_version_file_path_builder(orm.id)
+    return dataset_version_file_path_builder(orm.id, orm.export_format, orm.artifact_hash)
 
 
+@use_primary
 def create_dataset_version(session: Session, current_user: User,
                            dataset_version_create: DatasetVersionCreate) -> DatasetVersionItem:
     if dataset_version_create.dataset_type != DatasetType.SupervisedFineTuning:
@@ -46,30 +49,27 @@ def create_dataset_version(session: Session, current_user: User,
         description=dataset_version_create.description,
         project_id=dataset_version_create.project_id,
         dataset_type=dataset_version_create.dataset_type,
-        options=dataset_version_create.options
+        options=dataset_version_create.options,
+        export_format=dataset_version_create.export_format,
+        status=JobStatus.Running.name,
     ))
 
-    for offset in range(0, len(dataset_version_create.dataset_id_list), 1000):
-        batch_ids = dataset_version_create.dataset_id_list[offset:offset + 1000]
-
-        datasets = sft_dataset_processor(session, current_user, dataset_version_create.project_id, batch_ids,
-                                         dataset_version_create.options)
-
-        try:
-            with open(dataset_version_file_path_builder(create_result.id), 'w',
-                      encoding='utf-8') as file:
-                lines: [str] = []
-                for dataset in datasets:
-                    lines.append(dataset.json() + "\n")
-                file.writelines(lines)
-        except IOError as e:
-            raise HTTPException(status_code=500,
-                                detail=i18n.gettext("I/O error occurred while writing file. error: {error}").format(
-                                    error=str(e)))
-        except Exception as e:
-            raise HTTPException(status_code=500,
-                                detail=i18n.gettext("Unexpected error occurred. error: {error}").format(
-                                    error=str(e)))
+    # 版本文件由后台任务流式导出, 接口立即返回, 通过 job_id 查询导出进度
+    job = job_db.create(session, current_user, JobORM(
+        type=JobType.DatasetVersionExport,
+        status=JobStatus.Running,
+        content=DatasetVersionExportContent(
+            dataset_version_id=create_result.id,
+            project_id=dataset_version_create.project_id,
+            dataset_id_list=dataset_version_create.dataset_id_list,
+            options=dataset_version_create.options,
+            export_format=dataset_version_create.export_format,
+        ).model_dump(mode="json"),
+        locale=get_current_locale(),
+        project_id=dataset_version_create.project_id,
+    ))
+    create_result = dataset_version_db.update(session, current_user, create_result.id, {"job_id": job.id})
+    job_manager.add_job(job)
 
     return DatasetVersionItem(
         **create_result.to_dict()
@@ -91,9 +91,16 @@ def delete_dataset_version(session: Session, current_user: User, id: str) -> Dat
     delete_orm = dataset_version_db.delete(session, current_user, id)
     if delete_orm is None:
         raise HTTPException(status_code=500, detail=i18n.gettext("Dataset version not found. id: {id}").format(id=id))
+    if delete_orm.status != JobStatus.Success.name:
+        # 导出中或导出失败的版本没有版本文件, 导出中的任务完成后会自行删除文件
+        return DatasetVersionItem(**delete_orm.to_dict())
 
     try:
-        os.remove(dataset_version_file_path_builder(id))
+        if delete_orm.artifact_hash:
+            # 内容相同的版本共用版本文件, 最后一个引用的版本删除时才删除文件
+            remove_artifact_if_unused(session, delete_orm.artifact_hash, delete_orm.export_format)
+        else:
+            os.remove(dataset_version_file_path_builder(id, delete_orm.export_format))
     except FileNotFoundError as e:
         raise HTTPException(status_code=500,
                             detail=i18n.gettext("File not found. error: {error}").format(error=str(e)))
@@ -8,11 +8,14 @@ from app.api.middleware.context import get_current_locale
 from app.db.dataset_db_model import file_pair_db, question_db, dataset_db, file_db, project_db, job_db
 from app.db.dataset_db_model.file_pair_db import FilePairORM
 from app.db.dataset_db_model.job_db import JobORM
+from app.db.pagination import encode_cursor
+from app.db.routing import read_only
 from app.lib.i18n.config import i18n
 from app.models.dataset_models.file_pair_model import FilePairList, FilePairItem, FilePairExportRequest, \
     FilePairExportItem, FilePairQuestionGeneratorContent, FilePairUpdate
 from app.models.dataset_models.job_model import JobType, JobStatus
 from app.models.user_model import User
+from app.services.dataset_services.common_service import parse_cursor
 from app.services.dataset_services.jobs.manager import job_manager
 
 
@@ -20,7 +23,7 @@ def db_file_pair_to_item(item: FilePairORM) -> FilePairItem:
     file_pair = FilePairItem(
         id=item.id,
         size=item.size,
-        content=item.content,
+        content=item.content if 'content' in item.__dict__ else None,
         summary=item.summary,
         name=item.name,
         chunk_index=item.chunk_index,
@@ -35,14 +38,23 @@ def db_file_pair_to_item(item: FilePairORM) -> FilePairItem:
     return file_pair
 
 
+@read_only
 def list_file_pairs(session: Session, current_user: User, page_no: int, page_size: int, project_id: str,
-                          file_ids: List[str], has_question: str) -> FilePairList:
-    file_pair_orm_list, total = file_pair_db.list(session, current_user, page_no, page_size, project_id, file_ids,
-                                                  has_question)
+                          file_ids: List[str], has_question: str, cursor: str = None,
+                          with_count: bool = True) -> FilePairList:
+    next_cursor = None
+    if cursor is None:
+        file_pair_orm_list, total = file_pair_db.list(session, current_user, page_no, page_size, project_id, file_ids,
+                                                      has_question)
+    else:
+        file_pair_orm_list, next_after, total = file_pair_db.list_by_cursor(
+            session, current_user, page_size, parse_cursor(cursor), with_count, project_id, file_ids, has_question)
+        next_cursor = encode_cursor(next_after)
 
     file_pair_list = FilePairList(
         count=total,
         data=[],
+        next_cursor=next_cursor,
     )
     for item in file_pair_orm_list:
         file_pair = db_file_pair_to_item(item)
@@ -100,7 +112,7 @@ def question_generator(session: Session, current_user: User, req: FilePairQuesti
     job = job_db.create(session, current_user, JobORM(
         type=JobType.QuestionGenerator,
         status=JobStatus.Running,
-        content=req.json(),
+        content=req.model_dump(mode="json"),
         locale=get_current_locale(),
         project_id=req.project_id,
     ))
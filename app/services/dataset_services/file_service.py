@@ -1,29 +1,38 @@
 import hashlib
 import os
-from typing import List
+from typing import List, Iterator, Tuple, Optional
 
-import chardet
 from fastapi import UploadFile, File, HTTPException
 from sqlalchemy.orm import Session
 
 from app.api.middleware.context import get_current_locale
-from app.db.dataset_db_model import project_db, file_db, job_db, file_pair_db, question_db, dataset_db, ga_pair_db
+from app.config.config import settings
+from app.db.dataset_db_model import project_db, file_db, job_db
 from app.db.dataset_db_model.file_db import FileORM
 from app.db.dataset_db_model.job_db import JobORM
+from app.db.pagination import encode_cursor
+from app.db.routing import read_only
+from app.lib.blob.blob_store import blob_store
+from app.lib.extract import extract
+from app.lib.extract.encoding import decode_content
 from app.lib.i18n.config import i18n
 from app.models.dataset_models.file_model import FileList, FileItem, GetFileItem, FileSplitConfig, FilePairGeneratorContent, \
-    FileDeleteConfig, FileDeleteGeneratorContent
+    FileDeleteConfig, FileDeleteGeneratorContent, FileMarkdownCleanupContent
 from app.models.dataset_models.job_model import JobType, JobStatus
 from app.models.user_model import User
+from app.services.dataset_services.common_service import parse_cursor
 from app.services.dataset_services.jobs.manager import job_manager
 
 ALLOWED_FILE_TYPES = {
     "markdown": [".md", ".markdown"],
     "pdf": [".pdf"],
     "text": [".txt"],
-    "word": [".doc", ".docx"]
+    "word": [".docx"]
 }
 
+# 旧版 word 二进制格式无法直接解析, 需要用户另存为 docx
+LEGACY_WORD_EXTENSIONS = [".doc"]
+
 ALLOWED_EXTENSIONS = [ext for exts in ALLOWED_FILE_TYPES.values() for ext in exts]
 
 
@@ -46,26 +55,42 @@ def get_file(session: Session, current_user: User, id: str) -> GetFileItem:
     if not file:
         raise HTTPException(status_code=500, detail=i18n.gettext("File not found. id: {id}").format(id=id))
 
-    return GetFileItem(**file.to_dict())
+    return to_get_file_item(file)
 
 
-def delete_file(session: Session, current_user: User, id: str, config: FileDeleteConfig) -> FileItem:
-    file_pair_db.bulk_delete_file_pairs(session, current_user, file_ids=[id])
-    question_db.bulk_delete_questions(session, current_user, file_ids=[id])
-    dataset_db.bulk_delete_datasets(session, current_user, file_ids=[id])
-    ga_pair_db.bulk_delete_ga_pairs(session, current_user, file_ids=[id])
+def open_file_content(session: Session, current_user: User, id: str) -> (FileORM, Iterator[bytes]):
+    """返回文件记录以及正文的分块迭代器, 正文在 blob 中时流式读取"""
+    file = file_db.get(session, current_user, id)
+    if not file:
+        raise HTTPException(status_code=500, detail=i18n.gettext("File not found. id: {id}").format(id=id))
+
+    if not file.content_in_blob:
+        return file, iter([file.content.encode("utf-8")])
+    try:
+        return file, blob_store.stream(file.md5)
+    except FileNotFoundError:
+        raise HTTPException(status_code=500, detail=i18n.gettext(
+            "File content not found: {file_name}").format(file_name=file.file_name))
 
+
+def to_get_file_item(file: FileORM) -> GetFileItem:
+    return GetFileItem(**{**file.to_dict(), "content": file_db.load_content(file)})
+
+
+def delete_file(session: Session, current_user: User, id: str, config: FileDeleteConfig) -> FileItem:
+    # 文件立即标记删除, 分片/问题/数据集/GA 对由删除任务分批删除
     file = file_db.delete(session, current_user, id)
     if file:
         content = FileDeleteGeneratorContent(
-            file=GetFileItem(**file.to_dict()),
+            file_id=file.id,
+            file_name=file.file_name,
             config=config,
         )
 
         job = job_db.create(session, current_user, JobORM(
             type=JobType.FileDeleteGenerator,
             status=JobStatus.Running,
-            content=content.json(),
+            content=content.model_dump(mode="json"),
             locale=get_current_locale(),
             project_id=file.project_id,
         ))
@@ -76,25 +101,33 @@ def delete_file(session: Session, current_user: User, id: str, config: FileDelet
         raise HTTPException(status_code=500, detail=i18n.gettext("File not found. id: {id}").format(id=id))
 
 
-def decode_content(content: bytes) -> str:
-    # 检测编码
-    encoding_info = chardet.detect(content)
-    encoding = encoding_info["encoding"]
-    confidence = encoding_info["confidence"]  # 检测置信度
-
-    if encoding is None or confidence < 0.8:  # 如果置信度太低，默认用 UTF-8
-        encoding = "utf-8"
-
+def extract_content(file_name: str, extension: str, content: bytes) -> Tuple[str, bool]:
+    """pdf/docx 转换为 markdown 后存储, 其余文本类文件直接解码; 第二个返回值表示正文是否由二进制文档提取"""
     try:
-        return content.decode(encoding)
-    except UnicodeDecodeError:
-        # 如果检测的编码失败，尝试常见编码（如 GBK、ISO-8859-1）
-        for fallback_encoding in ["utf-8", "gbk", "iso-8859-1", "latin1"]:
-            try:
-                return content.decode(fallback_encoding)
-            except UnicodeDecodeError:
-                continue
-        raise ValueError("Failed to decode file content with any encoding")
+        segments = extract.extract_markdown(extension, content)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=i18n.gettext(
+            "Extract file content failed: {file_name}, error: {error}").format(file_name=file_name, error=str(e)))
+    if segments is None:
+        return decode_content(content), False
+    return "\n\n".join(segments), True
+
+
+def create_cleanup_job(session: Session, current_user: User, file: FileORM) -> str:
+    content = FileMarkdownCleanupContent(
+        file_id=file.id,
+        file_name=file.file_name,
+    )
+
+    job = job_db.create(session, current_user, JobORM(
+        type=JobType.FileMarkdownCleanup,
+        status=JobStatus.Running,
+        content=content.model_dump(mode="json"),
+        locale=get_current_locale(),
+        project_id=file.project_id,
+    ))
+    job_manager.add_job(job)
+    return job.id
 
 
 def compute_file_hash(content: bytes, algorithm: str = "md5") -> str:
@@ -110,9 +143,14 @@ def upload_files(session: Session, current_user: User, project_id: str, files: L
     if not project:
         raise HTTPException(status_code=500, detail=i18n.gettext("Project not found. id: {id}").format(id=project_id))
 
-    file_list: List[FileORM] = []
+    # (文件记录, 需要新写入 blob 的正文, 正文是否由 pdf/docx 提取), 相同正文的 blob 已存在时正文为 None
+    file_list: List[Tuple[FileORM, Optional[str], bool]] = []
     for file in files:
         # 检查文件后缀
+        if os.path.splitext(file.filename)[1].lower() in LEGACY_WORD_EXTENSIONS:
+            raise HTTPException(status_code=500, detail=i18n.gettext(
+                "Legacy .doc files are not supported, please save as .docx and upload again: {file_name}").format(
+                file_name=file.filename))
         if not is_valid_extension(file.filename):
             raise HTTPException(status_code=500,
                                 detail=i18n.gettext("Unsupported file type. Allowed types: {types}").format(
@@ -125,32 +163,59 @@ def upload_files(session: Session, current_user: User, project_id: str, files: L
         # 获取文件后缀
         original_ext = os.path.splitext(file.filename)[1]
         content = file.file.read()
-        after_content = decode_content(content)
-
-        file_list.append(FileORM(
+        md5 = compute_file_hash(content)
+        # 正文存放在以 md5 为键的 blob 中, 相同文件已经提取过时直接复用
+        text, extracted = None, False
+        if blob_store.exists(md5):
+            blob_store.touch(md5)
+        else:
+            text, extracted = extract_content(file.filename, original_ext, content)
+
+        file_list.append((FileORM(
             file_name=file.filename,
             file_ext=original_ext,
             file_type=get_file_type(original_ext),
-            content=after_content,
-            md5=compute_file_hash(content),
+            content="",
+            content_in_blob=True,
+            md5=md5,
             size=len(content),
             project_id=project_id
-        ))
+        ), text, extracted))
 
     results: List[FileItem] = []
-    for file in file_list:
+    for file, text, extracted in file_list:
         create_result = file_db.create(session, current_user, file)
+        # blob 在文件记录提交后写入, 提交失败不会留下无人引用的 blob; 写入失败时撤销该文件记录
+        if text is not None:
+            try:
+                written = blob_store.put_text(create_result.md5, text)
+            except Exception as e:
+                file_db.delete(session, current_user, create_result.id)
+                raise HTTPException(status_code=500, detail=i18n.gettext(
+                    "Extract file content failed: {file_name}, error: {error}").format(
+                    file_name=create_result.file_name, error=str(e)))
+            # 大模型整理耗时较长, 由后台任务完成后覆盖写回 blob, 同一内容只整理一次
+            if written and extracted and settings.EXTRACT_LLM_CLEANUP:
+                create_cleanup_job(session, current_user, create_result)
         results.append(FileItem(**create_result.to_dict()))
 
     return results
 
 
+@read_only
 def list_files(session: Session, current_user: User, page_no: int = 1, page_size: int = 100, projectId: str = "",
-               fileName: str = "") -> FileList:
-    file_orm_list, total = file_db.list(session, current_user, page_no, page_size, projectId, fileName)
+               fileName: str = "", cursor: str = None, with_count: bool = True) -> FileList:
+    next_cursor = None
+    if cursor is None:
+        file_orm_list, total = file_db.list(session, current_user, page_no, page_size, projectId, fileName)
+    else:
+        file_orm_list, next_after, total = file_db.list_by_cursor(
+            session, current_user, page_size, parse_cursor(cursor), with_count, projectId, fileName)
+        next_cursor = encode_cursor(next_after)
     return FileList(
         data=[FileItem(**file.to_dict()) for file in file_orm_list],
-        count=total
+        count=total,
+        next_cursor=next_cursor
     )
 
 
@@ -165,7 +230,7 @@ def file_split(session: Session, current_user: User, id: str, config: FileSplitC
     job = job_db.create(session, current_user, JobORM(
         type=JobType.FilePairGenerator,
         status=JobStatus.Running,
-        content=content.json(),
+        content=content.model_dump(mode="json"),
         locale=get_current_locale(),
         project_id=file.project_id,
     ))
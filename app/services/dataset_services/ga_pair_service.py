@@ -6,6 +6,7 @@ from app.api.middleware.context import get_current_locale
 from app.db.dataset_db_model import project_db, ga_pair_db, file_db, job_db
 from app.db.dataset_db_model.ga_pair_db import GAPairORM
 from app.db.dataset_db_model.job_db import JobORM
+from app.db.routing import read_only
 from app.lib.i18n.config import i18n
 from app.models.dataset_models.ga_pair_model import GAPairList, GAPairItem, GAPairSave, GaPairGeneratorConfig
 from sqlalchemy.orm import Session
@@ -15,6 +16,7 @@ from app.models.user_model import User
 from app.services.dataset_services.jobs.manager import job_manager
 
 
+@read_only
 def list_ga_pair(session: Session, current_user: User, page_no: int, page_size: int, file_id: str) -> GAPairList:
     ga_pair_orm_list, total = ga_pair_db.list(session, current_user, page_no, page_size, file_id)
     return GAPairList(
@@ -74,7 +76,7 @@ def generate_ga_pair(session: Session, current_user: User, config: GaPairGenerat
     job = job_db.create(session, current_user, JobORM(
         type=JobType.GaPairGenerator,
         status=JobStatus.Running,
-        content=config.json(),
+        content=config.model_dump(mode="json"),
         locale=get_current_locale(),
         project_id=config.project_id,
     ))
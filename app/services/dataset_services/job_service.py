@@ -1,14 +1,17 @@
-import json
+import orjson
 
 from fastapi import HTTPException
 
 from app.db.dataset_db_model import job_db
 from app.db.dataset_db_model.job_db import JobORM
+from app.db.pagination import encode_cursor
+from app.db.routing import read_only
 from app.lib.i18n.config import i18n
 from app.models.dataset_models.job_model import JobList, JobItem, JobResult, JobStatus
 from sqlalchemy.orm import Session
 
 from app.models.user_model import User
+from app.services.dataset_services.common_service import parse_cursor
 from app.services.dataset_services.jobs.manager import job_manager
 
 
@@ -19,21 +22,30 @@ def job_orm_to_model(item: JobORM) -> JobItem:
         type=item.type,
         status=item.status,
         locale=item.locale,
-        content=item.content,
+        content=orjson.dumps(item.content).decode(),
 
         project_id=item.project_id,
     )
-    if item.result != "":
-        job_item.result = JobResult(**json.loads(item.result))
+    if item.result:
+        job_item.result = JobResult(**item.result)
     return job_item
 
 
-def list_job(session: Session, current_user: User, page_no: int, page_size: int, project_id: str) -> JobList:
-    job_orm_list, total = job_db.list(session, current_user, page_no, page_size, project_id)
+@read_only
+def list_job(session: Session, current_user: User, page_no: int, page_size: int, project_id: str,
+             cursor: str = None, with_count: bool = True) -> JobList:
+    next_cursor = None
+    if cursor is None:
+        job_orm_list, total = job_db.list(session, current_user, page_no, page_size, project_id)
+    else:
+        job_orm_list, next_after, total = job_db.list_by_cursor(
+            session, current_user, page_size, parse_cursor(cursor), with_count, project_id)
+        next_cursor = encode_cursor(next_after)
 
     result = JobList(
         count=total,
-        data=[job_orm_to_model(item) for item in job_orm_list]
+        data=[job_orm_to_model(item) for item in job_orm_list],
+        next_cursor=next_cursor
     )
     return result
 
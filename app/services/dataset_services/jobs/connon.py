@@ -1,4 +1,3 @@
-import json
 import logging
 import traceback
 from abc import ABC, abstractmethod
@@ -19,8 +18,8 @@ def do_update_job_status(session, id: str, user: User, status: JobStatus, result
 
     try:
         # 执行日志拼接
-        if job.result != "" and job.result:
-            pre_result = JobResult(**json.loads(job.result))
+        if job.result:
+            pre_result = JobResult(**job.result)
             if result.logs == "" or result.logs is None:
                 result.logs = pre_result.logs
             else:
@@ -36,7 +35,7 @@ def do_update_job_status(session, id: str, user: User, status: JobStatus, result
 
     job_db.update(session, user, id, {
         "status": status.name,
-        "result": result.json(),
+        "result": result.model_dump(),
     })
 
 
@@ -57,7 +56,7 @@ class JobHandlerInterface(ABC):
 
     def done(self, job: JobORM):
         try:
-            result = JobResult(**json.loads(job.result))
+            result = JobResult(**job.result)
             update_job_status(None, job.id, build_user(job), JobStatus.Success, result)
         except Exception as e:
             traceback.print_exc()
@@ -0,0 +1,62 @@
+from typing import List
+
+from app.api.middleware.deps import manual_get_db
+from app.config.config import settings
+from app.db import soft_delete
+from app.db.dataset_db_model.catalog_db import CatalogORM
+from app.db.dataset_db_model.dataset_db import DatasetORM
+from app.db.dataset_db_model.file_db import FileORM
+from app.db.dataset_db_model.file_pair_db import FilePairORM
+from app.db.dataset_db_model.ga_pair_db import GAPairORM
+from app.db.dataset_db_model.job_db import JobORM
+from app.db.dataset_db_model.question_db import QuestionORM
+from app.db.dataset_db_model.tag_db import TagORM
+from app.lib.i18n.config import i18n
+from app.models.dataset_models.job_model import JobResult, Progress, JobStatus
+from app.models.dataset_models.project_model import ProjectDeleteGeneratorContent
+from app.services.dataset_services.jobs.connon import JobHandlerInterface, build_user, update_job_status
+
+# 先删除下游数据, 中途失败时不会留下引用已删除数据的行
+PROJECT_CASCADE = [DatasetORM, QuestionORM, FilePairORM, GAPairORM, CatalogORM, TagORM, FileORM]
+FILE_CASCADE = [DatasetORM, QuestionORM, FilePairORM, GAPairORM]
+
+
+def cascade_soft_delete(job: JobORM, job_result: JobResult, orm_list: List, **filters):
+    """按表分批软删除 filters 匹配的行, 每批一个事务并更新任务进度"""
+    user = build_user(job)
+    with manual_get_db() as session:
+        counts = [(orm, soft_delete.count_live(session, orm, user, **filters)) for orm in orm_list]
+
+    job_result.progress = Progress(total=sum(count for _, count in counts), done_count=0)
+    update_job_status(None, job.id, user, JobStatus.Running, job_result)
+
+    for orm, count in counts:
+        if count == 0:
+            continue
+        job_result.append_logs(i18n.gettext("Start cascade delete {table}, rows: {count}").format(
+            table=orm.__tablename__, count=count))
+        while True:
+            with manual_get_db() as session:
+                deleted = soft_delete.soft_delete_batch(session, orm, user, settings.CASCADE_DELETE_BATCH_SIZE,
+                                                        **filters)
+            if deleted == 0:
+                break
+            job_result.progress.done_count += deleted
+            # 删除期间新写入的行同样会被删除, 进度总数随之增加
+            job_result.progress.total = max(job_result.progress.total, job_result.progress.done_count)
+            update_job_status(None, job.id, user, JobStatus.Running, job_result)
+
+
+class ProjectDeleteGeneratorHandler(JobHandlerInterface):
+    def execute(self, job: JobORM) -> JobORM:
+        content = ProjectDeleteGeneratorContent(**job.content)
+
+        job_result = JobResult()
+        job_result.append_logs(
+            i18n.gettext("Start deleting project data, project_id: {project_id}").format(project_id=content.project_id))
+        cascade_soft_delete(job, job_result, PROJECT_CASCADE, project_id=content.project_id)
+        job_result.append_logs(
+            i18n.gettext("End deleting project data, project_id: {project_id}").format(project_id=content.project_id))
+
+        job.result = job_result.model_dump()
+        return job
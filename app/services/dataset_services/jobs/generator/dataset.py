@@ -1,16 +1,18 @@
-import json
 import traceback
+from typing import List, Dict
+
+from sqlalchemy.orm import Session
 
 from app.api.middleware.deps import manual_get_db
+from app.db import search
 from app.db.dataset_db_model import question_db, file_pair_db, ga_pair_db, dataset_db
-from app.db.dataset_db_model.dataset_db import DatasetORM
-from app.db.dataset_db_model.ga_pair_db import GAPairORM
 from app.db.dataset_db_model.job_db import JobORM
 from app.lib.i18n.config import i18n
 from app.models.dataset_models.question_model import DatasetGeneratorRequest
 from app.models.dataset_models.job_model import JobResult, Progress, JobStatus
-from app.services.dataset_services.common_service import check_and_update_question_has_dataset
+from app.models.user_model import User
 from app.services.dataset_services.jobs.connon import JobHandlerInterface, build_user, update_job_status
+from app.services.dataset_services.jobs.writer import BufferedWriter
 from app.services.common_services.model_service import chat_cot_with_error_handling, get_model
 from app.services.dataset_services.prompt.answer import get_answer_prompt
 from app.services.dataset_services.prompt.answer_en import get_answer_en_prompt
@@ -20,10 +22,22 @@ from app.services.dataset_services.prompt.optimize_cot import optimize_cot_promp
 from app.services.dataset_services.prompt.optimize_cot_en import optimize_cot_en_prompt
 
 
+def write_datasets(session: Session, user: User, rows: List[Dict]):
+    # 数据集与问题的 has_dataset 在同一个事务中写入, 提交后再同步侧车索引
+    mappings = dataset_db.bulk_create(session, user, rows, auto_commit=False)
+    question_db.refresh_has_dataset(session, user, [row["question_id"] for row in rows], auto_commit=False)
+    return lambda: search.index_rows(dataset_db.DatasetORM.__tablename__, mappings)
+
+
 class DatasetGeneratorHandler(JobHandlerInterface):
 
     def execute(self, job: JobORM) -> JobORM:
-        content_map = json.loads(job.content)
+        with BufferedWriter(build_user(job)) as writer:
+            writer.register("datasets", write_datasets)
+            return self._execute(job, writer)
+
+    def _execute(self, job: JobORM, writer: BufferedWriter) -> JobORM:
+        content_map = job.content
         content = DatasetGeneratorRequest(**content_map)
 
         job_result = JobResult(
@@ -33,8 +47,11 @@ class DatasetGeneratorHandler(JobHandlerInterface):
             ),
         )
 
+        def mark_done():
+            job_result.progress.done_count += 1
+
         job_result.append_logs(
-            i18n.gettext("Process dataset generator config: {config}").format(config=job.content))
+            i18n.gettext("Process dataset generator config: {config}").format(config=content.json()))
         update_job_status(None, job.id, build_user(job), JobStatus.Running, job_result)
 
         for question_id in content.question_ids:
@@ -42,13 +59,15 @@ class DatasetGeneratorHandler(JobHandlerInterface):
                 job_result.append_logs(
                     i18n.gettext("Start process question. question_id: {id}").format(id=question_id))
 
+                ga_orm = None
                 with manual_get_db() as session:
                     question_orm = question_db.get(session, build_user(job), question_id)
                     file_pair_orm = file_pair_db.get(session, build_user(job), question_orm.file_pair_id)
                     ga_pairs_orm, _ = ga_pair_db.list(session, build_user(job), 1, 9999, file_id=file_pair_orm.file_id,
                                                       enable="true")
-                    if question_orm.ga_pair and question_orm.ga_pair != "":
-                        ga_orm = GAPairORM(**json.loads(question_orm.ga_pair))
+                    if question_orm.ga_pair_id:
+                        ga_orm = ga_pair_db.list_ga_pair_to_map(session, build_user(job), [question_orm.ga_pair_id],
+                                                                include_deleted=True).get(question_orm.ga_pair_id)
 
                 if ga_orm or len(ga_pairs_orm) > 0:
                     job_result.append_logs(
@@ -81,22 +100,21 @@ class DatasetGeneratorHandler(JobHandlerInterface):
 
                 llm_model, err = get_model()
                 if err:
-                    job_result.append_logs(error)
+                    job_result.append_logs(err)
                     continue
 
-                dataset = DatasetORM(
-                    question=question_orm.question,
-                    answer=chat_cot_resp.answer,
-                    question_id=question_orm.id,
-                    tag_name=question_orm.tag_name,
-                    file_pair_id=question_orm.file_pair_id,
-                    model=llm_model.model_name,
-                    confirmed=False,
-                    file_id=question_orm.file_id,
-                    project_id=question_orm.project_id,
-                )
-                if ga_orm:
-                    dataset.ga_pair = json.dumps(ga_orm.to_dict(), ensure_ascii=False)
+                dataset = {
+                    "question": question_orm.question,
+                    "answer": chat_cot_resp.answer,
+                    "question_id": question_orm.id,
+                    "tag_name": question_orm.tag_name,
+                    "ga_pair_id": question_orm.ga_pair_id,
+                    "file_pair_id": question_orm.file_pair_id,
+                    "model": llm_model.model_name,
+                    "confirmed": False,
+                    "file_id": question_orm.file_id,
+                    "project_id": question_orm.project_id,
+                }
 
                 # 思维链优化
                 if chat_cot_resp.cot is not None and chat_cot_resp.cot != "":
@@ -108,13 +126,11 @@ class DatasetGeneratorHandler(JobHandlerInterface):
                     if error:
                         job_result.append_logs(error)
                     else:
-                        dataset.cot = chat_cot_resp.answer or chat_cot_resp.cot
-
-                with manual_get_db() as session:
-                    dataset_db.create(session, build_user(job), dataset)
-                    check_and_update_question_has_dataset(session, build_user(job), question_id)
+                        dataset["cot"] = chat_cot_resp.answer or chat_cot_resp.cot
 
-                job_result.progress.done_count += 1
+                # 数据集与问题的 has_dataset 按批写入
+                # 进度只统计已写入数据库的问题
+                writer.add("datasets", [dataset], on_persisted=mark_done)
                 job_result.append_logs(
                     i18n.gettext("End process question. question_id: {id}").format(id=question_id))
             except Exception as e:
@@ -123,7 +139,8 @@ class DatasetGeneratorHandler(JobHandlerInterface):
                     i18n.gettext("Process question failed, question_id: {question_id}, error: {error}").format(
                         question_id=question_id, error=e))
             finally:
-                update_job_status(session, job.id, build_user(job), JobStatus.Running, job_result)
+                update_job_status(None, job.id, build_user(job), JobStatus.Running, job_result)
 
-        job.result = job_result.json()
+        writer.flush()
+        job.result = job_result.model_dump()
         return job
\ No newline at end of file
@@ -0,0 +1,76 @@
+from app.api.middleware.deps import manual_get_db
+from app.db.dataset_db_model import dataset_version_db
+from app.db.dataset_db_model.job_db import JobORM
+from app.lib.i18n.config import i18n
+from app.models.dataset_models.dataset_version_model import DatasetVersionExportContent
+from app.models.dataset_models.job_model import JobResult, Progress, JobStatus
+from app.services.dataset_services.dataset_version_processer.exporter import export_dataset_version, \
+    selection_fingerprint, read_manifest, remove_artifact_if_unused, claim_artifact
+from app.services.dataset_services.jobs.connon import JobHandlerInterface, build_user, update_job_status
+
+# 新导出的版本文件在登记引用前被并发删除时的最多导出次数
+MAX_EXPORT_ATTEMPTS = 3
+
+
+class DatasetVersionExportHandler(JobHandlerInterface):
+
+    def execute(self, job: JobORM) -> JobORM:
+        content = DatasetVersionExportContent(**job.content)
+        user = build_user(job)
+
+        job_result = JobResult(
+            progress=Progress(
+                total=len(content.dataset_id_list),
+                done_count=0
+            ),
+        )
+        job_result.append_logs(
+            i18n.gettext("Start export dataset version, id: {id}, datasets: {count}").format(
+                id=content.dataset_version_id, count=len(content.dataset_id_list)))
+        update_job_status(None, job.id, user, JobStatus.Running, job_result)
+
+        def on_progress(done_count: int):
+            job_result.progress.done_count = done_count
+            update_job_status(None, job.id, user, JobStatus.Running, job_result)
+
+        try:
+            with manual_get_db() as session:
+                fingerprint = selection_fingerprint(session, user, content.project_id, content.dataset_id_list,
+                                                    content.options, content.export_format)
+                previous = dataset_version_db.get_by_fingerprint(session, user, fingerprint)
+                manifest = read_manifest(previous.artifact_hash) if previous is not None else None
+                if manifest is not None and claim_artifact(session, user, content.dataset_version_id,
+                                                           manifest["artifact_hash"], fingerprint):
+                    # 数据集选择与导出配置都没有变化, 直接复用已有版本文件
+                    job_result.append_logs(
+                        i18n.gettext("Reuse dataset version file, id: {id}, artifact: {artifact}").format(
+                            id=previous.id, artifact=manifest["file_name"]))
+                    job_result.progress.done_count = job_result.progress.total
+                else:
+                    for attempt in range(MAX_EXPORT_ATTEMPTS):
+                        manifest = export_dataset_version(session, user, content.project_id,
+                                                          content.dataset_id_list, content.options,
+                                                          content.export_format, fingerprint, on_progress)
+                        if claim_artifact(session, user, content.dataset_version_id, manifest["artifact_hash"],
+                                          fingerprint):
+                            break
+                    else:
+                        raise RuntimeError(f"dataset version file removed concurrently: {manifest['artifact_hash']}")
+        except Exception:
+            with manual_get_db() as session:
+                dataset_version_db.update(session, user, content.dataset_version_id, {"status": JobStatus.Failed.name})
+            raise
+
+        with manual_get_db() as session:
+            # 引用已在 claim_artifact 中登记
+            dataset_version_orm = dataset_version_db.update(session, user, content.dataset_version_id,
+                                                            {"status": JobStatus.Success.name})
+            if dataset_version_orm is None:
+                # 导出期间版本已被删除
+                remove_artifact_if_unused(session, manifest["artifact_hash"], content.export_format)
+
+        job_result.append_logs(
+            i18n.gettext("End export dataset version, id: {id}, rows: {count}").format(
+                id=content.dataset_version_id, count=manifest["rows"]))
+        job.result = job_result.model_dump()
+        return job
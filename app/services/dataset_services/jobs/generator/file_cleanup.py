@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from app.api.middleware.deps import manual_get_db
+from app.config.config import settings
+from app.db.dataset_db_model import file_db
+from app.db.dataset_db_model.job_db import JobORM
+from app.lib.blob.blob_store import blob_store
+from app.lib.i18n.config import i18n
+from app.models.dataset_models.file_model import FileMarkdownCleanupContent
+from app.models.dataset_models.job_model import JobResult, Progress, JobStatus
+from app.services.common_services.model_service import chat_with_error_handling
+from app.services.dataset_services.jobs.connon import JobHandlerInterface, build_user, update_job_status
+from app.services.dataset_services.prompt import pdf_to_markdown, pdf_to_markdown_en
+
+
+def split_segments(text: str, max_chars: int) -> List[str]:
+    """按段落把正文合并为不超过 max_chars 的片段, 单个段落超长时单独成为一个片段"""
+    segments: List[str] = []
+    if not text.strip():
+        return segments
+    current: List[str] = []
+    length = 0
+    for paragraph in text.split("\n\n"):
+        if current and length + len(paragraph) > max_chars:
+            segments.append("\n\n".join(current))
+            current, length = [], 0
+        current.append(paragraph)
+        length += len(paragraph) + 2
+    if current:
+        segments.append("\n\n".join(current))
+    return segments
+
+
+def cleanup_markdown(segments: List[str], locale: str, on_progress=None) -> List[str]:
+    """使用大模型逐段整理提取出的 markdown, 调用失败的片段保留原始提取结果"""
+    prompt = pdf_to_markdown_en.convert_prompt_en() if locale == "en" else pdf_to_markdown.convert_prompt()
+
+    def cleanup(segment: str) -> str:
+        result, err = chat_with_error_handling(f"{prompt}\n{segment}")
+        if err is not None or not result:
+            return segment
+        return result.strip()
+
+    with ThreadPoolExecutor(max_workers=max(settings.EXTRACT_LLM_CONCURRENCY, 1)) as executor:
+        futures = [executor.submit(cleanup, segment) for segment in segments]
+        results: List[str] = []
+        for future in futures:
+            results.append(future.result())
+            if on_progress is not None:
+                on_progress(len(results))
+        return results
+
+
+class FileMarkdownCleanupHandler(JobHandlerInterface):
+    """上传时只保存提取结果, 大模型整理在此任务中执行, 整理完成后覆盖写回同一个 blob"""
+
+    def execute(self, job: JobORM) -> JobORM:
+        content = FileMarkdownCleanupContent(**job.content)
+        user = build_user(job)
+
+        job_result = JobResult(
+            progress=Progress(
+                total=0,
+                done_count=0
+            ),
+        )
+
+        with manual_get_db() as session:
+            file = file_db.get(session, user, content.file_id)
+            md5 = file.md5 if file is not None else None
+            text = file_db.load_content(file) if file is not None else None
+        if text is None:
+            # 任务执行前文件已被删除
+            job_result.append_logs(
+                i18n.gettext("File not found, skip markdown cleanup, file_name: {file_name}").format(
+                    file_name=content.file_name))
+            job.result = job_result.model_dump()
+            return job
+
+        segments = split_segments(text, max(settings.EXTRACT_LLM_CLEANUP_CHUNK_CHARS, 1))
+        job_result.progress.total = len(segments)
+        job_result.append_logs(
+            i18n.gettext("Start markdown cleanup, file_name: {file_name}, segments: {count}").format(
+                file_name=content.file_name, count=len(segments)))
+        update_job_status(None, job.id, user, JobStatus.Running, job_result)
+
+        def on_progress(done_count: int):
+            job_result.progress.done_count = done_count
+            update_job_status(None, job.id, user, JobStatus.Running, job_result)
+
+        cleaned = cleanup_markdown(segments, job.locale, on_progress)
+        # 整理期间 blob 已随文件删除时不再写回
+        if cleaned and blob_store.exists(md5):
+            blob_store.put_text(md5, "\n\n".join(cleaned), overwrite=True)
+
+        job_result.append_logs(
+            i18n.gettext("End markdown cleanup, file_name: {file_name}").format(file_name=content.file_name))
+        job.result = job_result.model_dump()
+        return job
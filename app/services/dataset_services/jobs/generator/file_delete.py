@@ -1,19 +1,24 @@
 import json
 
 from app.api.middleware.deps import manual_get_db
-from app.db.dataset_db_model import catalog_db
+from app.db.dataset_db_model import catalog_db, file_db
 from app.db.dataset_db_model.job_db import JobORM
 from app.lib.i18n.config import i18n
 from app.lib.split.markdown.cores import toc
 from app.models.dataset_models.file_model import FileDeleteGeneratorContent
 from app.models.dataset_models.job_model import JobResult, Progress
 from app.services.dataset_services.jobs.connon import JobHandlerInterface, build_user
+from app.services.dataset_services.jobs.generator.cascade_delete import cascade_soft_delete, FILE_CASCADE
 from app.services.dataset_services.jobs.generator.file_pair import tag_generator
 
 
 class FileDeleteGeneratorHandler(JobHandlerInterface):
     def execute(self, job: JobORM) -> JobORM:
-        content_map = json.loads(job.content)
+        content_map = dict(job.content)
+        if "file" in content_map:
+            # 早期的删除任务记录了整个文件, 只取 id 与文件名
+            legacy_file = content_map.pop("file") or {}
+            content_map.update(file_id=legacy_file.get("id", ""), file_name=legacy_file.get("file_name", ""))
         content = FileDeleteGeneratorContent(**content_map)
 
         job_result = JobResult(
@@ -25,15 +30,18 @@ class FileDeleteGeneratorHandler(JobHandlerInterface):
 
         job_result.append_logs(
             i18n.gettext("Process file delete config, file_name: {file_name}, config: {config}").format(
-                file_name=content.file.file_name, config=content.config.json()))
+                file_name=content.file_name, config=content.config.json()))
+        cascade_soft_delete(job, job_result, FILE_CASCADE, file_id=content.file_id)
 
-        file_catalog_info = toc.extract_table_of_contents(content.file.content)
+        with manual_get_db() as session:
+            file_content = file_db.get_content(session, build_user(job), content.file_id, include_deleted=True) or ""
+        file_catalog_info = toc.extract_table_of_contents(file_content)
         delete_toc = json.dumps(file_catalog_info, ensure_ascii=False)
         tag_generator(job, content.config.toc_build_action, job_result, delete_toc, "")
         # 事后删除目录，因为 tag_generator 要使用
         with manual_get_db() as session:
-            catalog_db.bulk_delete_catalog(session, build_user(job), file_ids=[content.file.id])
-        job.result = job_result.json()
+            catalog_db.bulk_delete_catalog(session, build_user(job), file_ids=[content.file_id])
+        job.result = job_result.model_dump()
         return job
 
 
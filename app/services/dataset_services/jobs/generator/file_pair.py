@@ -1,37 +1,138 @@
 import json
+import threading
 import traceback
-from typing import List, Dict
+from typing import List, Dict, Tuple
+
+import numpy as np
+from cachetools import LRUCache
+from sqlalchemy.orm import Session
 
 from app.api.middleware.deps import manual_get_db
-from app.db.dataset_db_model import file_db, file_pair_db, catalog_db, tag_db
+from app.db.dataset_db_model import file_db, file_pair_db, catalog_db
 from app.db.dataset_db_model.catalog_db import CatalogORM
-from app.db.dataset_db_model.file_db import FileORM
 from app.db.dataset_db_model.file_pair_db import FilePairORM
 from app.db.dataset_db_model.job_db import JobORM
-from app.db.dataset_db_model.tag_db import TagORM
 from app.lib.i18n.config import i18n
 from app.lib.split import split
+from app.lib.split.common import SplitItem
+from app.lib.split.dedup import MinHashLSH, DedupMode
 from app.lib.split.markdown.cores import toc
-from app.models.dataset_models.file_model import GetFileItem, FilePairGeneratorContent, TocBuildAction
+from app.models.dataset_models.file_model import GetFileItem, FilePairGeneratorContent, TocBuildAction, \
+    FileSplitConfig
 from app.models.dataset_models.job_model import JobResult, Progress, JobStatus
-from app.models.dataset_models.tag_model import TagChatResultItem
-from app.services.dataset_services import catalog_service
+from app.models.user_model import User
+from app.services.dataset_services import catalog_service, tag_service
 from app.services.dataset_services.jobs.connon import JobHandlerInterface, update_job_status, build_user
 from app.services.common_services.model_service import chat_with_error_handling, extract_json_from_llm_output
 from app.services.dataset_services.prompt import label_en, label_revise, label, label_revise_en
-from app.services.dataset_services.tag_service import batch_save_tags
 
 
-def file_split(job: JobORM, content: FilePairGeneratorContent, job_result: JobResult, file: FileORM):
+# 每个项目一份分片去重索引, 使用前与数据库中的有效分片做增量同步
+# 索引按 (group_id, project_id) 各用一把锁, 不同项目的文件切分互不等待; 锁与索引一起缓存, 随索引一起淘汰
+_dedup_indexes: LRUCache = LRUCache(maxsize=64)
+_dedup_guard = threading.Lock()
+
+
+def _project_dedup(current_user: User, project_id: str) -> Tuple[MinHashLSH, threading.Lock]:
+    key = (current_user.group_id, project_id)
+    with _dedup_guard:
+        entry = _dedup_indexes.get(key)
+        if entry is None:
+            entry = (MinHashLSH(), threading.Lock())
+            _dedup_indexes[key] = entry
+    return entry
+
+
+def load_signatures(session: Session, current_user: User, index: MinHashLSH, ids: List[str]) -> Dict[str, np.ndarray]:
+    """加载分片内容并计算签名, 签名计算不修改索引, 可以在锁外进行"""
+    signatures = {}
+    for offset in range(0, len(ids), 1000):
+        file_pair_map = file_pair_db.list_file_pair_to_map(session, current_user, ids[offset:offset + 1000],
+                                                           with_content=True)
+        for file_pair in file_pair_map.values():
+            signatures[file_pair.id] = index.signature(file_pair.content)
+    return signatures
+
+
+def sync_project_dedup_index(session: Session, current_user: User, project_id: str, index: MinHashLSH,
+                             signatures: Dict[str, np.ndarray]):
+    """在项目的去重锁内调用; signatures 为锁外预先计算的签名, 期间新增的少量分片在锁内补齐"""
+    live_ids = set(file_pair_db.list_ids(session, current_user, project_id))
+    for key in index.keys():
+        if key not in live_ids:
+            index.remove(key)
+
+    missing_ids = [id for id in live_ids if id not in index]
+    late_ids = [id for id in missing_ids if id not in signatures]
+    signatures = {**signatures, **load_signatures(session, current_user, index, late_ids)}
+    for id in missing_ids:
+        if id in signatures:
+            index.insert(id, signatures[id])
+
+
+def dedup_split_items(session: Session, job: JobORM, file: GetFileItem, split_items: List[SplitItem],
+                      config: FileSplitConfig, job_result: JobResult) -> List[SplitItem]:
+    duplicates = []
+    kept_items: List[SplitItem] = []
+    new_keys: Dict[str, str] = {}
+    current_user = build_user(job)
+    index, lock = _project_dedup(current_user, file.project_id)
+
+    # 索引中还没有的分片在锁外加载内容并计算签名, 首次同步大项目时不阻塞同一项目的其他任务
+    with lock:
+        known_ids = set(index.keys())
+    missing_ids = [id for id in file_pair_db.list_ids(session, current_user, file.project_id) if id not in known_ids]
+    signatures = load_signatures(session, current_user, index, missing_ids)
+    split_signatures = [index.signature(split_item.content) for split_item in split_items]
+
+    with lock:
+        sync_project_dedup_index(session, current_user, file.project_id, index, signatures)
+        try:
+            for i, split_item in enumerate(split_items):
+                signature = split_signatures[i]
+                match = index.query(signature, config.dedup_threshold)
+                if match is not None:
+                    duplicates.append((split_item, match))
+                    if config.dedup_mode == DedupMode.Skip:
+                        continue
+                # 新分片也加入索引, 同一文件内部的重复分片同样能被检测到
+                key = f"{job.id}:{i}"
+                new_keys[key] = split_item.name
+                index.insert(key, signature)
+                kept_items.append(split_item)
+        finally:
+            # 新分片入库后会以真实 id 重新同步进索引
+            for key in new_keys:
+                index.remove(key)
+
+    if len(duplicates) == 0:
+        return kept_items
+
+    existing_ids = [match[0] for _, match in duplicates if match[0] not in new_keys]
+    file_pair_map = file_pair_db.list_file_pair_to_map(session, build_user(job), existing_ids) if existing_ids else {}
+    for split_item, (key, similarity) in duplicates:
+        target = new_keys.get(key)
+        if target is None:
+            target = file_pair_map[key].name if key in file_pair_map else key
+        job_result.append_logs(
+            i18n.gettext("Near-duplicate chunk detected: {name}, similar to: {target}, similarity: {similarity}").format(
+                name=split_item.name, target=target, similarity=f"{similarity:.2f}"))
+    if config.dedup_mode == DedupMode.Skip:
+        job_result.append_logs(
+            i18n.gettext("Near-duplicate chunks skipped: {count}").format(count=len(duplicates)))
+    return kept_items
+
+
+def file_split(job: JobORM, content: FilePairGeneratorContent, job_result: JobResult, file: GetFileItem):
     with manual_get_db() as session:
         job_result.append_logs(
             i18n.gettext("Start splitting files"))
         file_pair_db.bulk_delete_file_pairs(session, build_user(job), file_ids=[file.id])
         update_job_status(session, job.id, build_user(job), JobStatus.Running, job_result)
 
-        file_dict = file.to_dict()
-        item = GetFileItem(**file_dict)
-        split_items = split.split_file(item, content.config)
+        split_items = split.split_file(file, content.config)
+        if content.config.dedup_mode != DedupMode.Off:
+            split_items = dedup_split_items(session, job, file, split_items, content.config, job_result)
         file_pair_data: List[Dict] = []
         for split_item in split_items:
             file_pair = FilePairORM(**split_item.dict())
@@ -47,7 +148,7 @@ def file_split(job: JobORM, content: FilePairGeneratorContent, job_result: JobRe
     update_job_status(None, job.id, build_user(job), JobStatus.Running, job_result)
 
 
-def catalog_generator(job: JobORM, job_result: JobResult, file: FileORM) -> str:
+def catalog_generator(job: JobORM, job_result: JobResult, file: GetFileItem) -> str:
     job_result.append_logs(
         i18n.gettext("Start create file catalog"))
 
@@ -70,53 +171,15 @@ def catalog_generator(job: JobORM, job_result: JobResult, file: FileORM) -> str:
     return new_toc
 
 
-def orm_tag_to_tag_item(tags: List[TagORM]) -> List[TagChatResultItem]:
-    # 1. 过滤已删除的标签并建立id到ORM对象的映射
-    tag_map: Dict[str, TagORM] = {}
-    for tag in tags:
-        if tag.is_deleted == 0:  # 只处理未删除的标签
-            tag_map[tag.id] = tag
-
-    # 2. 建立父子关系映射
-    parent_child_map: Dict[str, List[TagORM]] = {}
-    for tag in tag_map.values():
-        if tag.parent_id not in parent_child_map:
-            parent_child_map[tag.parent_id] = []
-        parent_child_map[tag.parent_id].append(tag)
-
-    # 3. 递归构建树形结构
-    def build_tree(parent_id: str) -> List[TagChatResultItem]:
-        result = []
-        # 获取当前parent_id下的所有子标签
-        children = parent_child_map.get(parent_id, [])
-        for child in children:
-            # 为每个子标签创建节点
-            node = TagChatResultItem(
-                label=child.label,
-                child=build_tree(child.id)  # 递归构建子树
-            )
-            result.append(node)
-        return result
-
-    # 4. 从根节点(parent_id为None或空字符串)开始构建树
-    root_parent_ids = [None, ""]  # 考虑parent_id可能为None或空字符串的情况
-    root_tags = []
-    for root_id in root_parent_ids:
-        if root_id in parent_child_map:
-            root_tags.extend(parent_child_map[root_id])
-
-    return build_tree("")  # 从根节点开始构建
-
-
 def tag_generator(job: JobORM, toc_build_action: str, job_result: JobResult, delete_toc: str, new_toc: str):
     job_result.append_logs(
         i18n.gettext("Start generator tag"))
 
     with manual_get_db() as session:
         all_catalog = catalog_db.list(session, build_user(job), job.project_id)
-        all_tags = tag_db.list(session, build_user(job), job.project_id)
+        tag_tree = tag_service.get_chat_tree(session, build_user(job), job.project_id)
 
-    if toc_build_action == TocBuildAction.Revise.name and len(all_tags) == 0:
+    if toc_build_action == TocBuildAction.Revise.name and len(tag_tree) == 0:
         toc_build_action = TocBuildAction.Rebuild.name
 
     prompt = ""
@@ -132,7 +195,7 @@ def tag_generator(job: JobORM, toc_build_action: str, job_result: JobResult, del
         if job.locale == "en":
             tag_prompt_func = label_revise_en.get_label_revise_prompt_en
 
-        prompt = tag_prompt_func(toc, orm_tag_to_tag_item(all_tags), deleted_content=delete_toc, new_content=new_toc)
+        prompt = tag_prompt_func(toc, tag_tree, deleted_content=delete_toc, new_content=new_toc)
 
     tags = []
     if prompt != "":
@@ -147,7 +210,7 @@ def tag_generator(job: JobORM, toc_build_action: str, job_result: JobResult, del
 
     if len(tags) > 0:
         with manual_get_db() as session:
-            batch_save_tags(session, build_user(job), job.project_id, tags)
+            tag_service.batch_save_tags(session, build_user(job), job.project_id, tags)
 
     job_result.append_logs(
         i18n.gettext("End generator tag"))
@@ -158,7 +221,7 @@ def tag_generator(job: JobORM, toc_build_action: str, job_result: JobResult, del
 class FilePairGeneratorHandler(JobHandlerInterface):
 
     def execute(self, job: JobORM) -> JobORM:
-        content_map = json.loads(job.content)
+        content_map = job.content
         content = FilePairGeneratorContent(**content_map)
 
         job_result = JobResult(
@@ -176,7 +239,10 @@ class FilePairGeneratorHandler(JobHandlerInterface):
         for file_id in content.file_ids:
             try:
                 with manual_get_db() as session:
-                    file = file_db.get(session, build_user(job), file_id)
+                    file_orm = file_db.get(session, build_user(job), file_id)
+                # 正文只读取一次, 分割和目录生成共用
+                file = GetFileItem(**{**file_orm.to_dict(), "content": file_db.load_content(file_orm)}) \
+                    if file_orm else None
 
                 if not file:
                     job_result.append_logs(
@@ -203,5 +269,5 @@ class FilePairGeneratorHandler(JobHandlerInterface):
             finally:
                 update_job_status(session, job.id, build_user(job), JobStatus.Running, job_result)
 
-        job.result = job_result.json()
+        job.result = job_result.model_dump()
         return job
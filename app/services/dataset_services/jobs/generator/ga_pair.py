@@ -1,4 +1,3 @@
-import json
 import traceback
 
 from app.api.middleware.deps import manual_get_db
@@ -17,7 +16,7 @@ from app.services.dataset_services.prompt.ga_generation_en import GA_GENERATION_
 class GaPairGeneratorHandler(JobHandlerInterface):
 
     def execute(self, job: JobORM) -> JobORM:
-        content_map = json.loads(job.content)
+        content_map = job.content
         config = GaPairGeneratorConfig(**content_map)
 
         job_result = JobResult(
@@ -53,7 +52,10 @@ class GaPairGeneratorHandler(JobHandlerInterface):
                 if job.locale == "en":
                     prompt_template = GA_GENERATION_PROMPT_EN
 
-                question = prompt_template.replace("{text_content}", file.content)
+                # 文件列表不加载正文, 逐个文件加载, 内存占用不随文件数增长
+                with manual_get_db() as session:
+                    file_content = file_db.get_content(session, build_user(job), file.id) or ""
+                question = prompt_template.replace("{text_content}", file_content)
                 chat_result, error = chat_with_error_handling(question)
                 job_result.append_logs(i18n.gettext("End calling the llm to generate data. output: {output}").format(output=chat_result))
                 if error is not None:
@@ -111,6 +113,6 @@ class GaPairGeneratorHandler(JobHandlerInterface):
             finally:
                 update_job_status(None, job.id, build_user(job), JobStatus.Running, job_result)
 
-        job.result = job_result.json()
+        job.result = job_result.model_dump()
         return job
 
@@ -1,16 +1,20 @@
 import json
 import traceback
-from typing import List
+from typing import List, Dict
+
+from sqlalchemy.orm import Session
 
 from app.api.middleware.deps import manual_get_db
-from app.db.dataset_db_model import file_pair_db, ga_pair_db, tag_db, question_db
+from app.db import search
+from app.db.dataset_db_model import file_pair_db, ga_pair_db, question_db
 from app.db.dataset_db_model.job_db import JobORM
 from app.lib.i18n.config import i18n
 from app.models.dataset_models.file_pair_model import FilePairQuestionGeneratorContent
 from app.models.dataset_models.job_model import JobResult, Progress, JobStatus
 from app.models.user_model import User
+from app.services.dataset_services import tag_service
 from app.services.dataset_services.jobs.connon import JobHandlerInterface, update_job_status, build_user
-from app.services.dataset_services.jobs.generator.file_pair import orm_tag_to_tag_item
+from app.services.dataset_services.jobs.writer import BufferedWriter
 from app.services.common_services.model_service import chat_with_error_handling, extract_json_from_llm_output
 from app.services.dataset_services.prompt.add_label import get_add_label_prompt
 from app.services.dataset_services.prompt.add_label_en import get_add_label_prompt_en
@@ -18,7 +22,12 @@ from app.services.dataset_services.prompt.question import get_question_prompt
 from app.services.dataset_services.prompt.question_en import get_question_prompt_en
 
 
-def batch_save_questions(label_questions, file_pair_orm, ga_pair_orm):
+def write_questions(session: Session, user: User, rows: List[Dict]):
+    mappings = question_db.bulk_create(session, user, rows, auto_commit=False)
+    return lambda: search.index_rows(question_db.QuestionORM.__tablename__, mappings)
+
+
+def build_question_rows(label_questions, file_pair_orm, ga_pair_orm) -> List[dict]:
     create_questions: List[dict] = []
     for label_question in label_questions:
         question = label_question.get("question", "")
@@ -29,21 +38,16 @@ def batch_save_questions(label_questions, file_pair_orm, ga_pair_orm):
         create_question_dict = {
             "question": question,
             "tag_name": label,
-            "ga_pair": "",
+            "ga_pair_id": ga_pair_orm.id if ga_pair_orm is not None else "",
             "file_pair_id": file_pair_orm.id,
             "file_id": file_pair_orm.file_id,
             "project_id": file_pair_orm.project_id,
         }
-        if ga_pair_orm is not None:
-            create_question_dict["ga_pair"] = json.dumps(ga_pair_orm.to_dict(), ensure_ascii=False)
         create_questions.append(create_question_dict)
-    with manual_get_db() as session:
-        question_db.bulk_create(session, User(id=file_pair_orm.user_id, group_id=file_pair_orm.group_id),
-                                create_questions)
+    return create_questions
 
 
-def chat_label_question(tags_orm, questions, label_prompt_func, job_result):
-    tag_items = orm_tag_to_tag_item(tags_orm)
+def chat_label_question(tag_items, questions, label_prompt_func, job_result):
     label_prompt = label_prompt_func(tag_items, json.dumps(questions, ensure_ascii=False))
     job_result.append_logs(
         i18n.gettext("Start LLM rebuild question by label. prompt: {prompt}").format(
@@ -61,7 +65,12 @@ def chat_label_question(tags_orm, questions, label_prompt_func, job_result):
 
 class QuestionGeneratorHandler(JobHandlerInterface):
     def execute(self, job: JobORM) -> JobORM:
-        content_map = json.loads(job.content)
+        with BufferedWriter(build_user(job)) as writer:
+            writer.register("questions", write_questions)
+            return self._execute(job, writer)
+
+    def _execute(self, job: JobORM, writer: BufferedWriter) -> JobORM:
+        content_map = job.content
         content = FilePairQuestionGeneratorContent(**content_map)
 
         job_result = JobResult(
@@ -71,6 +80,9 @@ class QuestionGeneratorHandler(JobHandlerInterface):
             ),
         )
 
+        def mark_done():
+            job_result.progress.done_count += 1
+
         job_result.append_logs(
             i18n.gettext("Process file_pair config: {config}").format(config=content.json()))
         update_job_status(None, job.id, build_user(job), JobStatus.Running, job_result)
@@ -84,7 +96,7 @@ class QuestionGeneratorHandler(JobHandlerInterface):
                     file_pair_orm = file_pair_db.get(session, build_user(job), file_pair_id)
                     ga_pairs_orm, _ = ga_pair_db.list(session, build_user(job), 1, 9999, file_id=file_pair_orm.file_id,
                                                       enable="true")
-                    tags_orm = tag_db.list(session, build_user(job), project_id=job.project_id)
+                    tag_tree = tag_service.get_chat_tree(session, build_user(job), job.project_id)
 
                 if content.number == 0:
                     content.number = int(len(file_pair_orm.content) / content.question_generation_length)
@@ -97,6 +109,7 @@ class QuestionGeneratorHandler(JobHandlerInterface):
                 if job.locale == "en":
                     label_prompt_func = get_add_label_prompt_en
 
+                question_rows: List[dict] = []
                 if content.use_ga_generator:
                     for ga in ga_pairs_orm:
                         prompt = prompt_func(text=file_pair_orm.content, number=content.number, language=job.locale,
@@ -118,11 +131,11 @@ class QuestionGeneratorHandler(JobHandlerInterface):
                             job_result.append_logs(i18n.gettext("LLM generation result failed, result is empty"))
                             continue
 
-                        label_questions = chat_label_question(tags_orm, questions, label_prompt_func,
+                        label_questions = chat_label_question(tag_tree, questions, label_prompt_func,
                                                               job_result)
                         if label_questions is None:
                             continue
-                        batch_save_questions(label_questions, file_pair_orm, ga)
+                        question_rows.extend(build_question_rows(label_questions, file_pair_orm, ga))
                 else:
                     prompt = prompt_func(text=file_pair_orm.content, number=content.number, language=job.locale,
                                          global_prompt="", question_prompt="", active_ga_pair=None)
@@ -141,12 +154,13 @@ class QuestionGeneratorHandler(JobHandlerInterface):
                         job_result.append_logs(i18n.gettext("LLM generation result failed, result is empty"))
                         continue
 
-                    label_questions = chat_label_question(tags_orm, questions, label_prompt_func, job_result)
+                    label_questions = chat_label_question(tag_tree, questions, label_prompt_func, job_result)
                     if label_questions is None:
                         continue
-                    batch_save_questions(label_questions, file_pair_orm, None)
+                    question_rows = build_question_rows(label_questions, file_pair_orm, None)
 
-                job_result.progress.done_count += 1
+                # 文本块的问题一次加入缓冲区, 进度只统计问题已写入数据库的文本块
+                writer.add("questions", question_rows, on_persisted=mark_done)
                 job_result.append_logs(
                     i18n.gettext("End process file_pair id: {id}").format(id=file_pair_id))
             except Exception as e:
@@ -157,5 +171,6 @@ class QuestionGeneratorHandler(JobHandlerInterface):
             finally:
                 update_job_status(None, job.id, build_user(job), JobStatus.Running, job_result)
 
-        job.result = job_result.json()
+        writer.flush()
+        job.result = job_result.model_dump()
         return job
@@ -5,13 +5,16 @@ import traceback
 from typing import Dict
 
 from app.api.middleware.context import set_current_locale
-from app.api.middleware.deps import manual_get_db
+from app.api.middleware.deps import manual_get_db, job_db_scope
 from app.db.dataset_db_model import job_db
 from app.db.dataset_db_model.job_db import JobORM
 from app.lib.i18n.config import i18n
 from app.models.dataset_models.job_model import JobStatus, JobResult, JobType
 from app.services.dataset_services.jobs.connon import JobHandlerInterface, update_job_status, build_user
+from app.services.dataset_services.jobs.generator.cascade_delete import ProjectDeleteGeneratorHandler
 from app.services.dataset_services.jobs.generator.dataset import DatasetGeneratorHandler
+from app.services.dataset_services.jobs.generator.dataset_version import DatasetVersionExportHandler
+from app.services.dataset_services.jobs.generator.file_cleanup import FileMarkdownCleanupHandler
 from app.services.dataset_services.jobs.generator.file_delete import FileDeleteGeneratorHandler
 from app.services.dataset_services.jobs.generator.file_pair import FilePairGeneratorHandler
 from app.services.dataset_services.jobs.generator.ga_pair import GaPairGeneratorHandler
@@ -64,8 +67,9 @@ class JobManager:
                 return
 
             set_current_locale(job.locale)
-            result = handler.execute(job)  # Assuming execute is async
-            handler.done(result)
+            with job_db_scope():
+                result = handler.execute(job)  # Assuming execute is async
+                handler.done(result)
         except asyncio.CancelledError:
             logging.info(f"User cancelled job. id: {job.id}")
             update_job_status(None, job.id, build_user(job), JobStatus.Cancel, JobResult(
@@ -141,6 +145,9 @@ job_manager.register_handler(JobType.GaPairGenerator, GaPairGeneratorHandler())
 job_manager.register_handler(JobType.TagGenerator, TagGeneratorHandler())
 job_manager.register_handler(JobType.QuestionGenerator, QuestionGeneratorHandler())
 job_manager.register_handler(JobType.DatasetGenerator, DatasetGeneratorHandler())
+job_manager.register_handler(JobType.ProjectDeleteGenerator, ProjectDeleteGeneratorHandler())
+job_manager.register_handler(JobType.DatasetVersionExport, DatasetVersionExportHandler())
+job_manager.register_handler(JobType.FileMarkdownCleanup, FileMarkdownCleanupHandler())
 
 
 async def start_job_manager():
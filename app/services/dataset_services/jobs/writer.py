@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.api.middleware.deps import manual_get_db
+from app.config.config import settings
+from app.models.user_model import User
+
+# (session, user, rows) -> 提交后执行的回调, 在同一个会话中完成批量写入及其后续更新, 不提交事务;
+# 回调用于侧车索引等不在主库事务内的更新
+WriteFunc = Callable[[Session, User, List[Dict]], Optional[Callable[[], None]]]
+
+
+class BufferedWriter:
+    """
+    任务生成结果的缓冲写入
+
+    按类型累积待写入的行, 缓冲行数达到 flush_rows 或距上次写入超过 flush_seconds 时批量写入,
+    任务结束时写入剩余的行。所有类型的行与后续更新在同一个事务中提交, 提交成功后立即清空缓冲区,
+    提交失败时整批回滚并保留在缓冲区, 下次写入时重试, 不会重复写入
+
+    缓冲区满时在调用 add 的线程中同步写入, 生成方会等待写入结束, 缓冲的行数不会超过 flush_rows;
+    按时间的写入由后台线程检查, 生成较慢时也能按时写入
+    """
+
+    def __init__(self, user: User, flush_rows: int = None, flush_seconds: float = None):
+        self.user = user
+        self.flush_rows = max(flush_rows or settings.JOB_WRITE_BATCH_SIZE, 1)
+        self.flush_seconds = flush_seconds if flush_seconds is not None else settings.JOB_WRITE_FLUSH_SECONDS
+        self._writers: Dict[str, WriteFunc] = {}
+        self._buffers: Dict[str, List[Dict]] = {}
+        self._persisted_callbacks: List[Callable[[], None]] = []
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+
+    def register(self, kind: str, write: WriteFunc):
+        self._writers[kind] = write
+        self._buffers.setdefault(kind, [])
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def add(self, kind: str, rows: List[Dict], on_persisted: Optional[Callable[[], None]] = None):
+        """on_persisted 在这些行提交后执行, 先于写入登记, 本次写入失败、行留在缓冲区时也会在之后提交时执行"""
+        with self._lock:
+            if rows:
+                self._buffers[kind].extend(rows)
+                self._pending += len(rows)
+            if on_persisted is not None:
+                self.after_persisted(on_persisted)
+            self.maybe_flush()
+
+    def after_persisted(self, callback: Callable[[], None]):
+        """已加入的行全部提交后执行 callback, 没有待写入的行时立即执行; 用于只上报已落库的进度"""
+        with self._lock:
+            if self._pending == 0:
+                callback()
+            else:
+                self._persisted_callbacks.append(callback)
+
+    def maybe_flush(self):
+        """缓冲已满或超过写入间隔时写入"""
+        with self._lock:
+            if self._pending == 0:
+                return
+            if self._pending >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_seconds:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._pending > 0:
+                self._write()
+            self._last_flush = time.monotonic()
+
+    def _write(self):
+        after_commit = []
+        with manual_get_db() as session:
+            try:
+                for kind, rows in self._buffers.items():
+                    if rows:
+                        callback = self._writers[kind](session, self.user, rows)
+                        if callback is not None:
+                            after_commit.append(callback)
+                session.commit()
+            except Exception:
+                # 整批回滚, 行保留在缓冲区, 下次写入时重试
+                session.rollback()
+                raise
+
+        for kind in self._buffers:
+            self._buffers[kind] = []
+        self._pending = 0
+        persisted_callbacks, self._persisted_callbacks = self._persisted_callbacks, []
+
+        # 主库已提交, 以下失败不影响已写入的行, 也不会重试写入
+        for callback in after_commit + persisted_callbacks:
+            try:
+                callback()
+            except Exception:
+                logging.exception("after buffered rows persisted failed")
+
+    def _run_timer(self):
+        while not self._stopped.wait(self.flush_seconds):
+            try:
+                self.maybe_flush()
+            except Exception:
+                logging.exception("flush buffered rows failed")
+
+    def __enter__(self) -> "BufferedWriter":
+        if self.flush_seconds > 0:
+            self._timer = threading.Thread(target=self._run_timer, daemon=True)
+            self._timer.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stopped.set()
+        if self._timer is not None:
+            self._timer.join()
+        # 任务异常结束时也写入已生成的结果
+        try:
+            self.flush()
+        except Exception:
+            if exc_type is None:
+                raise
+            logging.exception("flush buffered rows failed")
+        return False
@@ -2,15 +2,22 @@ from typing import Optional
 
 from fastapi import HTTPException
 
-from app.db.dataset_db_model import project_db, file_db, file_pair_db, question_db, dataset_db, ga_pair_db
+from app.api.middleware.context import get_current_locale
+from app.db.dataset_db_model import project_db, job_db
+from app.db.dataset_db_model.job_db import JobORM
 from app.db.dataset_db_model.project_db import ProjectORM
+from app.db.routing import read_only
 from app.lib.i18n.config import i18n
-from app.models.dataset_models.project_model import ProjectList, ProjectItem, ProjectCreate, ProjectUpdate
+from app.models.dataset_models.job_model import JobType, JobStatus
+from app.models.dataset_models.project_model import ProjectList, ProjectItem, ProjectCreate, ProjectUpdate, \
+    ProjectDeleteGeneratorContent, ProjectDeleteResult
 from sqlalchemy.orm import Session
 
 from app.models.user_model import User
+from app.services.dataset_services.jobs.manager import job_manager
 
 
+@read_only
 def list_project(session: Session, current_user: User, page_no: int, page_size: int) -> ProjectList:
     project_orm_list, total = project_db.list(session, current_user, page_no, page_size, None)
     return ProjectList(
@@ -33,19 +40,22 @@ def update_project(session: Session, current_user: User, project_update: Project
     return ProjectItem(**project_orm.to_dict())
 
 
-def delete_project(session: Session, current_user: User, project_id: str) -> Optional[ProjectItem]:
-    file_db.bulk_delete_files(session, current_user, [project_id])
-    file_pair_db.bulk_delete_file_pairs(session, current_user, [project_id])
-    question_db.bulk_delete_questions(session, current_user, [project_id])
-    dataset_db.bulk_delete_datasets(session, current_user, [project_id])
-    ga_pair_db.bulk_delete_ga_pairs(session, current_user, [project_id])
-
+def delete_project(session: Session, current_user: User, project_id: str) -> ProjectDeleteResult:
+    """项目立即标记删除, 关联数据由后台任务分批删除, 返回该任务的 id"""
     project_orm = project_db.delete(session, current_user, project_id)
-    if project_orm:
-        return ProjectItem(**project_orm.to_dict())
-    else:
+    if not project_orm:
         raise HTTPException(status_code=500, detail=i18n.gettext("Project not found. id: {id}").format(id=project_id))
 
+    job = job_db.create(session, current_user, JobORM(
+        type=JobType.ProjectDeleteGenerator,
+        status=JobStatus.Running,
+        content=ProjectDeleteGeneratorContent(project_id=project_id).model_dump(mode="json"),
+        locale=get_current_locale(),
+        project_id=project_id,
+    ))
+    job_manager.add_job(job)
+    return ProjectDeleteResult(**project_orm.to_dict(), job_id=job.id)
+
 
 def get_project(session: Session, current_user: User, project_id: str) -> Optional[ProjectItem]:
     project_orm = project_db.get(session, current_user, project_id)
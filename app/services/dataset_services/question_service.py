@@ -1,25 +1,27 @@
-import json
+from typing import Dict, List
 
 from fastapi import HTTPException
 
 from app.api.middleware.context import get_current_locale
-from app.api.middleware.deps import manual_get_db
 from app.db.dataset_db_model import question_db, file_pair_db, dataset_db, tag_db, job_db
 from sqlalchemy.orm import Session
 
 from app.db.dataset_db_model.job_db import JobORM
 from app.db.dataset_db_model.question_db import QuestionORM
+from app.db.pagination import encode_cursor
+from app.db.routing import read_only
 from app.lib.i18n.config import i18n
-from app.models.dataset_models.ga_pair_model import GAPairOrigin
 from app.models.dataset_models.question_model import QuestionList, QuestionItem, QuestionSave, \
     BatchDeleteRequest, DatasetGeneratorRequest
 from app.models.dataset_models.job_model import JobStatus, JobType
 from app.models.user_model import User
+from app.services.dataset_services.common_service import parse_cursor, load_ga_pair_map
 from app.services.dataset_services.file_pair_service import db_file_pair_to_item
 from app.services.dataset_services.jobs.manager import job_manager
 
 
-def question_or_to_item(question_orm: QuestionORM, file_pair_map: dict) -> QuestionItem:
+def question_or_to_item(question_orm: QuestionORM, file_pair_map: dict, dataset_id_map: Dict[str, List[str]],
+                        ga_pair_map: dict = None) -> QuestionItem:
     question = QuestionItem(
         id=question_orm.id,
 
@@ -32,43 +34,45 @@ def question_or_to_item(question_orm: QuestionORM, file_pair_map: dict) -> Quest
         updated_at=question_orm.updated_at,
     )
 
-    if question_orm.ga_pair and question_orm.ga_pair != "":
-        question.ga_pair_item = GAPairOrigin(**json.loads(question_orm.ga_pair))
+    if question_orm.ga_pair_id and ga_pair_map:
+        question.ga_pair_item = ga_pair_map.get(question_orm.ga_pair_id)
 
     file_pair = file_pair_map.get(question_orm.file_pair_id)
     if file_pair:
         question.file_pair_item = db_file_pair_to_item(file_pair)
 
-    if question_orm.has_dataset:
-        with manual_get_db() as session:
-            dataset_list_orm, _ = dataset_db.list(session, User(
-                id=question_orm.user_id,
-                group_id=question_orm.group_id,
-            ), 1, 9999, project_id=question_orm.project_id,
-                                                  question_id=question_orm.id)
-            if dataset_list_orm and len(dataset_list_orm) > 0:
-                question.dataset_id_list = [dataset.id for dataset in dataset_list_orm]
-    else:
-        question.dataset_id_list = []
+    question.dataset_id_list = dataset_id_map.get(question_orm.id, [])
     return question
 
 
+@read_only
 def list_question(session: Session, current_user: User, page_no: int, page_size: int, project_id: str, question: str,
-                  label: str) -> QuestionList:
-    question_orm_list, total = question_db.list(session, current_user, page_no, page_size, project_id, question, label)
+                  label: str, cursor: str = None, with_count: bool = True) -> QuestionList:
+    next_cursor = None
+    if cursor is None:
+        question_orm_list, total = question_db.list(session, current_user, page_no, page_size, project_id, question,
+                                                    label)
+    else:
+        question_orm_list, next_after, total = question_db.list_by_cursor(
+            session, current_user, page_size, parse_cursor(cursor), with_count, project_id, question, label)
+        next_cursor = encode_cursor(next_after)
 
     file_pair_id_list = []
     for question_orm in question_orm_list:
         file_pair_id_list.append(question_orm.file_pair_id)
 
     file_pair_map = file_pair_db.list_file_pair_to_map(session, current_user, file_pair_id_list)
+    # 一次查询取出本页所有已生成数据集的问题对应的数据集 id
+    dataset_id_map = dataset_db.ids_by_question_ids(
+        session, current_user, [question_orm.id for question_orm in question_orm_list if question_orm.has_dataset])
+    ga_pair_map = load_ga_pair_map(session, current_user, [question_orm.ga_pair_id for question_orm in question_orm_list])
 
     items: list[QuestionItem] = []
     for question_orm in question_orm_list:
-        question = question_or_to_item(question_orm, file_pair_map)
+        question = question_or_to_item(question_orm, file_pair_map, dataset_id_map, ga_pair_map)
         items.append(question)
 
-    return QuestionList(count=total, data=items)
+    return QuestionList(count=total, data=items, next_cursor=next_cursor)
 
 
 def delete_question(session: Session, current_user: User, id: str) -> QuestionItem:
@@ -108,7 +112,7 @@ def save_question(session: Session, current_user: User, id: str, question_update
             file_pair_id=file_pair.id,
             file_id=file_pair.file_id,
             project_id=file_pair.project_id,
-            ga_pair=""
+            ga_pair_id=""
         ))
     else:
         question_orm = question_db.update(session, current_user, id, {
@@ -116,14 +120,16 @@ def save_question(session: Session, current_user: User, id: str, question_update
             "tag_name": tag_orm.label,
             "file_pair_id": question_update.file_pair_id
         })
-    return question_or_to_item(question_orm, file_pair_map)
+    dataset_id_map = dataset_db.ids_by_question_ids(session, current_user, [question_orm.id])
+    ga_pair_map = load_ga_pair_map(session, current_user, [question_orm.ga_pair_id])
+    return question_or_to_item(question_orm, file_pair_map, dataset_id_map, ga_pair_map)
 
 
 def dataset_generator(session: Session, current_user: User, req: DatasetGeneratorRequest) -> str:
     job = job_db.create(session, current_user, JobORM(
         type=JobType.DatasetGenerator,
         status=JobStatus.Running,
-        content=req.json(),
+        content=req.model_dump(mode="json"),
         locale=get_current_locale(),
         project_id=req.project_id,
     ))
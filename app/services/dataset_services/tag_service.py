@@ -1,30 +1,39 @@
-from typing import List
+import threading
+import uuid
+from typing import List, Dict
+
+from cachetools import LRUCache
 
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
 from app.db.dataset_db_model import tag_db, project_db, question_db
 from app.db.dataset_db_model.tag_db import TagORM
+from app.db.pagination import encode_cursor
+from app.db.routing import read_only
 from app.lib.i18n.config import i18n
-from app.models.dataset_models.tag_model import TagItem, TagUpdate, TagCreate
+from app.models.dataset_models.tag_model import TagItem, TagUpdate, TagCreate, TagQuestionIdPage, TagChatResultItem
 from app.models.user_model import User
+from app.services.dataset_services.common_service import parse_cursor
 
+# (group_id, project_id) -> (版本戳, 标签树), 本进程内的标签写入直接失效, 其他进程的写入通过版本戳发现
+_chat_tree_cache = LRUCache(maxsize=256)
+_chat_tree_lock = threading.Lock()
 
-def get_all_tags(session: Session, current_user: User, project_id: str) -> List[TagItem]:
-    tags = tag_db.list(session, current_user, project_id)
-    if not tags:
-        return []
 
+def build_tag_tree(tags: List[TagORM], question_counts: Dict[str, int],
+                   question_ids: Dict[str, List[str]] = None, root_id: str = None) -> List[TagItem]:
+    """root_id 为空时返回所有根标签, 否则以 root_id 对应的标签作为唯一的根"""
     tag_map = {tag.id: TagItem(**tag.to_dict()) for tag in tags}
     root_tag = []
     for tag in tag_map.values():
-        questions, total = question_db.list(session, current_user, 1, 9999, project_id=tag.project_id, match_tag_name=tag.label)
-        if total > 0:
-            tag.question_id_list = [question.id for question in questions]
-        else:
-            tag.question_id_list = []
-        if tag.parent_id:
-            parent = tag_map[tag.parent_id]
+        tag.question_count = question_counts.get(tag.label, 0)
+        if question_ids is not None:
+            tag.question_id_list = question_ids.get(tag.label, [])
+        if root_id is not None and tag.id == root_id:
+            root_tag.append(tag)
+        elif tag.parent_id:
+            parent = tag_map.get(tag.parent_id)
             if not parent:
                 continue
             if parent.childes is None:
@@ -35,21 +44,113 @@ def get_all_tags(session: Session, current_user: User, project_id: str) -> List[
     return root_tag
 
 
-def insert_tags(session: Session, current_user: User, project_id: str, tags: List[dict], parent_id: str):
+@read_only
+def get_all_tags(session: Session, current_user: User, project_id: str, with_question_ids: bool = True,
+                 question_id_limit: int = None) -> List[TagItem]:
+    """标签树, 问题数按标签分组统计; 问题 id 一次分组查询取出, 可按标签限制条数, 其余通过 list_tag_question_ids 分页获取"""
+    tags = tag_db.list(session, current_user, project_id)
+    if not tags:
+        return []
+
+    question_counts = question_db.count_by_tag(session, current_user, project_id)
+    question_ids = None
+    if with_question_ids:
+        question_ids = question_db.ids_by_tag(session, current_user, project_id, question_id_limit)
+    return build_tag_tree(tags, question_counts, question_ids)
+
+
+@read_only
+def get_tag_subtree(session: Session, current_user: User, id: str) -> TagItem:
+    tag = tag_db.get(session, current_user, id)
+    if not tag:
+        raise HTTPException(status_code=500, detail=i18n.gettext("Tag not found. id: {id}").format(id=id))
+
+    tags = tag_db.list_subtree(session, current_user, tag)
+    question_counts = question_db.count_by_tag(session, current_user, tag.project_id)
+    return build_tag_tree(tags, question_counts, root_id=tag.id)[0]
+
+
+def build_chat_tree(tags: List[TagORM]) -> List[TagChatResultItem]:
+    """构建提示词中使用的标签树, 只保留标签名与层级"""
+    children_map: Dict[str, List[TagORM]] = {}
     for tag in tags:
-        tag_item = create_tag(session, current_user, TagCreate(
-            label=tag["label"],
-            parent_id=parent_id,
-            project_id=project_id,
-        ))
+        children_map.setdefault(tag.parent_id or "", []).append(tag)
+
+    def build(parent_id: str) -> List[TagChatResultItem]:
+        return [TagChatResultItem(label=child.label, child=build(child.id))
+                for child in children_map.get(parent_id, [])]
+
+    return build("")
+
+
+def get_chat_tree(session: Session, current_user: User, project_id: str) -> List[TagChatResultItem]:
+    """项目标签树, 按版本戳缓存, 生成问题/标签的任务复用同一棵树; 返回值为共享对象, 调用方不能修改"""
+    key = (current_user.group_id, project_id)
+    stamp = tag_db.tree_stamp(session, current_user, project_id)
+    with _chat_tree_lock:
+        cached = _chat_tree_cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    tree = build_chat_tree(tag_db.list(session, current_user, project_id))
+    with _chat_tree_lock:
+        _chat_tree_cache[key] = (stamp, tree)
+    return tree
+
+
+def invalidate_chat_tree(current_user: User, project_id: str):
+    with _chat_tree_lock:
+        _chat_tree_cache.pop((current_user.group_id, project_id), None)
+
+
+@read_only
+def list_tag_question_ids(session: Session, current_user: User, id: str, page_size: int = 100,
+                          cursor: str = "") -> TagQuestionIdPage:
+    tag = tag_db.get(session, current_user, id)
+    if not tag:
+        raise HTTPException(status_code=500, detail=i18n.gettext("Tag not found. id: {id}").format(id=id))
+
+    questions, next_after, _ = question_db.list_by_cursor(session, current_user, page_size, parse_cursor(cursor),
+                                                          project_id=tag.project_id, match_tag_name=tag.label)
+    return TagQuestionIdPage(data=[question.id for question in questions], next_cursor=encode_cursor(next_after))
+
+
+def build_tag_rows(project_id: str, tags: List[dict], parent_id: str = "", root_ids: str = "",
+                   rows: List[dict] = None) -> List[dict]:
+    """遍历标签树, 在本地分配 id 并计算 root_ids, 返回可直接批量插入的行"""
+    if rows is None:
+        rows = []
+    for tag in tags:
+        tag_id = str(uuid.uuid4())
+        rows.append({
+            "id": tag_id,
+            "label": tag["label"],
+            "parent_id": parent_id,
+            "root_ids": root_ids,
+            "project_id": project_id,
+        })
         childes = tag.get("child")
         if childes is not None and len(childes) > 0:
-            insert_tags(session, current_user, project_id, childes, tag_item.id)
+            build_tag_rows(project_id, childes, tag_id, root_ids + "," + tag_id, rows)
+    return rows
 
 
 def batch_save_tags(session: Session, current_user: User, project_id: str, tags: List[dict]):
-    tag_db.bulk_delete_tags(session, current_user, [project_id])
-    insert_tags(session, current_user, project_id, tags, "")
+    """整棵标签树替换项目原有标签, 删除与插入在同一个事务中完成"""
+    project = project_db.get(session, current_user, project_id)
+    if not project:
+        raise HTTPException(status_code=500, detail=i18n.gettext("Project not found. id: {id}").format(id=project_id))
+
+    rows = build_tag_rows(project_id, tags)
+    try:
+        tag_db.bulk_delete_tags(session, current_user, [project_id], auto_commit=False)
+        tag_db.bulk_create(session, current_user, rows, auto_commit=False)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        invalidate_chat_tree(current_user, project_id)
 
 
 def create_tag(session: Session, current_user: User, tag: TagCreate) -> TagItem:
@@ -71,6 +172,7 @@ def create_tag(session: Session, current_user: User, tag: TagCreate) -> TagItem:
         project_id=tag.project_id,
     )
     tag_orm = tag_db.create(session, current_user, tag_orm)
+    invalidate_chat_tree(current_user, tag_orm.project_id)
     return tag_orm
 
 
@@ -78,12 +180,13 @@ def update_tag(session: Session, current_user: User, id: str, tag: TagUpdate) ->
     tag_orm = tag_db.update(session, current_user, id, tag.model_dump(exclude_unset=True))
     if not tag_orm:
         raise HTTPException(status_code=500, detail=i18n.gettext("Tag not found. id: {id}").format(id=id))
+    invalidate_chat_tree(current_user, tag_orm.project_id)
     return tag_orm
 
 
 def delete_tag(session: Session, current_user: User, id: str) -> TagItem:
-    tag_db.bulk_delete_tags(session, current_user, parent_id=id)
-    tag_orm = tag_db.delete(session, current_user, id)
+    tag_orm = tag_db.delete_subtree(session, current_user, id)
     if not tag_orm:
         raise HTTPException(status_code=500, detail=i18n.gettext("Tag not found. id: {id}").format(id=id))
+    invalidate_chat_tree(current_user, tag_orm.project_id)
     return tag_orm
@@ -3,6 +3,7 @@ from dataclasses import dataclass
 from app.db.dataset_db_model.dataset_version_db import DatasetVersionORM
 from app.lib.finetune_path.path_build import build_dataset_path, build_deepspeed_path, build_config_path, \
     build_logs_path
+from app.services.dataset_services.dataset_version_processer.exporter import dataset_version_file_name
 
 
 @dataclass
@@ -35,7 +36,7 @@ def build_sft_template(params: build_sft_template_params) -> str:
 微调任务创建之后会有一个初始化阶段，该阶段会将一些前置的文件拷贝到机器上, 前置任务如下
 
 #### 数据集准备
-在微调任务初始化阶段将会吧数据集({params.dataset.name})拷贝到主机的 {build_dataset_path(params.dataset.id)} 位置
+在微调任务初始化阶段将会吧数据集({params.dataset.name})拷贝到主机的 {build_dataset_path(dataset_version_file_name(params.dataset.id, params.dataset.export_format, params.dataset.artifact_hash))} 位置
 
 #### llamafactory-cli 微调配置文件准备
 在微调任务初始化阶段将会将勾选的配置合并生成 config.yaml 文件并拷贝到主机的 {build_config_path(params.job_id)} 位置, config.yaml 文件内容如下
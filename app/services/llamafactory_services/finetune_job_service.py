@@ -2,7 +2,6 @@ import asyncio
 import json
 import logging
 import os
-import subprocess
 import tempfile
 import threading
 import time
@@ -31,11 +30,14 @@ from app.lib.i18n.config import i18n
 from app.lib.machine_connect import machine_connect
 from app.lib.machine_connect.machine_connect import RemoteMachine
 from app.models.dataset_models.dataset_version_model import DatasetType, DatasetVersionItem
+from app.models.dataset_models.job_model import JobStatus
 from app.models.llamafactory_models.finetune_config_model import FinetuneConfigItem
 from app.models.llamafactory_models.finetune_job_model import FinetuneJobList, FinetuneJobItem, FinetuneJobCreate, \
     FinetuneJobRunningExampleRequest, FinetuneJobRunningExample, FinetuneJobStatus
 from app.models.user_model import User
-from app.services.dataset_services.dataset_version_service import dataset_version_file_path_builder
+from app.services.dataset_services.dataset_version_processer.exporter import dataset_version_file_path_builder, \
+    dataset_version_file_name
+from app.services.dataset_services.dataset_version_processer.formats import build_dataset_info
 from app.services.llamafactory_services.finetune_job_example_template.sft_template import build_sft_template, \
     build_sft_template_params
 from app.services.llamafactory_services.finetune_job_example_template.sft_template_en import build_sft_template_en
@@ -171,7 +173,14 @@ EOF
         train_yaml=llamafactory_yaml,
         deepspeed_json=deepspeed_config_json,
         markdown=markdown,
-        dataset_path=dataset_version_file_path_builder(dataset_version_orm.id)
+        dataset_path=dataset_version_file_path_builder(dataset_version_orm.id, dataset_version_orm.export_format,
+                                                       dataset_version_orm.artifact_hash),
+        dataset_info_json=json.dumps(build_dataset_info(
+            dataset_version_orm.id,
+            # dataset_info.json 位于 datasets/{job_id}/ 下, 数据集文件位于 datasets/ 下
+            "../" + dataset_version_file_name(dataset_version_orm.id, dataset_version_orm.export_format,
+                                              dataset_version_orm.artifact_hash),
+            dataset_version_orm.export_format), ensure_ascii=False, indent=2)
     )
 
 
@@ -324,31 +333,13 @@ def list_finetune_job(session: Session, current_user: User, page_no: int, page_s
     )
 
 
-def copy_dataset_to_machine(machine: RemoteMachine, local_path: str, job_id: str):
-    # 本地用 jq 将 jsonl 文件转化为 json 文件
-    output_file = os.path.splitext(local_path)[0] + ".json"
-    if not os.path.exists(output_file):
-        command = f"jq -s '.' {local_path} > {output_file}"
-        subprocess.run(command, shell=True, check=True)
-    else:
-        logging.info(f"Output file {output_file} already exists, skipping...")
-
-    # 将 json 文件上传到远程服务器
-    name = os.path.basename(output_file)
-    dataset_version_id = name.removesuffix(".json")
-    # 该方法内部也会判定 dataset 文件是否存在，存在则跳过上传
-    machine.sftp_upload_with_dirs(output_file, build_dataset_path(dataset_version_id))
+def copy_dataset_to_machine(machine: RemoteMachine, local_path: str, dataset_info_json: str, job_id: str):
+    # 版本文件按导出格式直接上传, LlamaFactory 按扩展名加载 (jsonl/json/parquet/arrow), 不再需要转换
+    # 版本文件以内容哈希命名, 该方法内部判定同名文件已存在时跳过上传, 相同数据的多次微调只上传一次
+    machine.sftp_upload_with_dirs(local_path, build_dataset_path(os.path.basename(local_path)))
 
     temp_path = os.path.join(tempfile.gettempdir(), f"temp_dataset_json_{job_id}.json")
     try:
-        # 写入内容
-        dataset_info_json = f"""
-{{
-   "{dataset_version_id}": {{
-      "file_name": "../{dataset_version_id}.json"
-   }}
-}}
-            """
         with open(temp_path, 'w') as temp_file:
             temp_file.write(dataset_info_json)
         machine.sftp_upload_with_dirs(temp_path, build_train_dataset_info_json_path(job_id))
@@ -422,7 +413,7 @@ async def init_finetune_job(user: User, id: str, local: str):
                                         detail=i18n.gettext("Machine connection test failed. error: {error}",
                                                             local=local).format(error=error_info))
                 # 拷贝微调数据集
-                copy_dataset_to_machine(machine_client, example.dataset_path, id)
+                copy_dataset_to_machine(machine_client, example.dataset_path, example.dataset_info_json, id)
                 # llamafactory-cli 微调配置文件准备
                 copy_train_config(machine_client, example.train_yaml, id)
                 # deepspeed 微调配置文件准备
@@ -474,6 +465,9 @@ def create_finetune_job(session: Session, current_user: User,
     if dataset_version_orm is None: ### 数据集版本
         raise HTTPException(status_code=500, detail=i18n.gettext("Dataset version not found. id: {id}").format(
             id=create.dataset_version_id))
+    if dataset_version_orm.status != JobStatus.Success.name: ### 版本文件尚未导出完成
+        raise HTTPException(status_code=500, detail=i18n.gettext("Dataset version is not ready. id: {id}").format(
+            id=create.dataset_version_id))
 
     finetune_config_orm_list = _query_finetune_config_and_check_exit(session, current_user,
                                                                      create.finetune_config_id_list) ### 查询微调配置是否都存在